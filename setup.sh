@@ -18,7 +18,8 @@ echo "import os" >> $exec_script
 echo "import sys" >> $exec_script
 echo "sys.path.append(os.path.dirname(__file__)+'/src')" >> $exec_script
 echo "import main" >> $exec_script
-echo "main.main()" >> $exec_script
+echo "if __name__ == '__main__':" >> $exec_script
+echo "    main.main()" >> $exec_script
 chmod +x $exec_script
 
 echo '================================='
@@ -0,0 +1,181 @@
+"""
+Batch mode of the CLI: processes many task files with a process pool.
+
+Files are grouped so that any two files whose runs may write into the same
+archive end up on the same worker, one after another:
+- with --archive every file shares that destination, so all form one group;
+- otherwise completed tasks go to custom history files found under the task
+  file's own directory, so files are grouped by directory and a directory is
+  merged into the group of its nearest ancestor directory that has files.
+"""
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+import shell
+import stats
+from clipboard import build_clipboard_companion
+
+TASK_FILE_EXT = '.md'
+# Shared by every group a process runs, so each executions dir is loaded once per worker.
+_executions_index = None
+
+
+def expand_task_files(patterns: [str]) -> [str]:
+    """Task files named by files, directories (searched recursively) and globs, without duplicates."""
+    results = []
+    seen = set()
+
+    def add(path: str):
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            results.append(path)
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                # Skip hidden dirs and the <name>.files dirs holding generated files.
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and not d.endswith('.files'))
+                for f in sorted(files):
+                    if f.endswith(TASK_FILE_EXT):
+                        add(os.path.join(root, f))
+        elif os.path.exists(pattern):
+            add(pattern)
+        else:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    add(path)
+    return results
+
+
+def group_task_files(files: [str], archive: str = None) -> [[str]]:
+    if archive:
+        return [list(files)] if len(files) > 0 else []
+
+    files_by_dir = {}
+    for f in files:
+        files_by_dir.setdefault(os.path.dirname(os.path.abspath(f)), []).append(f)
+
+    groups = []
+    root = None
+    # Ordering by path components visits every directory right after its ancestors.
+    for d in sorted(files_by_dir, key=lambda d: d.split(os.sep)):
+        if root is not None and d.startswith(root.rstrip(os.sep) + os.sep):
+            groups[-1].extend(files_by_dir[d])
+        else:
+            root = d
+            groups.append(list(files_by_dir[d]))
+    return groups
+
+
+def _memories_dir(memories_dir: str, task_file: str) -> str:
+    if not memories_dir:
+        return None
+    return os.path.join(memories_dir, hashlib.sha1(task_file.encode()).hexdigest()[:12])
+
+
+def _worker_executions_index() -> shell.ExecutionsIndex:
+    global _executions_index
+    if _executions_index is None:
+        _executions_index = shell.ExecutionsIndex()
+    return _executions_index
+
+
+def run_group(task_files: [str], options: {}) -> [{}]:
+    """Worker entry point: runs the files one by one sharing the process's executions index."""
+    executions_index = _worker_executions_index()
+    clipboard = build_clipboard_companion()
+    results = []
+    for task_file in task_files:
+        started = time.perf_counter()
+        result = {'file': task_file}
+        run_stats = stats.enable() if options['stats'] else None
+        profiler = None
+        if options['profile_dir']:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            # Pipeline progress goes to stderr; stdout carries the summary.
+            with contextlib.redirect_stdout(sys.stderr):
+                tm = main.TaskMaster(
+                    taskflow_file=task_file,
+                    history_file=options['archive'],
+                    archived_links_processor=options['archived_links_processor'],
+                    executions_dir=options['executions_dir'],
+                    memories_dir=_memories_dir(options['memories_dir'], task_file),
+                    configs_file=options['config'],
+                    clipboard=clipboard,
+                    states_dir=options['states_dir'],
+                    executions_index=executions_index,
+                )
+                if options['reminders']:
+                    result['reminders'] = tm.get_reminders(active_only=False, read_only=True)
+                else:
+                    tm.execute()
+            result['exit_code'] = 0
+        except Exception as e:
+            traceback.print_exc()
+            result['exit_code'] = 1
+            result['error'] = f'{type(e).__name__}: {e}'
+        finally:
+            if profiler:
+                profiler.disable()
+                main.dump_profile(profiler, options['profile_dir'], task_file)
+            if run_stats:
+                stats.disable()
+                result['stats'] = run_stats.as_dict()
+                # Stats always go into the summary; a file destination gets its usual line too.
+                if options['stats'] != stats.STDERR:
+                    stats.report(run_stats, options['stats'], {'task_file': task_file})
+        result['sec'] = time.perf_counter() - started
+        results.append(result)
+    return results
+
+
+def run_batch(args, task_files: [str], jobs: int = None, start_method: str = None) -> {}:
+    options = {
+        'archive': args.archive,
+        'archived_links_processor': args.experimental_archived_links_processor,
+        'executions_dir': args.executions_dir,
+        'memories_dir': args.memories_dir,
+        'config': args.config,
+        'states_dir': args.states_dir,
+        'reminders': args.reminders,
+        'stats': args.stats,
+        'profile_dir': args.profile_dir,
+    }
+    groups = group_task_files(task_files, args.archive)
+    started = time.perf_counter()
+    results = []
+    if len(groups) == 1:
+        results.extend(run_group(groups[0], options))
+    elif len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(groups)),
+                                 mp_context=multiprocessing.get_context(start_method)) as pool:
+            for group_results in pool.map(run_group, groups, [options] * len(groups)):
+                results.extend(group_results)
+    failed = len([r for r in results if r['exit_code'] != 0])
+    return {
+        'files': results,
+        'groups': len(groups),
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'total_sec': time.perf_counter() - started,
+    }
+
+
+def main_batch(args) -> int:
+    task_files = expand_task_files(args.task_files)
+    summary = run_batch(args, task_files, args.jobs)
+    print(json.dumps(summary))
+    return 1 if summary['failed'] > 0 else 0
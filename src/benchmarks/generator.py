@@ -0,0 +1,102 @@
+"""
+Seeded generator of task markdown for benchmarks. The same arguments always
+produce the same document.
+"""
+import random
+from datetime import datetime, timedelta
+
+BENCHMARK_NOW = datetime(2025, 3, 4, 12, 0)
+
+DEFAULT_SHAPE = {
+    'lines_per_topic': 40,
+    'heading_depth': 3,
+    'checkbox_depth': 3,
+    'links_per_line': 0.3,
+    'code_block_density': 0.2,
+    'urgent_ratio': 0.05,
+    'in_progress_ratio': 0.1,
+}
+
+
+def _link(rnd: random.Random, i: int) -> str:
+    if rnd.random() < 0.5:
+        return f'[ref {i}](https://example.com/{i})'
+    return f'[note {i}](./notes/{i}.md)'
+
+
+def _with_links(rnd: random.Random, text: str, links_per_line: float) -> str:
+    count = int(links_per_line)
+    if rnd.random() < links_per_line - count:
+        count += 1
+    for _ in range(count):
+        text += ' ' + _link(rnd, rnd.randrange(1000000))
+    return text
+
+
+def _status(rnd: random.Random, urgent_ratio: float, in_progress_ratio: float) -> str:
+    roll = rnd.random()
+    if roll < urgent_ratio:
+        return '!'
+    if roll < urgent_ratio + in_progress_ratio:
+        return '-'
+    return ' '
+
+
+def _urgent_prefix(rnd: random.Random) -> str:
+    # Half of the reminders are due already, the rest within the next month.
+    due = BENCHMARK_NOW + timedelta(minutes=rnd.randint(-30 * 24 * 60, 30 * 24 * 60))
+    if rnd.random() < 0.5:
+        return due.strftime('%Y.%m.%d %H:%M: ')
+    return due.strftime('%Y.%m.%d: ')
+
+
+def generate_lines(lines: int,
+                   seed: int = 0,
+                   topics: int = None,
+                   heading_depth: int = DEFAULT_SHAPE['heading_depth'],
+                   checkbox_depth: int = DEFAULT_SHAPE['checkbox_depth'],
+                   links_per_line: float = DEFAULT_SHAPE['links_per_line'],
+                   code_block_density: float = DEFAULT_SHAPE['code_block_density'],
+                   urgent_ratio: float = DEFAULT_SHAPE['urgent_ratio'],
+                   in_progress_ratio: float = DEFAULT_SHAPE['in_progress_ratio'],
+                   ) -> [str]:
+    """
+    Roughly ``lines`` lines split into ``topics`` top-level topics (one per
+    lines_per_topic by default). Each topic holds sub-headings up to
+    ``heading_depth``, checkbox trees nested up to ``checkbox_depth``, notes
+    and, with probability ``code_block_density``, a fenced code block.
+    ``links_per_line`` is the mean number of links per checkbox or note, and
+    the ratios set how many checkboxes are urgent reminders or in progress.
+    """
+    rnd = random.Random(seed)
+    if topics is None:
+        topics = max(1, lines // DEFAULT_SHAPE['lines_per_topic'])
+    per_topic = max(1, lines // topics)
+
+    result = []
+    for t in range(topics):
+        result.append(f'# [{_status(rnd, 0, in_progress_ratio)}] topic {t}')
+        body_end = len(result) + per_topic - 1
+        if rnd.random() < code_block_density:
+            result.extend(['```sh', f'echo topic {t}', 'ls -la', '```'])
+        depth = 0
+        item = 0
+        while len(result) < body_end:
+            roll = rnd.random()
+            if roll < 0.05 and heading_depth > 1:
+                level = rnd.randint(2, heading_depth)
+                result.append('#' * level + f' [{_status(rnd, 0, in_progress_ratio)}] section {t}.{item}')
+                result.append('')
+                depth = 0
+            elif roll < 0.15:
+                result.append(_with_links(rnd, f'note {t}.{item}', links_per_line))
+            else:
+                depth = rnd.randint(0, min(depth + 1, checkbox_depth - 1))
+                status = _status(rnd, urgent_ratio, in_progress_ratio)
+                title = f'task {t}.{item}'
+                if status == '!':
+                    title = _urgent_prefix(rnd) + title
+                result.append('    ' * depth + f'- [{status}] ' + _with_links(rnd, title, links_per_line))
+            item += 1
+        result.append('')
+    return result
@@ -0,0 +1,61 @@
+"""
+Scaling benchmark for check-group detection and interval nesting.
+
+Run from ``src``:
+    python3 -m benchmarks.nesting [--sizes 1000 10000 100000]
+
+Prints JSON with timings per size. Both steps are expected to grow linearly
+(per-group cost roughly constant across sizes).
+"""
+import argparse
+import json
+import time
+
+import document
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+GROUPS_PER_BLOCK = 3
+
+
+def outline_lines(groups: int) -> [str]:
+    """Checklist whose check groups count is ``groups`` rounded up to a block."""
+    lines = []
+    for i in range((groups + GROUPS_PER_BLOCK - 1) // GROUPS_PER_BLOCK):
+        lines.extend([
+            f'- [ ] task {i}',
+            f'    - [x] subtask {i}',
+            f'        - [ ] step {i}',
+            f'comment {i}',
+        ])
+    return lines
+
+
+def measure(groups: int) -> {}:
+    doc = document.Document('')
+    doc.extend(outline_lines(groups))
+
+    started = time.perf_counter()
+    check_groups = doc.get_check_groups_at_range(0, len(doc.lines()) - 1)
+    grouped = time.perf_counter()
+    document.as_nested_dict(check_groups)
+    nested = time.perf_counter()
+
+    return {
+        'groups': len(check_groups),
+        'lines': len(doc.lines()),
+        'check_groups_sec': grouped - started,
+        'nesting_sec': nested - grouped,
+        'nesting_usec_per_group': (nested - grouped) * 1e6 / len(check_groups),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times check-group detection and nesting at several sizes.')
+    parser.add_argument('--sizes', metavar='groups', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Check group counts to benchmark')
+    args = parser.parse_args()
+    print(json.dumps([measure(size) for size in args.sizes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Scaling benchmark for the TaskMaster pipeline on generated documents.
+
+Run from ``src``:
+    python3 -m benchmarks.stages [--sizes 1000 10000 100000] [--output run.json]
+    python3 -m benchmarks.stages --baseline run.json
+
+Times every stage of one TaskMaster run plus get_reminders() per size and
+prints (or writes) JSON. Stages whose time grows faster than the line count
+between consecutive sizes are listed under "superlinear". With --baseline,
+stage times are compared with an earlier output at matching sizes and the
+command exits with status 1 when a stage got slower than --tolerance allows.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import file_io
+import stats
+from main import TaskMaster
+from benchmarks import generator
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Time growth exponent (log time ratio / log size ratio) above which a stage counts as super-linear.
+SUPERLINEAR_EXPONENT = 1.3
+# Stages faster than this are too noisy to judge.
+MIN_MEASURABLE_SEC = 0.005
+
+
+def measure(lines: int, seed: int, shape: {}) -> {}:
+    work_dir = tempfile.mkdtemp(prefix='task_master_bench_')
+    try:
+        task_file = os.path.join(work_dir, 'main.md')
+        file_io.write_lines(task_file, generator.generate_lines(lines, seed=seed, **shape))
+
+        def task_master() -> TaskMaster:
+            return TaskMaster(
+                taskflow_file=task_file,
+                history_file=os.path.join(work_dir, 'archive.md'),
+                executions_dir=os.path.join(work_dir, 'executions'),
+                memories_dir=os.path.join(work_dir, 'memories'),
+                datetime_provider=lambda: generator.BENCHMARK_NOW,
+            )
+
+        # Stage progress prints would otherwise mix into the JSON on stdout.
+        with contextlib.redirect_stdout(sys.stderr):
+            run_stats = stats.enable()
+            try:
+                task_master().execute()
+            finally:
+                stats.disable()
+
+        tm = task_master()
+        started = time.perf_counter()
+        reminders = tm.get_reminders(active_only=False)
+        get_reminders_sec = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = run_stats.as_dict()
+    stage_sec = {name: s['sec'] for name, s in report['stages'].items()}
+    stage_sec['get_reminders'] = get_reminders_sec
+    return {
+        'lines': lines,
+        'reminders': len(reminders['reminders']),
+        'total_sec': report['total_sec'],
+        'stage_sec': stage_sec,
+        'counters': report['counters'],
+    }
+
+
+def superlinear_stages(results: [{}]) -> [{}]:
+    findings = []
+    for smaller, larger in zip(results, results[1:]):
+        size_ratio = larger['lines'] / smaller['lines']
+        for name, sec in larger['stage_sec'].items():
+            before = smaller['stage_sec'].get(name, 0)
+            if before < MIN_MEASURABLE_SEC or sec < MIN_MEASURABLE_SEC:
+                continue
+            exponent = math.log(sec / before) / math.log(size_ratio)
+            if exponent > SUPERLINEAR_EXPONENT:
+                findings.append({
+                    'stage': name,
+                    'from_lines': smaller['lines'],
+                    'to_lines': larger['lines'],
+                    'exponent': round(exponent, 2),
+                })
+    return findings
+
+
+def regressions(results: [{}], baseline: [{}], tolerance: float) -> [{}]:
+    findings = []
+    baseline_by_size = {b['lines']: b for b in baseline}
+    for r in results:
+        b = baseline_by_size.get(r['lines'])
+        if not b:
+            continue
+        for name, sec in r['stage_sec'].items():
+            before = b['stage_sec'].get(name, 0)
+            if max(before, sec) < MIN_MEASURABLE_SEC:
+                continue
+            if before == 0 or sec / before > tolerance:
+                findings.append({
+                    'stage': name,
+                    'lines': r['lines'],
+                    'baseline_sec': before,
+                    'sec': sec,
+                })
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times TaskMaster stages on generated documents of several sizes.')
+    parser.add_argument('--sizes', metavar='lines', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Document sizes in lines')
+    parser.add_argument('--seed', type=int, default=0, help='Generator seed')
+    for name, value in generator.DEFAULT_SHAPE.items():
+        if name == 'lines_per_topic':
+            continue
+        parser.add_argument('--' + name.replace('_', '-'), type=type(value), default=value,
+                            help=f'Generator parameter (default: {value})')
+    parser.add_argument('--topics', type=int, default=None,
+                        help=f'Top-level topics (default: one per {generator.DEFAULT_SHAPE["lines_per_topic"]} lines)')
+    parser.add_argument('--output', metavar='file', type=str, help='Write JSON here instead of stdout')
+    parser.add_argument('--baseline', metavar='file', type=str, help='Earlier output to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='Allowed slowdown factor per stage against the baseline')
+    args = parser.parse_args()
+
+    shape = {name: getattr(args, name) for name in generator.DEFAULT_SHAPE if name != 'lines_per_topic'}
+    shape['topics'] = args.topics
+    results = [measure(size, args.seed, shape) for size in sorted(args.sizes)]
+    output = {
+        'seed': args.seed,
+        'shape': shape,
+        'results': results,
+        'superlinear': superlinear_stages(results),
+    }
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            output['regressions'] = regressions(results, json.load(file)['results'], args.tolerance)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        file_io.write_lines(args.output, [text])
+    else:
+        print(text)
+    if output.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Cold start benchmark for the CLI.
+
+Run from ``src``:
+    python3 -m benchmarks.startup [--repeat 10]
+
+Starts a fresh interpreter per sample, the way the editor hook and the
+calendar util do, for ``--reminders`` and for a plain run of a small task
+file. Prints JSON with the median and worst wall time per mode, the heavy
+modules each mode ended up importing, and whether the median stays within
+STARTUP_BUDGET_SEC. Exits with status 1 when a budget is exceeded.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import file_io
+
+# Median wall time per mode, interpreter startup included.
+STARTUP_BUDGET_SEC = {
+    'reminders': 0.20,
+    'run': 0.25,
+}
+# Modules that should only load when a run actually needs them.
+HEAVY_MODULES = ['PIL', 'xerox', 'ctypes', 'cProfile']
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TASK_LINES = [
+    '# [ ] topic',
+    '',
+    '- [ ] task',
+    '    - [-] subtask',
+    '- [!] 2025.03.04 10:00: reminder',
+]
+# Mirrors the generated ./run script, then reports what got imported.
+LAUNCHER = '''
+import sys
+sys.path.append({src!r})
+sys.argv = ['run'] + {args!r}
+import main
+main.main()
+import json
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]), file=sys.stderr)
+'''
+
+
+def sample(args: [str]) -> (float, [str]):
+    code = LAUNCHER.format(src=SRC_DIR, args=args, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True, check=True)
+    elapsed = time.perf_counter() - started
+    loaded = json.loads(result.stderr.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def measure(mode: str, repeat: int) -> {}:
+    timings = []
+    loaded = set()
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix='task_master_startup_')
+        try:
+            task_file = os.path.join(work_dir, 'main.md')
+            file_io.write_lines(task_file, TASK_LINES)
+            args = [
+                '--executions-dir', os.path.join(work_dir, 'executions'),
+                '--memories-dir', os.path.join(work_dir, 'memories'),
+                '--states-dir', os.path.join(work_dir, 'states'),
+            ]
+            if mode == 'reminders':
+                args.append('--reminders')
+            elapsed, modules = sample(args + [task_file])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        timings.append(elapsed)
+        loaded.update(modules)
+
+    median = statistics.median(timings)
+    return {
+        'mode': mode,
+        'median_sec': median,
+        'max_sec': max(timings),
+        'budget_sec': STARTUP_BUDGET_SEC[mode],
+        'within_budget': median <= STARTUP_BUDGET_SEC[mode],
+        'heavy_modules_loaded': sorted(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures cold start time of the CLI against its budget.')
+    parser.add_argument('--repeat', type=int, default=10, help='Samples per mode')
+    args = parser.parse_args()
+
+    results = [measure(mode, args.repeat) for mode in STARTUP_BUDGET_SEC]
+    print(json.dumps(results, indent=2))
+    if not all(r['within_budget'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from array import array
+
 STATUS_IN_PROGRESS = '-'
 STATUS_URGENT = '!'
 STATUS_OPEN = ' '
@@ -121,3 +123,131 @@ def should_convert_subtask_placeholder(lines: [str], index: int) -> bool:
 
     return True
 
+
+
+# Line kind flags stored in LineTable.kinds (a line may carry several).
+LINE_CHECKBOX = 1
+LINE_TASK = 2
+LINE_HEADING = 4
+LINE_FENCE = 8
+LINE_BLANK = 16
+
+NO_OFFSET = -1
+MAX_HEADING_LEVEL = 0xFFFF
+
+
+def _task_status_offset(line: str) -> int:
+    stripped = line.lstrip()
+    rest = stripped.lstrip('#')
+    # is_task() checks '-' + rest as a checkbox, so the status sits at rest[2].
+    if len(rest) < 4 or rest[1] != '[' or rest[3] != ']':
+        return NO_OFFSET
+    return len(line) - len(rest) + 2
+
+
+def _title_offset(line: str, is_checkbox_or_task: bool) -> int:
+    if is_checkbox_or_task:
+        ti = line.find(']')
+    else:
+        skipped = 0
+        while line.startswith('##', skipped):
+            skipped += 1
+        ti = line.find('#', skipped)
+    if ti < 0:
+        return NO_OFFSET
+    return ti + 1
+
+
+def classify_line(line: str) -> (int, int, int, int, int):
+    """
+    :return: (kind flags, heading level, padding width, status offset, title offset)
+
+    The status offset points at the checkbox status of checkbox lines and at
+    the task status of task lines; the title offset is where get_line_title()
+    starts reading (NO_OFFSET when it returns '').
+    """
+    kind = 0
+    padding = 0
+    status = NO_OFFSET
+    marker = _checkbox_marker_index(line)
+    if marker >= 0:
+        kind |= LINE_CHECKBOX
+        padding = marker
+        status = marker + 3
+    task_status = _task_status_offset(line)
+    if task_status >= 0:
+        kind |= LINE_TASK
+        if status < 0:
+            status = task_status
+    level = len(line) - len(line.lstrip('#'))
+    if level > 0:
+        kind |= LINE_HEADING
+    if line.startswith('```'):
+        kind |= LINE_FENCE
+    if line.strip() == '':
+        kind |= LINE_BLANK
+    title = _title_offset(line, kind & (LINE_CHECKBOX | LINE_TASK) != 0)
+    return kind, min(level, MAX_HEADING_LEVEL), padding, status, title
+
+
+class LineTable:
+    """
+    Per-line classification of a document kept in parallel arrays, one entry
+    per line, so hot loops read integers instead of re-parsing strings.
+    """
+
+    def __init__(self, lines: [str], version: int = 0):
+        self.version = version
+        self.kinds = array('b')
+        self.levels = array('H')
+        self.paddings = array('i')
+        self.status_offsets = array('i')
+        self.title_offsets = array('i')
+        self.splice(0, 0, lines)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def splice(self, start: int, stop: int, lines: [str]):
+        """Replaces rows ``start:stop`` with the classification of ``lines``."""
+        kinds = array('b')
+        levels = array('H')
+        paddings = array('i')
+        status_offsets = array('i')
+        title_offsets = array('i')
+        for line in lines:
+            kind, level, padding, status, title = classify_line(line)
+            kinds.append(kind)
+            levels.append(level)
+            paddings.append(padding)
+            status_offsets.append(status)
+            title_offsets.append(title)
+        self.kinds[start:stop] = kinds
+        self.levels[start:stop] = levels
+        self.paddings[start:stop] = paddings
+        self.status_offsets[start:stop] = status_offsets
+        self.title_offsets[start:stop] = title_offsets
+
+    def is_checkbox(self, lines: [str], i: int, status: str = None) -> bool:
+        if not self.kinds[i] & LINE_CHECKBOX:
+            return False
+        if status:
+            return lines[i][self.status_offsets[i]] == status
+        return True
+
+    def is_task(self, lines: [str], i: int, status: str = None) -> bool:
+        kind = self.kinds[i]
+        if not kind & LINE_TASK:
+            return False
+        if kind & LINE_CHECKBOX:
+            # Both shapes at once: the offsets disagree, defer to the parser.
+            return is_task(lines[i], status)
+        if status:
+            return lines[i][self.status_offsets[i]] == status
+        return True
+
+    def line_title(self, lines: [str], i: int) -> str:
+        offset = self.title_offsets[i]
+        if offset < 0:
+            return ''
+        return lines[i][offset:].strip()
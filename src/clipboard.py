@@ -1,22 +1,25 @@
 import os
 import traceback
 
-import xerox
-from PIL import ImageGrab
-
 TEST_ENV_VAR = 'TM_UNDER_TEST'
 
 class ClipboardCompanion:
-    """Provides clipboard access for text and images."""
+    """
+    Provides clipboard access for text and images. xerox and PIL are imported
+    on first use: most runs never touch the clipboard and both are slow to load.
+    """
 
     def copy(self, text: str) -> None:
+        import xerox
         xerox.copy(text)
 
     def paste_text(self) -> str:
+        import xerox
         return xerox.paste()
 
     def paste_image(self, file_path: str) -> bool:
         try:
+            from PIL import ImageGrab
             image = ImageGrab.grabclipboard()
         except Exception as e:
             print("An error occurred during image paste:", e)
@@ -1,10 +1,123 @@
+import bisect
 import checkboxing
+import contextlib
+import file_io
 import os
-import re
-from datetime import datetime, timedelta
-from typing import Union, Tuple, Optional
+import reminder_dates
+import stats
+from typing import Tuple, Optional
+
+
+class StructureIndex:
+    """
+    Topic and code-fence layout of a document snapshot. Built in one pass over
+    lines and valid only for the document version it was built for.
+    """
+
+    def __init__(self, lines: [str], version: int):
+        self.version = version
+        self.topic_starts: [int] = []
+        self.topic_ends: [int] = []
+        self.topic_levels: [int] = []
+        self.code_blocks: [{}] = []
+        self.titles: {str: [int]} = {}
+
+        # Mirrors the historical get_topics() scan, including its end-of-file quirks.
+        start = -1
+        in_code_block = False
+        last = len(lines) - 1
+        for i, line in enumerate(lines):
+            if line.startswith('```'):
+                if in_code_block:
+                    self.code_blocks[-1]['end'] = i
+                else:
+                    self.code_blocks.append({'start': i, 'end': len(lines)})
+                in_code_block = not in_code_block
+            line_is_topic = line.startswith('#') and not in_code_block
+            if line_is_topic and start < 0:
+                start = i
+                continue
+
+            if start >= 0 and (line_is_topic or i == last):
+                self._add_topic(lines, start, i if i == last else i - 1)
+                start = i
+
+    def _add_topic(self, lines: [str], start: int, end: int):
+        self.titles.setdefault(get_line_title(lines[start]), []).append(start)
+        self.topic_starts.append(start)
+        self.topic_ends.append(end)
+        self.topic_levels.append(get_topic_level(lines[start]))
+
+    def topic(self, position: int) -> {}:
+        return {
+            'start': self.topic_starts[position],
+            'end': self.topic_ends[position],
+        }
+
+    def topic_position_at(self, index: int) -> int:
+        """Position of the last topic starting at or before ``index``, -1 if none."""
+        return bisect.bisect_right(self.topic_starts, index) - 1
+
+
+def _is_structure_line(line: str) -> bool:
+    return line.startswith('#') or line.startswith('```')
+
+
+class EditTransaction:
+    """
+    Queued edits for a Document. Every index refers to the lines as they were
+    when the transaction started. Inserts land before the original line at
+    their index (in queue order when several share it), even if that line is
+    removed; removed ranges must not overlap.
+    """
+
+    def __init__(self, doc: 'Document'):
+        self._doc = doc
+        self._inserts: [Tuple[int, [str]]] = []
+        self._removals: [Tuple[int, int]] = []
+
+    def insert(self, index: int, line: str):
+        self._inserts.append((index, [line]))
+
+    def insert_all(self, index: int, lines: [str]):
+        self._inserts.append((index, list(lines)))
+
+    def remove(self, start: int, end: int):
+        self._removals.append((start, end))
+
+    def commit(self):
+        if len(self._inserts) == 0 and len(self._removals) == 0:
+            return
+        old = self._doc.lines()
+        removals = sorted(self._removals)
+        for (start, end), (next_start, _) in zip(removals, removals[1:]):
+            if next_start <= end:
+                raise ValueError(f'Overlapping removals: {start}-{end} and {next_start}')
+
+        result = []
+        cursor = 0
+        next_removal = 0
+
+        def copy_until(stop: int):
+            nonlocal cursor, next_removal
+            while cursor < stop:
+                if next_removal < len(removals) and removals[next_removal][0] < stop:
+                    start, end = removals[next_removal]
+                    result.extend(old[cursor:start])
+                    cursor = max(cursor, end + 1)
+                    next_removal += 1
+                else:
+                    result.extend(old[cursor:stop])
+                    cursor = stop
+
+        for index, lines in sorted(self._inserts, key=lambda e: e[0]):
+            copy_until(index)
+            result.extend(lines)
+        copy_until(len(old))
 
-INVALID_DATE_FORMAT_MESSAGE = "Invalid date format! Expecting YYYY.MM.DD, YYYY.MM.DD HH:mm, HH:mm, +<N>, +<N>m, or +<N>h, or MON, TUE, WED, THU, FRI, SAT, SUN"
+        self._inserts = []
+        self._removals = []
+        self._doc._replace_all(result)
 
 
 class Document:
@@ -12,45 +125,118 @@ class Document:
         super().__init__()
         self._file: str = file
         if os.path.exists(self._file):
-            self._lines: [str] = read_lines(self._file)
+            self._lines: [str] = file_io.read_lines(self._file)
         else:
             self._lines: [str] = []
         self._changed = False
+        self._version = 0
+        self._structure_index: Optional[StructureIndex] = None
+        self._line_table: Optional[checkboxing.LineTable] = None
+        self._links_by_line: {int: [{}]} = {}
+        self._tasks_tree: [{}] = []
+        self._tasks_tree_version = -1
+        self._tasks_by_line: Optional[dict] = None
 
     def lines(self) -> [str]:
         return self._lines
 
+    def version(self) -> int:
+        """Counter bumped on every mutation, used to validate cached views."""
+        return self._version
+
     def insert(self, index: int, line: str):
         self._lines.insert(index, line)
-        self._mark_changed()
-
-    def _mark_changed(self):
+        self._mark_changed(index, index, [line])
+
+    def _mark_changed(self, start: int = 0, stop: int = None, lines: [str] = None):
+        """
+        Bumps the version after lines ``start:stop`` were replaced with ``lines``.
+        The line table is patched for that range; without a range it is rebuilt
+        on next use.
+        """
         self._changed = True
+        self._version += 1
+        if lines is not None and len(lines) == stop - start:
+            for i in range(start, stop):
+                self._links_by_line.pop(i, None)
+        elif len(self._links_by_line) > 0:
+            self._links_by_line = {}
+        table = self._line_table
+        if table and table.version == self._version - 1 and lines is not None:
+            table.splice(start, stop, lines)
+            table.version = self._version
 
     def insert_all(self, index: int, lines: [str]):
-        for l in reversed(lines):
-            self._lines.insert(index, l)
-        self._mark_changed()
+        self._lines[index:index] = lines
+        self._mark_changed(index, index, lines)
 
     def remove(self, start: int, end: int):
-        new_lines = []
-        new_lines.extend(self._lines[:start])
-        new_lines.extend(self._lines[end + 1:])
-        self._lines = new_lines
-        self._mark_changed()
+        del self._lines[start:end + 1]
+        self._mark_changed(start, end + 1, [])
 
     def remove_line(self, index: int):
         self._lines.pop(index)
-        self._mark_changed()
+        self._mark_changed(index, index + 1, [])
 
     def update(self, i, line):
+        structure_neutral = not _is_structure_line(self._lines[i]) and not _is_structure_line(line)
         self._lines[i] = line
+        self._mark_changed(i, i + 1, [line])
+        index = self._structure_index
+        if structure_neutral and index and index.version == self._version - 1:
+            # Plain text edits keep topics and fences where they were.
+            index.version = self._version
+
+    @contextlib.contextmanager
+    def edit(self):
+        """
+        Batches inserts and removals addressed against the current lines and
+        applies them in one pass when the block exits without an error:
+
+            with doc.edit() as tx:
+                tx.remove(10, 12)
+                tx.insert(3, '')
+        """
+        transaction = EditTransaction(self)
+        yield transaction
+        transaction.commit()
+
+    def _replace_all(self, lines: [str]):
+        self._lines[:] = lines
         self._mark_changed()
-        pass
+
+    def get_line_links(self, index: int) -> [{}]:
+        """
+        get_links() of line ``index``, scanned once per line content. The list is
+        shared with other callers and must not be modified.
+        """
+        links = self._links_by_line.get(index, None)
+        if links is None:
+            links = get_links(self._lines[index])
+            self._links_by_line[index] = links
+        return links
+
+    def line_table(self) -> checkboxing.LineTable:
+        """Per-line classification arrays for the current version."""
+        table = self._line_table
+        if not table or table.version != self._version:
+            stats.count('line_table_builds')
+            table = checkboxing.LineTable(self._lines, self._version)
+            self._line_table = table
+        return table
+
+    def _structure(self) -> StructureIndex:
+        index = self._structure_index
+        if not index or index.version != self._version:
+            stats.count('structure_index_builds')
+            index = StructureIndex(self._lines, self._version)
+            self._structure_index = index
+        return index
 
     def trim_trailing_empty_lines(self):
+        size = len(self._lines)
         if trim_trailing_empty_lines(self._lines):
-            self._mark_changed()
+            self._mark_changed(len(self._lines), size, [])
 
     def format_checkboxes_left_paddings(self):
         groups = self.get_check_groups_at_range(start=0, end=len(self._lines) - 1)
@@ -81,7 +267,11 @@ class Document:
     def maybe_insert_subtask_checkboxes(self) -> None:
         index = 1
         while index < len(self.lines()):
-            if checkboxing.should_convert_subtask_placeholder(self.lines(), index):
+            kinds = self.line_table().kinds
+            # Placeholders are plain lines right under a checkbox; skip the rest cheaply.
+            if (kinds[index - 1] & checkboxing.LINE_CHECKBOX
+                    and not kinds[index] & (checkboxing.LINE_CHECKBOX | checkboxing.LINE_HEADING)
+                    and checkboxing.should_convert_subtask_placeholder(self.lines(), index)):
                 self._convert_subtask_placeholder_at(index)
             index += 1
 
@@ -96,10 +286,12 @@ class Document:
             if not nested_group_parent_completed:
                 all_completed = False
 
-        for gl in lines[start:end + 1]:
-            if not checkboxing.is_checkbox(gl, status='x'):
+        table = self.line_table()
+        for gi in range(start, end + 1):
+            if not table.is_checkbox(lines, gi, status='x'):
                 # Any open checkbox means the group still needs a slot.
                 all_completed = False
+                break
 
         if all_completed:
             return False
@@ -141,8 +333,10 @@ class Document:
                     }
                 )
 
-        for insertion in sort_by_end(insertions):
-            self.insert(insertion['end'], insertion['line'])
+        with self.edit() as tx:
+            # Reversed so inserts sharing a position keep their sequential order.
+            for insertion in reversed(sort_by_end(insertions)):
+                tx.insert(insertion['end'], insertion['line'])
 
     def has_changed(self):
         return self._changed
@@ -150,7 +344,33 @@ class Document:
     def save(self):
         if not self.has_changed():
             return
-        write_lines(dst=self._file, lines=self._lines)
+        file_io.write_lines(self._file, self._lines)
+        self._changed = False
+
+    def matches_file(self) -> bool:
+        """Whether the file on disk holds exactly the current lines."""
+        return os.path.exists(self._file) and file_io.read_lines(self._file) == self._lines
+
+    def reload(self):
+        """
+        Re-reads the file after an external edit. Only the lines between the
+        unchanged head and tail are replaced, so per-line caches outside the
+        edit survive. The document counts as unchanged afterwards.
+        """
+        lines = file_io.read_lines(self._file) if os.path.exists(self._file) else []
+        start = 0
+        limit = min(len(lines), len(self._lines))
+        while start < limit and lines[start] == self._lines[start]:
+            start += 1
+        old_stop, new_stop = len(self._lines), len(lines)
+        while old_stop > start and new_stop > start and lines[new_stop - 1] == self._lines[old_stop - 1]:
+            old_stop -= 1
+            new_stop -= 1
+        if start < old_stop or start < new_stop:
+            replacement = lines[start:new_stop]
+            self._lines[start:old_stop] = replacement
+            self._mark_changed(start, old_stop, replacement)
+        self._changed = False
 
     def get_check_groups(self, topic: {}) -> [{}]:
         return self.get_check_groups_at_range(topic['start'], topic['end'])
@@ -158,130 +378,94 @@ class Document:
     def get_check_groups_at_range(self, start: int, end: int) -> [{}]:
         '''
         :return: [ { 'start': 0, 'end': 10 }, ... ]
-        '''
 
-        levels = []
-        for i, line in enumerate(self._lines[start:end + 1]):
-            if not checkboxing.is_checkbox(line):
+        Groups are runs of adjacent checkbox lines whose padding is at least a
+        scan level. Scan levels are the paddings that set a new maximum while
+        reading the range top to bottom, so lines padded less than the first
+        checkbox never form groups. Output is ordered by scan level, then by
+        position, in a single pass that keeps the runs open at each level on a
+        stack.
+        '''
+        stats.count('get_check_groups_at_range')
+        scan_levels: [int] = []
+        groups_by_level: [[{}]] = []
+        open_groups: [{}] = []
+        last_index = None
+
+        table = self.line_table()
+        kinds = table.kinds
+        paddings = table.paddings
+        for li in range(start, min(end + 1, len(self._lines))):
+            if not kinds[li] & checkboxing.LINE_CHECKBOX:
                 continue
-            li = start + i
-            levels.append({
-                'index': li,
-                'level': len(checkboxing.get_padding(line)),
-            })
-
-        check_groups = []
-
-        def next_scan_level(last_level: int) -> int:
-            candidate = last_level
-            for l in levels:
-                if 'scanned_level' in l and l['level'] == l['scanned_level']:
-                    continue
-                if l['level'] > candidate:
-                    return l['level']
-
-            if candidate == last_level:
-                return -1
+            level = paddings[li]
 
-            return candidate
+            if last_index is None or last_index + 1 != li:
+                open_groups.clear()
+            last_index = li
 
-        scan_level = next_scan_level(-1)
-        while scan_level >= 0:
-            group = None
+            if len(scan_levels) == 0 or level > scan_levels[-1]:
+                scan_levels.append(level)
+                groups_by_level.append([])
+            depth = bisect.bisect_right(scan_levels, level)
 
-            for l in levels:
-                if l['level'] < scan_level:
-                    continue
-
-                l['scanned_level'] = scan_level
-                li = l['index']
-                if not group:
-                    group = { 'start': li, 'end': li}
-                    check_groups.append(group)
-                    continue
-
-                if group['end'] + 1 == li:
-                    group['end'] = li
-                else:
-                    # split and start new group if break occurs
-                    group = { 'start': li, 'end': li}
-                    check_groups.append(group)
-
-            scan_level = next_scan_level(scan_level)
+            del open_groups[depth:]
+            for g in open_groups:
+                g['end'] = li
+            while len(open_groups) < depth:
+                group = {'start': li, 'end': li}
+                groups_by_level[len(open_groups)].append(group)
+                open_groups.append(group)
 
+        check_groups = []
+        for groups in groups_by_level:
+            check_groups.extend(groups)
         return check_groups
 
     def get_topics(self) -> [{}]:
-        topics = []
-        topic = {}
-        in_code_block = False
-        for i, line in enumerate(self._lines):
-            if line.startswith('```'):
-                in_code_block = not in_code_block
-            line_is_topic = line.startswith('#') and not in_code_block
-            if line_is_topic and 'start' not in topic:
-                topic['start'] = i
-                continue
+        stats.count('get_topics')
+        index = self._structure()
+        return [index.topic(p) for p in range(len(index.topic_starts))]
 
-            end_of_file = i == len(self._lines) - 1
-            if 'start' in topic and (line_is_topic or end_of_file):
-                if end_of_file:
-                    topic['end'] = i
-                else:
-                    topic['end'] = i - 1
-                topics.append(topic)
-                topic = {
-                    'start': i
-                }
-
-        return topics
+    def get_code_blocks(self) -> [{}]:
+        """
+        :return: [ { 'start': 3, 'end': 7 }, ... ] where 'end' is the closing fence
+        line, or len(lines) for a fence left open until the end of the document.
+        """
+        return [dict(b) for b in self._structure().code_blocks]
 
     def get_topic_lines(self, topic: {}) -> [str]:
         return self._lines[topic['start']: topic['end'] + 1]
 
     def get_topic_by_line(self, index: int) -> {}:
-        candidate = None
-        for t in self.get_topics():
-
-            if t['start'] > index:
-                continue
-
-            if not candidate:
-                candidate = t
-                continue
-            offset_new = index - t['start']
-            offset_old = index - candidate['start']
-
-            if offset_new < offset_old:
-                candidate = t
-
-        return candidate
-
-    def get_topic_by_title(self, title: str) -> {}:
-        for t in self.get_topics():
-            if get_line_title(self._lines[t['start']]) == title:
-                return t
-
-        return None
+        structure = self._structure()
+        position = structure.topic_position_at(index)
+        if position < 0:
+            return None
+        return structure.topic(position)
+
+    def get_topic_by_title(self, title: str, after: int = -1) -> {}:
+        """First topic titled ``title`` that starts below line ``after``."""
+        structure = self._structure()
+        starts = structure.titles.get(title, [])
+        i = bisect.bisect_right(starts, after)
+        if i >= len(starts):
+            return None
+        return structure.topic(structure.topic_position_at(starts[i]))
 
     def inspect_topic(self, topic: {}) -> {}:
         result = {}
         result.update(topic)
+        structure = self._structure()
         root_start = topic['start']
         root_lvl = get_topic_level(self._lines[root_start])
         children = []
-        for t in self.get_topics():
-            if t['start'] <= root_start:
-                continue
-
-            current_lvl = get_topic_level(self._lines[t['start']])
-
-            if current_lvl <= root_lvl:
+        for p in range(bisect.bisect_right(structure.topic_starts, root_start), len(structure.topic_starts)):
+            if structure.topic_levels[p] <= root_lvl:
                 break
 
-            children.append(t)
+            children.append(structure.topic(p))
 
-        children = sort_by_start(children)
         result['children'] = children
         return result
 
@@ -291,11 +475,39 @@ class Document:
     def extend(self, lines: [str]):
         if len(lines) == 0:
             return
+        size = len(self._lines)
         self._lines.extend(lines)
-        self._mark_changed()
+        self._mark_changed(size, size, lines)
         pass
 
     def as_tasks_tree(self) -> []:
+        """
+        Tasks tree of the current document version. The tree is cached and shared
+        between callers until the next mutation, so it must be treated as
+        read-only (see filter_tasks_tree for filtered views).
+        """
+        stats.count('as_tasks_tree')
+        if self._tasks_tree_version != self._version:
+            stats.count('tasks_tree_builds')
+            self._tasks_tree = self._build_tasks_tree()
+            self._tasks_by_line = None
+            self._tasks_tree_version = self._version
+        return self._tasks_tree
+
+    def get_task_at(self, line_index: int) -> {}:
+        """Task of as_tasks_tree() that was built from line ``line_index``, if any."""
+        tasks = self.as_tasks_tree()
+        if self._tasks_by_line is None:
+            self._tasks_by_line = {}
+            pending = list(reversed(tasks))
+            while len(pending) > 0:
+                task = pending.pop()
+                if 'line_index' in task:
+                    self._tasks_by_line.setdefault(task['line_index'], task)
+                pending.extend(reversed(task['children']))
+        return self._tasks_by_line.get(line_index, None)
+
+    def _build_tasks_tree(self) -> []:
         def get_status(line: str) -> str:
             if line.startswith('#'):
                 while line.startswith('#'):
@@ -308,22 +520,26 @@ class Document:
             else:
                 return checkboxing.STATUS_OPEN
 
+        lines = self._lines
+        table = self.line_table()
+
         def to_tasks(check_group: {}) -> [{}]:
+            # Check groups only hold checkbox lines, so padding and status come from the table.
             results = []
             start_ = check_group['start']
             end_ = check_group['end']
-            root_padding = checkboxing.get_padding(self._lines[start_])
-            for i, l in enumerate(self._lines[start_: end_ + 1]):
-                li = start_ + i
+            root_width = table.paddings[start_]
+            root_padding = lines[start_][:root_width]
+            for li in range(start_, end_ + 1):
                 subtasks = []
                 for c in check_group['children']:
                     if c['start'] == li + 1:
                         subtasks = to_tasks(c)
-                if checkboxing.get_padding(l) == root_padding:
+                if table.paddings[li] == root_width and lines[li].startswith(root_padding):
                     results.append({
-                        'title': get_line_title(l),
+                        'title': table.line_title(lines, li),
                         'line_index': li,
-                        'status': get_status(l),
+                        'status': lines[li][table.status_offsets[li]],
                         'children': subtasks,
                     })
             return results
@@ -463,26 +679,12 @@ def trim_trailing_empty_lines(lines: [str]) -> bool:
     return changed
 
 
-def write_lines(dst: str, lines: [str]) -> None:
-    parent = os.path.dirname(dst)
-    os.makedirs(parent, exist_ok=True)
-    updated_content = ''.join(map(lambda l: l + '\n', lines))
-    text_file = open(dst, "w")
-    text_file.write(updated_content)
-    text_file.close()
-
-
 def remove_trailing_newline(s: str) -> str:
     if s.endswith('\n'):
         return s[:-1]
     return s
 
 
-def read_lines(src) -> [str]:
-    with open(src, 'r') as file:
-        return list(map(remove_trailing_newline, file.readlines()))
-
-
 def get_topic_level(line: str) -> int:
     level = 0
     while line.startswith('#'):
@@ -500,52 +702,41 @@ def sort_by_start(ranges: [{}]) -> [{}]:
 
 
 def get_links(markdown_text: str) -> []:
+    """
+    Finds markdown links and image refs in one left-to-right pass over offsets.
+    A link opens at the last '[' before the next '](' and closes at the first
+    ')' after it; scanning stops at the first '](' that has no opening '['.
+    """
+    stats.count('get_links')
     results = []
-    text = markdown_text
+    pos = 0
 
-    while len(text) > 0:
-        link_start = text.find('](')
-        while link_start >= 0 and text[link_start] != '[':
-            link_start -= 1
-
-        if link_start < 0:
+    while pos < len(markdown_text):
+        title_end = markdown_text.find('](', pos)
+        if title_end < 0:
             break
 
-        if link_start > 0 and text[link_start-1] == '!':
-            link_start = link_start - 1
-            text = text[link_start + 2:]
-            link_length = 2
-        else:
-            link_length = 1
-            text = text[link_start + 1:]
-
-        title_end = text.find('](')
-
-        if title_end < 0:
+        title_start = markdown_text.rfind('[', pos, title_end)
+        if title_start < 0:
             break
-        link_length = link_length + title_end
-        title = text[:title_end]
-        text = text[title_end:]
-        link_end = text.find(')')
 
+        link_start = title_start
+        if link_start > pos and markdown_text[link_start - 1] == '!':
+            link_start -= 1
+
+        link_end = markdown_text.find(')', title_end)
         if link_end < 0:
             break
-        link = text[2:link_end]
-        link_end = link_end + 1  # for )
-        link_length = link_length + link_end
-        last_shift = results[len(results)-1]['end'] if len(results) > 0 else 0
-        abs_link_start = last_shift + link_start
-        abs_link_end = abs_link_start + link_length
-
-        result = {
-            'title': title,
-            'link': link,
-            'full_link': markdown_text[abs_link_start:abs_link_end],
-            'start': abs_link_start,
-            'end': abs_link_end,
-        }
-        results.append(result)
-        text = text[link_end:]
+        link_end += 1  # for )
+
+        results.append({
+            'title': markdown_text[title_start + 1:title_end],
+            'link': markdown_text[title_end + 2:link_end - 1],
+            'full_link': markdown_text[link_start:link_end],
+            'start': link_start,
+            'end': link_end,
+        })
+        pos = link_end
     return results
 
 
@@ -554,158 +745,66 @@ def split_title_to_address(title: str) -> [str]:
 
 
 def as_nested_dict(intervals: []) -> []:
-    def find_parent(group: {}, where: {}):
-        if group['start'] >= where['start'] and group['end'] <= where['end']:
-            for c in where.get('children', []):
-                candidate = find_parent(group, c)
-                if candidate:
-                    return candidate
-            return where
-        return None
-
-    def first_child(group: {}, where: [{}]) -> {}:
-        for child in where:
-            if child['start'] > group['start'] and child['end'] <= group['end']:
-                return child
-
-        return None
-
+    """
+    Nests intervals into parent/child trees by containment; each interval gets a
+    'children' list and the roots are returned. Intervals are visited sorted by
+    start (longest first, input order for equal spans) while a stack holds the
+    chain of open ancestors, so nesting is O(n log n) and never recursive.
+    """
+    ordered = sorted(enumerate(intervals), key=lambda e: (e[1]['start'], -e[1]['end'], e[0]))
     roots = []
+    ancestors = []
 
-    for interval in intervals:
+    for _, interval in ordered:
         if 'children' not in interval:
             interval['children'] = []
-        parent = None
-        for r in roots:
-            parent = find_parent(interval, r)
-            if parent:
-                break
 
-        if not parent:
-            c = first_child(interval, roots)
-            if c:
-                roots.remove(c)
-                children = interval.get('children', [])
-                children.append(c)
-                interval['children'] = children
-            roots.append(interval)
-            continue
+        while len(ancestors) > 0 and ancestors[-1]['end'] < interval['end']:
+            ancestors.pop()
 
-        children = parent.get('children', [])
-        children.append(interval)
-        parent['children'] = children
-        # re-balance tree
-        parent['children'] = as_nested_dict(parent['children'])
+        if len(ancestors) > 0:
+            ancestors[-1]['children'].append(interval)
+        else:
+            roots.append(interval)
+        ancestors.append(interval)
     return roots
 
 
 def filter_tasks_tree(tasks: [], status: str) -> []:
+    """
+    Returns copies of the tasks that have ``status`` themselves or below them,
+    each holding only such children. ``tasks`` is left untouched.
+    """
     results = []
     for t in tasks:
         active = t['status'] == status
         active_children = filter_tasks_tree(t['children'], status)
         if active or len(active_children) > 0:
-            t['children'] = active_children
-            results.append(t)
+            view = dict(t)
+            view['children'] = active_children
+            results.append(view)
     return results
 
 
-def format_reminder_date(line: str, now: datetime) -> Optional[str]:
-    content = line.split(': ', 1)[0]
-
-    # Already formatted full date+time
-    if re.search(r'\b\d{4}\.\d{2}\.\d{2}\s\d{2}:\d{2}\b', content):
-        return None
-
-    # Relative: +Nm
-    rel_min_match = re.search(r'\+(\d+)m\b', content)
-    if rel_min_match:
-        delta = timedelta(minutes=int(rel_min_match.group(1)))
-        dt = now + delta
-        return line.replace(rel_min_match.group(0), dt.strftime('%Y.%m.%d %H:%M'), 1)
-
-    # Relative: +Nh
-    rel_hr_match = re.search(r'\+(\d+)h\b', content)
-    if rel_hr_match:
-        delta = timedelta(hours=int(rel_hr_match.group(1)))
-        dt = now + delta
-        return line.replace(rel_hr_match.group(0), dt.strftime('%Y.%m.%d %H:%M'), 1)
-
-    # Relative: +N (shorthand for +Nm)
-    rel_min_short_match = re.search(r'\+(\d+)\b', content)
-    if rel_min_short_match:
-        delta = timedelta(minutes=int(rel_min_short_match.group(1)))
-        dt = now + delta
-        return line.replace(rel_min_short_match.group(0), dt.strftime('%Y.%m.%d %H:%M'), 1)
-
-    # Weekday: MON..SUN (next matching weekday)
-    weekday_names = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
-    weekday_match = re.search(r'\b(MON|TUE|WED|THU|FRI|SAT|SUN)\b', content, re.IGNORECASE)
-    if weekday_match:
-        target_weekday = weekday_names[weekday_match.group(1).upper()]
-        days_ahead = (target_weekday - now.weekday() + 7) % 7
-        days_ahead = 7 if days_ahead == 0 else days_ahead  # Ensure it's the *next* weekday
-        dt = now + timedelta(days=days_ahead)
-        dt = dt.replace(hour=9, minute=0, second=0, microsecond=0)
-        return line.replace(weekday_match.group(0), dt.strftime('%Y.%m.%d'), 1)
-
-    # Time only: HH:mm
-    time_only_match = re.search(r'\b\d{2}:\d{2}\b', content)
-    if time_only_match:
-        date_str = f"{now.strftime('%Y.%m.%d')} {time_only_match.group()}"
-        return line.replace(time_only_match.group(), date_str, 1)
-
-    return None
-
-def extract_reminder_date(line: str, now: Optional[datetime] = None) -> Tuple[Optional[datetime], str]:
-    """Parse a reminder date from ``line`` using ``now`` for relative values."""
-    line = line.lstrip()
-    if now is None:
-        now = datetime.now()
-    raw_date_and_title = line.split(': ', 1)
-
-    if len(raw_date_and_title) != 2:
-        if not line.endswith(':') or ': ' in line:
-            return None, INVALID_DATE_FORMAT_MESSAGE
-        content = line[:-1].strip()
-    else:
-        content = raw_date_and_title[0].strip()
-
-    date_with_time_match = re.match(r'\b\d{4}\.\d{2}\.\d{2}\s\d{1,2}:\d{2}\b', content)
-    date_only_match = re.match(r'\b\d{4}\.\d{2}\.\d{2}\b', content)
-    time_only_match = re.match(r'\b\d{1,2}:\d{2}\b', content)
-
-    date_str = None
-    if date_with_time_match:
-        date_str = date_with_time_match.group()
-    elif date_only_match:
-        date_str = date_only_match.group() + ' 00:00'
-    elif time_only_match:
-        date_str = f"{now.strftime('%Y.%m.%d')} {time_only_match.group()}"
-
-    if not date_str:
-        return None, INVALID_DATE_FORMAT_MESSAGE
-
-    date_obj = datetime.strptime(date_str, '%Y.%m.%d %H:%M')
-    return date_obj, ""
-
-
-def has_retcode_link(line: str) -> bool:
-    for l in get_links(line):
+def has_retcode_link(line: str, links: [] = None) -> bool:
+    """``links`` may carry the already scanned links of ``line``."""
+    for l in get_links(line) if links is None else links:
         if 'retcode=' in l['link']:
             return True
     return False
 
 
-def has_shell_output_link(line: str) -> bool:
-    for l in get_links(line):
+def has_shell_output_link(line: str, links: [] = None) -> bool:
+    for l in get_links(line) if links is None else links:
         if l['title'].startswith('`') and l['title'].endswith('`'):
             return True
     return False
 
 
-def has_retcode_or_shell_output_link(line: str) -> bool:
-    return has_retcode_link(line) or has_shell_output_link(line)
+def has_retcode_or_shell_output_link(line: str, links: [] = None) -> bool:
+    if links is None:
+        links = get_links(line)
+    return has_retcode_link(line, links) or has_shell_output_link(line, links)
 
 
 # Re-export checkbox helpers for callers that import them from document.
@@ -717,3 +816,12 @@ is_checkbox = checkboxing.is_checkbox
 checkbox_status_index = checkboxing.checkbox_status_index
 is_task = checkboxing.is_task
 get_line_title = checkboxing.get_line_title
+
+# Re-export file I/O for callers that import it from document.
+read_lines = file_io.read_lines
+write_lines = file_io.write_lines
+
+# Re-export reminder date parsing for callers that import it from document.
+INVALID_DATE_FORMAT_MESSAGE = reminder_dates.INVALID_DATE_FORMAT_MESSAGE
+format_reminder_date = reminder_dates.format_reminder_date
+extract_reminder_date = reminder_dates.extract_reminder_date
@@ -0,0 +1,93 @@
+import locale
+import mmap
+import os
+import tempfile
+from typing import Iterable, Optional
+
+import stats
+
+# Files at least this large are read through mmap instead of a buffered read.
+MMAP_THRESHOLD = 1 << 20
+
+# Set to 'true' to fsync written files and their directory before returning.
+FSYNC_ENV = 'TASK_MASTER_FSYNC'
+
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def _split_lines(text: str) -> [str]:
+    # Same result as text-mode readlines() without the trailing newlines.
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def read_lines(src: str) -> [str]:
+    stats.count('fs_reads')
+    encoding = locale.getpreferredencoding(False)
+    with open(src, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            text = file.read().decode(encoding)
+        else:
+            # Decode straight from the mapping, skipping the intermediate bytes copy.
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = str(mapped, encoding)
+    return _split_lines(text)
+
+
+def _fsync_enabled(fsync: Optional[bool]) -> bool:
+    if fsync is None:
+        return os.environ.get(FSYNC_ENV, '') == 'true'
+    return fsync
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_lines(dst: str, lines: Iterable[str], fsync: Optional[bool] = None) -> None:
+    """
+    Streams ``lines`` into a temp file next to ``dst`` and renames it over
+    ``dst``, so readers and crashes only ever see the old or the new content.
+    The mode of an existing ``dst`` is kept; symlinks are written through.
+    """
+    stats.count('fs_writes')
+    dst = os.path.realpath(dst)
+    parent = os.path.dirname(dst)
+    os.makedirs(parent, exist_ok=True)
+    try:
+        mode = os.stat(dst).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(dst) + '.', suffix='.tmp', dir=parent)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.writelines(line + '\n' for line in lines)
+            file.flush()
+            os.fchmod(file.fileno(), mode)
+            if _fsync_enabled(fsync):
+                os.fsync(file.fileno())
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    if _fsync_enabled(fsync):
+        _fsync_dir(parent)
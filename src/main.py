@@ -2,9 +2,10 @@ import argparse
 import json
 import os
 import re
+import shlex
 import shutil
 import subprocess
-import time
+import sys
 import typing
 import urllib.parse
 import uuid
@@ -14,8 +15,12 @@ from typing import Callable, Optional, Tuple, Union
 from clipboard import ClipboardCompanion, build_clipboard_companion
 
 import document
+import file_io
 import checkboxing
+import reminder_dates
+import run_states
 import shell
+import stats
 from document import get_padding
 from document import is_checkbox
 from document import sort_by_end, get_line_title
@@ -32,6 +37,8 @@ ACTIVE_TASKS_OVERVIEW_TOPIC = '>>> (Active) <<<'
 ACTIVE_TASKS_OVERVIEW = f'# {ACTIVE_TASKS_OVERVIEW_TOPIC}'
 REMINDERS_TOPIC = '>>> (Reminders) <<<'
 WAIT_EXECUTIONS_ENV = 'TASK_MASTER_WAIT_ALL_EXECUTIONS'
+WAIT_EXECUTIONS_TIMEOUT_SEC = 5
+WATCH_DEBOUNCE_SEC = 0.3
 ERROR_NOTATION = '(GOT ERRORS AT COMPLETION)'
 REMINDER_TOPIC_PREFIX_MAX_LEN = 50
 
@@ -65,6 +72,8 @@ class TaskMaster:
                  memories_dir: str = None,
                  configs_file: str = None,
                  clipboard: Union[ClipboardCompanion, None] = None,
+                 states_dir: str = None,
+                 executions_index: shell.ExecutionsIndex = None,
                  ) -> None:
         super().__init__()
         self._datetime_provider = datetime_provider
@@ -79,9 +88,10 @@ class TaskMaster:
         if not executions_dir:
             executions_dir = python_script_path + '/shell_executions'
         self._executions_dir = executions_dir
-        self._cached_executions = None
+        self._executions_index = executions_index or shell.ExecutionsIndex()
         self._archived_links_processor = archived_links_processor
         self._shell_launches = []
+        self._liveness = shell.ProcessLiveness()
         self._shell_path = self._determine_shell()
         if clipboard:
             self._clipboard = clipboard
@@ -89,6 +99,8 @@ class TaskMaster:
             self._clipboard = build_clipboard_companion()
         self._cached_execution_completions = {}
         self._configs = None
+        self._reminder_dates = reminder_dates.ReminderDates()
+        self._states_dir = states_dir
 
     def _determine_shell(self) -> str:
         for candidate in ['/bin/zsh', '/bin/bash', '/bin/sh']:
@@ -106,19 +118,20 @@ class TaskMaster:
         self._doc.insert(0, '# [-] ' + current_time)
 
     def _insert_setup_template_to_tasks(self):
-        for topic in sort_by_end(self._doc.get_topics()):
-            if self._doc.lines()[topic['start']] == UNUSED_FILES:
-                continue
+        with self._doc.edit() as tx:
+            for topic in self._doc.get_topics():
+                if self._doc.lines()[topic['start']] == UNUSED_FILES:
+                    continue
 
-            i = topic['start'] + 1
-            line = self._doc.lines()[i]
+                i = topic['start'] + 1
+                line = self._doc.lines()[i]
 
-            if line.strip() != '':
-                continue
+                if line.strip() != '':
+                    continue
 
-            self._doc.remove(start=i, end=i)
-            template: [str] = self._get_configs()[CONFIG_DIVE_IN_TEMPLATE]
-            self._doc.insert_all(i, template)
+                tx.remove(start=i, end=i)
+                template: [str] = self._get_configs()[CONFIG_DIVE_IN_TEMPLATE]
+                tx.insert_all(i, template)
         pass
 
     def _move_checkboxes_comments_into_tasks(self):
@@ -192,7 +205,7 @@ class TaskMaster:
                     'start': s['start'],
                     'end': s['end'],
                 })
-                self._doc.lines()[subtask_index] = self._doc.lines()[subtask_index].replace('- [ ]', '- [^]')
+                self._doc.update(subtask_index, self._doc.lines()[subtask_index].replace('- [ ]', '- [^]'))
                 self._doc.remove(s['start'], s['end'])
 
         for insertion in sort_by_end(insertions):
@@ -247,17 +260,6 @@ class TaskMaster:
 
         return results
 
-    def _find_task_at(self, line_index: int, tasks: [{}]) -> {}:
-        for task in tasks:
-            if 'line_index' in task and task['line_index'] == line_index:
-                return task
-
-            candidate = self._find_task_at(line_index, task.get('children', []))
-
-            if candidate:
-                return candidate
-        return None
-
     def _prepare_ongoing_topic_lines(self, tasks: [], level: int = 0) -> [{}]:
         def find_single_ongoing_checkbox_line(task: {}) -> int:
             candidate = -1
@@ -332,10 +334,7 @@ class TaskMaster:
 
                 if document.is_task(self._doc.line(task['line_index']), status=document.STATUS_IN_PROGRESS):
                     # finding first opened checkbox to move focus to it so we could return to task faster
-                    task_with_all_children = self._find_task_at(
-                        line_index = task['line_index'],
-                        tasks = self._doc.as_tasks_tree(),
-                    )
+                    task_with_all_children = self._doc.get_task_at(task['line_index'])
 
                     if task_with_all_children:
                         open_checkbox_index = find_first_open_checkbox(task_with_all_children)
@@ -362,9 +361,11 @@ class TaskMaster:
             results.extend(self._prepare_ongoing_topic_lines(tasks=task['children'], level=level + 1))
         return results
 
-    def _process_and_extract_reminders(self, tasks_tree: [], active_only: bool) -> Tuple[typing.List, typing.List]:
+    def _process_and_extract_reminders(self, tasks_tree: [], active_only: bool,
+                                       read_only: bool = False) -> Tuple[typing.List, typing.List]:
         """
         returns to lists: results and errors
+        with ``read_only`` dates are formatted and errors reported without updating the document
         """
         results = []
         errors = []
@@ -373,26 +374,29 @@ class TaskMaster:
         for t in tasks_tree:
             if t['status'] == document.STATUS_URGENT:
                 raw_line = self._doc.line(t['line_index'])
-                formatted_line: str = document.format_reminder_date(raw_line, today)
+                formatted_line: str = reminder_dates.format_reminder_date(raw_line, today)
 
                 if formatted_line:
-                    self._doc.update(t['line_index'], formatted_line)
+                    if not read_only:
+                        self._doc.update(t['line_index'], formatted_line)
                     raw_line = formatted_line
 
                 date: Optional[datetime]
                 error: str
-                date, error = document.extract_reminder_date(document.get_line_title(raw_line), today)
+                date, error = self._reminder_dates.extract(document.get_line_title(raw_line), today)
 
                 # handling possible shell execution as reminder
-                if len(error) > 0 and document.has_retcode_or_shell_output_link(raw_line):
+                links = self._doc.get_line_links(t['line_index'])
+                if len(error) > 0 and document.has_retcode_or_shell_output_link(raw_line, links):
                     error = ''
-                    if document.has_retcode_link(raw_line):
+                    if document.has_retcode_link(raw_line, links):
                         date = self._datetime_provider() - timedelta(minutes=1)
                     else:
                         date = self._datetime_provider() + timedelta(days=1)
 
                 if len(error) > 0:
-                    self._doc.update(t['line_index'], self._doc.line(t['line_index']) + f' **({error})**')
+                    if not read_only:
+                        self._doc.update(t['line_index'], self._doc.line(t['line_index']) + f' **({error})**')
                     errors.append({
                         'title': t['title'],
                         'line': t['line_index'] + 1,
@@ -401,7 +405,7 @@ class TaskMaster:
                 if date and (not active_only or date <= today):
                     results.append(t)
 
-            r, e = self._process_and_extract_reminders(t['children'], active_only)
+            r, e = self._process_and_extract_reminders(t['children'], active_only, read_only)
             results.extend(r)
             errors.extend(e)
 
@@ -409,20 +413,24 @@ class TaskMaster:
 
     def _sort_reminders(self, reminders: []) -> []:
         now = self._datetime_provider()
-        reminders.sort(key=lambda r: document.extract_reminder_date(r['title'], now)[0] or datetime.max)
+        reminders.sort(key=lambda r: self._reminder_dates.extract(r['title'], now)[0] or datetime.max)
         return reminders
 
-    def get_reminders(self, active_only: bool = True) -> dict:
-        """Return reminders filtered by due date if ``active_only`` is True."""
+    def get_reminders(self, active_only: bool = True, read_only: bool = False) -> dict:
+        """
+        Return reminders filtered by due date if ``active_only`` is True.
+        With ``read_only`` the document is left untouched, which is enough for
+        callers that never save it.
+        """
         all_reminders = document.filter_tasks_tree(
             self._doc.as_tasks_tree(), status=document.STATUS_URGENT)
-        unsorted_reminders, errors = self._process_and_extract_reminders(all_reminders, active_only)
+        unsorted_reminders, errors = self._process_and_extract_reminders(all_reminders, active_only, read_only)
         reminders = self._sort_reminders(unsorted_reminders)
         results = []
         now = self._datetime_provider()
         for r in reminders:
             title = r['title']
-            date, error = document.extract_reminder_date(title, now)
+            date, error = self._reminder_dates.extract(title, now)
 
             if len(error) > 0:
                 errors.append({
@@ -458,15 +466,12 @@ class TaskMaster:
 
 
     def _inject_ongoing_overview(self):
-        existing = self._doc.get_topic_by_title(ACTIVE_TASKS_OVERVIEW_TOPIC)
-
-        if existing:
-            self._doc.remove(existing['start'], existing['end'])
-
-        existing = self._doc.get_topic_by_title(REMINDERS_TOPIC)
+        with self._doc.edit() as tx:
+            for title in [ACTIVE_TASKS_OVERVIEW_TOPIC, REMINDERS_TOPIC]:
+                existing = self._doc.get_topic_by_title(title)
 
-        if existing:
-            self._doc.remove(existing['start'], existing['end'])
+                if existing:
+                    tx.remove(existing['start'], existing['end'])
 
         ongoing_tasks = document.filter_tasks_tree(self._doc.as_tasks_tree(), status=document.STATUS_IN_PROGRESS)
         all_reminders = document.filter_tasks_tree(self._doc.as_tasks_tree(), status=document.STATUS_URGENT)
@@ -523,28 +528,128 @@ class TaskMaster:
                     self._doc.update(i, line.replace(wrong, correct))
 
     def execute(self):
+        # Process states are read once per run; our own launches are still polled directly.
+        self._liveness = shell.ProcessLiveness()
+        # Per-run memo, so a --watch session does not keep every title of every day.
+        self._reminder_dates = reminder_dates.ReminderDates()
+        with stats.stage('fingerprint'):
+            fingerprint = self._run_fingerprint()
+            if self._is_unchanged_run(fingerprint):
+                stats.count('unchanged_run_skips')
+                return
         self._execute()
-        self._try_wait_executions()
-        if self._doc.has_changed():
-            self._make_defensive_copy()
-            self._doc.save()
+        with stats.stage('try_wait_executions'):
+            self._try_wait_executions()
+        with stats.stage('save'):
+            if self._doc.has_changed():
+                self._make_defensive_copy()
+                self._doc.save()
+            else:
+                self._record_unchanged_run(fingerprint)
+        with stats.stage('compact_executions'):
+            self._drop_unreferenced_executions()
+            self._executions_journal().compact()
+
+    def reload(self):
+        """Picks up external edits of the task file and config before the next execute()."""
+        self._doc.reload()
+        self._configs = None
+        self._invalidate_executions()
+        self._cached_execution_completions = {}
+        self._shell_launches = [sl for sl in self._shell_launches if sl['proc'].poll() is None]
+
+    def get_document(self) -> document.Document:
+        return self._doc
+
+    def watched_files(self) -> [str]:
+        files = [self._target_file]
+        if self._configs_file:
+            files.append(self._configs_file)
+        return files
+
+    def _run_fingerprint(self) -> Optional[dict]:
+        """
+        Everything a run reads besides the clock: the task file, the config,
+        the .files listing, pending shell executions and the CLI arguments.
+        """
+        if not self._states_dir:
+            return None
+        return {
+            'content': run_states.file_digest(self._target_file),
+            'config': run_states.mtime_stamp(self._configs_file),
+            'files': run_states.listing_stamp(get_config_files(self._target_file)),
+            'pending': self._pending_executions_count(),
+            'args': [
+                self._history_file,
+                self._configs_file,
+                self._archived_links_processor,
+                self._executions_dir,
+            ],
+        }
+
+    def _pending_executions_count(self) -> int:
+        # The executions dir may be shared by many task files; only this file's outputs matter.
+        files_dir = get_config_files(self._target_file)
+        return len([e for e in self._executions_journal().executions_under(files_dir) if not e['status']])
+
+    def _is_unchanged_run(self, fingerprint: Optional[dict]) -> bool:
+        if not fingerprint or fingerprint['pending'] > 0:
+            return False
+        state = run_states.load_state(self._states_dir, self._target_file)
+        if not state or state.get('fingerprint') != fingerprint:
+            return False
+        deadline = state.get('reminder_deadline')
+        return deadline is None or self._datetime_provider() < datetime.fromisoformat(deadline)
+
+    def _record_unchanged_run(self, fingerprint: Optional[dict]):
+        # Only runs that left the file as it was are recorded, so replaying
+        # the same inputs is known to be a no-op until the next reminder is due.
+        if not fingerprint or fingerprint['pending'] > 0 or len(self._shell_launches) > 0:
+            return
+        deadline = self._next_reminder_deadline()
+        run_states.save_state(self._states_dir, self._target_file, {
+            'fingerprint': fingerprint,
+            'reminder_deadline': deadline.isoformat() if deadline else None,
+        })
+
+    def _next_reminder_deadline(self) -> Optional[datetime]:
+        now = self._datetime_provider()
+        deadline = None
+        reminders = document.filter_tasks_tree(self._doc.as_tasks_tree(), status=document.STATUS_URGENT)
+        while len(reminders) > 0:
+            r = reminders.pop()
+            reminders.extend(r['children'])
+            if r['status'] != document.STATUS_URGENT:
+                continue
+            date, _ = self._reminder_dates.extract(r['title'], now)
+            if date and date > now and (deadline is None or date < deadline):
+                deadline = date
+        return deadline
+
+    def stages(self) -> [Tuple[str, Callable[[], None]]]:
+        """Named steps of one pass over the document, in execution order."""
+        return [
+            ('reconcile_spawned_executions', self._reconcile_spawned_executions),
+            ('fix_typos', self._fix_typos),
+            ('format_checkboxes_left_paddings', self._doc.format_checkboxes_left_paddings),
+            ('untitled_to_tasks', self._untitled_to_tasks),
+            ('insert_setup_template_to_tasks', self._insert_setup_template_to_tasks),
+            ('move_checkboxes_comments_into_tasks', self._move_checkboxes_comments_into_tasks),
+            ('move_checkboxes_subtasks_into_tasks', self._move_checkboxes_subtasks_into_tasks),
+            ('maybe_insert_subtask_checkboxes', self._doc.maybe_insert_subtask_checkboxes),
+            ('inject_extra_checkboxes', lambda: self._doc.inject_extra_checkboxes(UNUSED_FILES_TOPIC)),
+            ('move_completed_tasks', self._move_completed_tasks),
+            ('update_checkboxes_status', self._update_checkboxes_status),
+            ('generate_new_links', self._generate_new_links),
+            ('process_unused_files', self._process_unused_files),
+            ('inject_ongoing_overview', self._inject_ongoing_overview),
+            ('trim_lines', self._trim_lines),
+        ]
 
     def _execute(self):
-        self._reconcile_spawned_executions()
-        self._fix_typos()
-        self._doc.format_checkboxes_left_paddings()
-        self._untitled_to_tasks()
-        self._insert_setup_template_to_tasks()
-        self._move_checkboxes_comments_into_tasks()
-        self._move_checkboxes_subtasks_into_tasks()
-        self._doc.maybe_insert_subtask_checkboxes()
-        self._doc.inject_extra_checkboxes(UNUSED_FILES_TOPIC)
-        self._move_completed_tasks()
-        self._update_checkboxes_status()
-        self._generate_new_links()
-        self._process_unused_files()
-        self._inject_ongoing_overview()
-        self._trim_lines()
+        for name, run_stage in self.stages():
+            with stats.stage(name):
+                run_stage()
 
     def _make_defensive_copy(self):
         os.makedirs(self._memories_dir, exist_ok=True)
@@ -553,13 +658,14 @@ class TaskMaster:
 
     def _move_completed_tasks(self):
         def get_parents(subtask: {}, tasks: [{}]):
-            subtask_lvl = document.get_topic_level(self._doc.lines()[subtask['start']])
+            levels = self._doc.line_table().levels
+            subtask_lvl = levels[subtask['start']]
             results = []
             for t in sort_by_end(tasks):
                 is_below_subtask = t['end'] > subtask['start']
                 if is_below_subtask:
                     continue
-                lvl = document.get_topic_level(self._doc.lines()[t['start']])
+                lvl = levels[t['start']]
 
                 if lvl < subtask_lvl:
                     results.append(self._doc.lines()[t['start']])
@@ -789,7 +895,8 @@ class TaskMaster:
                 filename = 'untitled'
             return filename
 
-        def process_hyperlinks(line_index: int, hyperlinks: []):
+        def process_hyperlinks(line_index: int, hyperlinks: []) -> []:
+            results = []
             for match in hyperlinks:
                 markdown_text = match['full_link']
                 is_picture_ref = markdown_text.startswith('!')
@@ -817,42 +924,44 @@ class TaskMaster:
                         lines = []
                         if clip:
                             lines.append(clip)
-                        document.write_lines(abs_link, lines)
+                        file_io.write_lines(abs_link, lines)
                 else:
                     processed_link = None
 
                 if processed_link:
-                    match['processed_link'] = processed_link
+                    processed = dict(match)
+                    processed['processed_link'] = processed_link
+                    results.append(processed)
 
-            return hyperlinks
+            return results
 
-        for i, line in enumerate(self._doc.lines()):
-            line_links = process_hyperlinks(i, document.get_links(line))
+        for i in range(len(self._doc.lines())):
+            self._apply_processed_links(i, process_hyperlinks(i, self._doc.get_line_links(i)))
 
-            for h in sort_by_end(line_links):
-                new_link = h.get('processed_link', None)
+    def _apply_processed_links(self, line_index: int, processed_links: [{}]):
+        line = self._doc.line(line_index)
+        for h in sort_by_end(processed_links):
+            new_link = h.get('processed_link', None)
 
-                if new_link:
-                    prefix = ''
-                    is_picture_ref = h['full_link'].startswith('!')
-                    if is_picture_ref:
-                        prefix = '!'
-                    full_link = prefix + '[' + h['title'] + '](' + new_link + ')'
-                    old_line = line
-                    line = line[:h['start']] + full_link + line[h['end']:]
-                    if old_line != line:
-                        print('UPDATING LINE LINK: ')
-                        print('  was:', old_line)
-                        print('  now:', line)
-                    self._doc.update(i, line)
+            if new_link:
+                prefix = ''
+                is_picture_ref = h['full_link'].startswith('!')
+                if is_picture_ref:
+                    prefix = '!'
+                full_link = prefix + '[' + h['title'] + '](' + new_link + ')'
+                old_line = line
+                line = line[:h['start']] + full_link + line[h['end']:]
+                if old_line != line:
+                    print('UPDATING LINE LINK: ')
+                    print('  was:', old_line)
+                    print('  now:', line)
+                self._doc.update(line_index, line)
 
     def _process_unused_files(self):
         used_link_lines = {}
 
-        for i, line in enumerate(self._doc.lines()):
-            line_links = document.get_links(line)
-
-            for h in sort_by_end(line_links):
+        for i in range(len(self._doc.lines())):
+            for h in self._doc.get_line_links(i):
                 link = urllib.parse.unquote(h['link'])
                 link_lines = used_link_lines.get(link, set())
                 link_lines.add(i)
@@ -886,11 +995,14 @@ class TaskMaster:
 
         start = topic['start']
         existing_lines = self._doc.get_topic_lines(topic)
+        new_lines = []
         for u in unused:
             encoded = urllib.parse.quote(u)
             l = f'- [ ] [complete to delete]({encoded})'
             if l not in existing_lines:
-                self._doc.insert(start + 1, l)
+                new_lines.insert(0, l)
+        if len(new_lines) > 0:
+            self._doc.insert_all(start + 1, new_lines)
 
     def _used_outside_unused_files_topic(self, used_links_topics: {}, link: str) -> bool:
         topic = self.get_unused_files_topic()
@@ -914,7 +1026,7 @@ class TaskMaster:
             if not document.is_checkbox(line, 'x') and not delete_all:
                 continue
 
-            links = document.get_links(line)
+            links = self._doc.get_line_links(i)
 
             if len(links) == 0:
                 continue
@@ -942,26 +1054,28 @@ class TaskMaster:
     def _gather_existing_files(self) -> [str]:
         config_files = get_config_files(self._target_file)
         dir = os.path.basename(config_files)
+        stats.count('fs_scans')
         for root, _, files in os.walk(config_files):
             return list(map(lambda f: './' + dir + '/' + f, files))
         return []
 
     def _trim_lines(self):
-        for t in sort_by_end(self._doc.get_topics()):
-            i = t['start'] - 1
-            if i < 0:
-                continue
+        with self._doc.edit() as tx:
+            for t in self._doc.get_topics():
+                i = t['start'] - 1
+                if i < 0:
+                    continue
 
-            if len(self._doc.lines()[i].strip()) > 0:
-                self._doc.insert(i + 1, '')
+                if len(self._doc.lines()[i].strip()) > 0:
+                    tx.insert(i + 1, '')
         self._doc.trim_trailing_empty_lines()
 
     def _update_checkboxes_status(self):
+        table = self._doc.line_table()
         for i, line in enumerate(self._doc.lines()):
-            index = document.checkbox_status_index(line)
-
-            if index < 0 or line[index] != ' ':
+            if not table.is_checkbox(self._doc.lines(), i, status=' '):
                 continue
+            index = table.status_offsets[i]
 
             question = '? - '
             if question not in line:
@@ -981,7 +1095,7 @@ class TaskMaster:
         os.makedirs(parent, exist_ok=True)
         history_lines = []
         if os.path.exists(file):
-            history_lines = document.read_lines(file)
+            history_lines = file_io.read_lines(file)
         if len(history_lines) == 0:
             history_lines.append('')
         return history_lines
@@ -993,16 +1107,13 @@ class TaskMaster:
         checkbox_title = address[-1]
         parent_topic_start = -1
         parent_topic_end = -1
-        topics = self._doc.get_topics()
 
         while len(checkbox_topics) > 0:
             target = checkbox_topics.pop(0)
-            for t in topics:
-                start = t['start']
-                if document.get_line_title(self._doc.lines()[start]) == target and start > parent_topic_start:
-                    parent_topic_start = start
-                    parent_topic_end = t['end']
-                    break
+            t = self._doc.get_topic_by_title(target, after=parent_topic_start)
+            if t:
+                parent_topic_start = t['start']
+                parent_topic_end = t['end']
 
         if len(checkbox_topics) > 0:
             return -1
@@ -1039,24 +1150,24 @@ class TaskMaster:
             extract_end = None
             extract_group_padding = None
 
+            table = self._doc.line_table()
             for i in range(start, end + 1):
                 if extract_start:
-                    subtasks_stopped = len(get_padding(self._doc.lines()[i])) <= len(extract_group_padding)
+                    subtasks_stopped = table.paddings[i] <= len(extract_group_padding)
 
                     if subtasks_stopped:
                         break
 
                     extract_end = i
                 else:
-                    line = self._doc.lines()[i]
-                    if not is_checkbox(line, status='^'):
+                    if not table.is_checkbox(self._doc.lines(), i, status='^'):
                         continue
 
                     if len(self._doc.lines()) - 1 < i + 1:
                         continue
 
                     extract_group_padding = get_padding(self._doc.lines()[i])
-                    no_need_to_extract = len(get_padding(self._doc.lines()[i + 1])) <= len(extract_group_padding)
+                    no_need_to_extract = table.paddings[i + 1] <= len(extract_group_padding)
 
                     if no_need_to_extract:
                         continue
@@ -1084,18 +1195,15 @@ class TaskMaster:
             # Drop stale exec dirs that still claim this path (e.g. after the log was
             # moved/deleted while a previous wrapper's bookkeeping remained). Otherwise a
             # finished neighbor's retcode (often 143 from SIGTERM) can finalize the new file.
-            shell.drop_executions_claiming_path(self._executions_dir, dst)
-            self._cached_executions = None
-            document.write_lines(dst, lines=['<waiting for output>'])
+            journal = self._executions_journal()
+            shell.drop_executions_claiming_path(journal, dst, self._liveness)
+            file_io.write_lines(dst, lines=['<waiting for output>'])
             os.makedirs(os.path.dirname(dst), exist_ok=True)
             raw_cmd = title.removeprefix('`').removesuffix('`')
 
-            os.makedirs(self._executions_dir, exist_ok=True)
-            exec_dir = os.path.join(self._executions_dir, str(uuid.uuid4()))
-            os.makedirs(exec_dir, exist_ok=True)
-            document.write_lines(os.path.join(exec_dir, 'output'), [dst])
-
-            script_path = os.path.join(exec_dir, 'run.sh')
+            os.makedirs(journal.executions_dir, exist_ok=True)
+            execution_id = str(uuid.uuid4())
+            script_path = shell.execution_script_path(journal.executions_dir, execution_id)
             script_lines = [f'#!{self._shell_path}']
 
             rc_file = None
@@ -1119,22 +1227,21 @@ class TaskMaster:
             script_lines.append('')
             script_lines.append('# TASK MASTER: actual command')
             script_lines.append(raw_cmd)
-            document.write_lines(script_path, script_lines)
+            file_io.write_lines(script_path, script_lines)
             os.system('chmod +x '+script_path)
+            stats.count('subprocess_spawns')
             # Direct redirect (no live pipe): piping through sed loses buffered output when
             # the process group is killed mid-run (pid-loss).
-            result_path = os.path.join(exec_dir, 'execution_result')
-            cmd = f"{script_path} > {dst} 2>&1; echo $? > {result_path}"
+            cmd = f"{shlex.quote(script_path)} > {shlex.quote(dst)} 2>&1; {journal.finish_command(execution_id)}"
             # Own process group so orphans can be reaped via killpg if the wrapper disappears.
             proc = subprocess.Popen([self._shell_path, '-c', cmd], start_new_session=True)
-            shell.record_spawned_execution(
-                self._executions_dir, raw_cmd, proc.pid, dst, exec_dir,
-            )
+            stats.count('subprocess_spawns')
+            journal.launch(execution_id, dst, proc.pid, raw_cmd, shell.process_start_time(proc.pid))
             self._shell_launches.append({
                 'cmd': raw_cmd,
                 'output': dst,
                 'script_path': script_path,
-                'exec_dir': exec_dir,
+                'execution_id': execution_id,
                 'proc': proc,
             })
             return './' + os.path.basename(os.path.dirname(dst)) + '/' + os.path.basename(dst)
@@ -1146,98 +1253,73 @@ class TaskMaster:
 
             # A living spawn still owns this log — do not finalize from a stale neighbor
             # result (common after relaunch via empty () when await kills the prior pid).
-            if shell.is_dst_spawn_alive(
-                self._executions_dir, link_abs_path, self._shell_launches,
-            ):
+            journal = self._executions_journal()
+            if shell.is_dst_spawn_alive(journal, link_abs_path, self._shell_launches, self._liveness):
                 return link
 
-            executions = self._get_shell_executions()
-            for e in reversed(executions):
-                if e['file'].endswith(link_abs_path):
-                    status: str = e['status']
-                    if not status.isdigit():
-                        continue
+            for e in reversed(journal.executions_for(link_abs_path)):
+                status: str = e['status']
+                if not status.isdigit():
+                    continue
 
-                    if not os.path.exists(link_abs_path):
-                        # Stale bookkeeping: result exists but path was reused/moved.
-                        self._remove_execution_results(e['exec_dir'])
-                        continue
+                if not os.path.exists(link_abs_path):
+                    # Stale bookkeeping: result exists but path was reused/moved.
+                    journal.drop(e['id'])
+                    continue
 
-                    dst: str = shell._get_link_with_retcode(link_abs_path, status)
-                    shutil.move(link_abs_path, dst)
-                    self._remove_execution_results(e['exec_dir'])
-                    self._cached_execution_completions[link_abs_path] = dst
-                    return link.removesuffix(os.path.basename(link)) + os.path.basename(dst)
+                dst: str = shell._get_link_with_retcode(link_abs_path, status)
+                shutil.move(link_abs_path, dst)
+                journal.drop(e['id'])
+                self._cached_execution_completions[link_abs_path] = dst
+                return link.removesuffix(os.path.basename(link)) + os.path.basename(dst)
             return link
 
-    def _has_execution_result(self, dst: str) -> bool:
-        abs_path = to_abs_path(self._target_file, self._executions_dir)
-        if not os.path.exists(abs_path):
-            return False
-        for e in shell.get_shell_executions(abs_path):
-            if e['file'] == dst or dst.endswith(e['file']) or e['file'].endswith(dst):
-                if e['status'].isdigit():
-                    return True
-        return False
-
     def _reconcile_spawned_executions(self):
-        path = shell.spawned_executions_logfile(self._executions_dir)
-        if not os.path.exists(path):
-            return
-
-        remaining = []
-        for line in document.read_lines(path):
-            if not line.strip():
-                continue
-            try:
-                entry = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            pid = entry.get('pid')
-            dst = entry.get('dst')
-            exec_dir = entry.get('exec_dir')
-            if pid is None or dst is None:
-                continue
-
+        journal = self._executions_journal()
+        running = journal.running()
+        self._liveness.load([entry['pid'] for entry in running])
+        for entry in running:
             proc = None
             for sl in self._shell_launches:
-                if sl.get('output') == dst:
+                if sl.get('execution_id') == entry['id']:
                     proc = sl.get('proc')
                     break
 
-            if shell.is_process_alive(pid, proc=proc):
-                remaining.append(json.dumps(entry))
+            if self._liveness.is_alive(entry['pid'], start_time=entry['start_time'], proc=proc):
                 continue
 
-            # Wrapper is gone — reap leftover process-group members (orphaned children).
-            try:
-                os.killpg(pid, 9)
-            except (ProcessLookupError, PermissionError, OSError):
-                pass
-
-            if not self._has_execution_result(dst):
-                if exec_dir:
-                    os.makedirs(exec_dir, exist_ok=True)
-                    document.write_lines(os.path.join(exec_dir, 'execution_result'), ['1'])
-                self._cached_executions = None
-
-        document.write_lines(path, remaining)
-
-    def _get_shell_executions(self) -> [{}]:
-        if self._cached_executions:
-            return self._cached_executions
-        abs_path = to_abs_path(self._target_file, self._executions_dir)
-        if not os.path.exists(abs_path):
-            return []
+            # Wrapper is gone — reap leftover process-group members (orphaned children),
+            # unless its pid went to an unrelated process meanwhile.
+            if not self._liveness.is_reused(entry['pid'], entry['start_time']):
+                try:
+                    os.killpg(entry['pid'], 9)
+                except (ProcessLookupError, PermissionError, OSError):
+                    pass
+
+            # A wrapper appends its result right before exiting, so it is in the journal by now if ever.
+            journal.refresh()
+            if not journal.get(entry['id'])['status']:
+                journal.finish(entry['id'], '1')
+
+    def _drop_unreferenced_executions(self):
+        """Drops finished executions of this file whose output no link of the document points to any more."""
+        journal = self._executions_journal()
+        finished = [e for e in journal.executions_under(get_config_files(self._target_file)) if e['status']]
+        if len(finished) == 0:
+            return
+        linked = set()
+        for i in range(len(self._doc.lines())):
+            for h in self._doc.get_line_links(i):
+                linked.add(os.path.abspath(to_abs_path(self._target_file, h['link'])))
+        for e in finished:
+            if os.path.abspath(e['dst']) not in linked:
+                journal.drop(e['id'])
 
-        self._cached_executions = shell.get_shell_executions(abs_path)
-        return self._cached_executions
+    def _executions_journal(self) -> shell.ExecutionsJournal:
+        return self._executions_index.get(to_abs_path(self._target_file, self._executions_dir))
 
-    def _remove_execution_results(self, exec_dir: str):
-        if exec_dir and os.path.isdir(exec_dir):
-            shutil.rmtree(exec_dir)
-        self._cached_executions = None
+    def _invalidate_executions(self):
+        self._executions_index.invalidate(to_abs_path(self._target_file, self._executions_dir))
 
     def _find_dive_in_block(self, topic: {}) -> [str]:
         dive_line = topic['start'] + 1
@@ -1265,6 +1347,7 @@ class TaskMaster:
         if os.path.exists(candidate):
             return candidate
 
+        stats.count('fs_scans')
         for root, dirs, files in os.walk(doc_dir):
             for f in files:
                 if f.lower() == name.lower():
@@ -1293,7 +1376,7 @@ class TaskMaster:
         abs_files_dir = get_config_files(self._target_file)
         files_dir = './' + os.path.basename(abs_files_dir)
         for i, line in enumerate(task_lines):
-            line_links = document.get_links(line)
+            line_links = self._doc.get_line_links(task['start'] + i)
 
             for h in sort_by_end(line_links):
                 link: str = h['link']
@@ -1329,31 +1412,40 @@ class TaskMaster:
 
         print('Blocking until all shell executions are completed!')
 
-        def has_running_shells() -> bool:
-            self._reconcile_spawned_executions()
-            if not os.path.exists(self._executions_dir):
-                print(f'executions dir yet not present: {self._executions_dir}')
-                return True
-
-            for sl in self._shell_launches:
-                abs_path = sl['output']
-                if self._has_execution_result(abs_path):
-                    continue
-
-                if os.path.exists(abs_path):
-                    print(f'file without retcode still exists: {abs_path} (script: {sl["script_path"]}')
-                    return True
+        # The wrapper shell writes execution_result before it exits, so reaping
+        # it is the completion signal.
+        finished = shell.wait_for_processes(
+            [sl['proc'] for sl in self._shell_launches], WAIT_EXECUTIONS_TIMEOUT_SEC,
+        )
+        # Wrappers killed from outside never wrote a result; reconciling records one.
+        self._reconcile_spawned_executions()
+        self._finalize_executions([sl for sl in self._shell_launches if sl['proc'] in finished])
 
-            return False
+    def _finalize_executions(self, launches: [{}]):
+        """
+        Rewrites the links of the given finished launches to their retcode
+        files and refreshes the sections derived from them, instead of running
+        every stage again.
+        """
+        outputs = set(os.path.abspath(sl['output']) for sl in launches)
+        if len(outputs) == 0:
+            return
 
-        timeout_sec = 5
-        while has_running_shells() and timeout_sec >= 0:
-            wait_step = .5
-            timeout_sec = timeout_sec - wait_step
-            time.sleep(wait_step)
-        pass
+        for i in range(len(self._doc.lines())):
+            processed_links = []
+            for h in self._doc.get_line_links(i):
+                title = h['title']
+                if not title.startswith('`') or not title.endswith('`') or h['full_link'].startswith('!'):
+                    continue
+                if os.path.abspath(to_abs_path(self._target_file, h['link'])) not in outputs:
+                    continue
+                processed = dict(h)
+                processed['processed_link'] = self._process_shell_request(i, title, h['link'])
+                processed_links.append(processed)
+            self._apply_processed_links(i, processed_links)
 
-        self._execute()
+        self._inject_ongoing_overview()
+        self._trim_lines()
 
     def _remove_trailing_checkboxes(self, task: {}) -> int:
         def find_trailing_checkboxes(check_groups: [{}]) -> [int]:
@@ -1374,7 +1466,7 @@ class TaskMaster:
         for group in sort_by_end(self._doc.get_check_groups(task)):
             for i in range(group['start'], group['end']+1, 1):
                 line: str = self._doc.lines()[i]
-                if not document.is_checkbox(line):
+                if not self._doc.line_table().kinds[i] & checkboxing.LINE_CHECKBOX:
                     continue
                 excluded_checkbox = document.get_padding(line) + '-' + line[line.index(']') + 1:]
                 self._doc.update(i, excluded_checkbox)
@@ -1421,25 +1513,44 @@ class TaskMaster:
     def _get_configs(self) -> {}:
         if self._configs:
             return self._configs
+        self._configs = load_configs(self._configs_file)
+        return self._configs
 
-        configs = {}
-        if self._configs_file and os.path.exists(self._configs_file):
-            with open(self._configs_file, 'r') as file:
-                configs = json.load(file)
 
+_loaded_configs = {}
 
-        if CONFIG_TYPOS not in configs:
-            configs[CONFIG_TYPOS] = {}
-        if CONFIG_DIVE_IN_TEMPLATE not in configs:
-            configs[CONFIG_DIVE_IN_TEMPLATE] = [
-                'dive-in:',
-                '```sh',
-                'git checkout branch_name',
-                '```'
-            ]
-        self._configs = configs
+
+def load_configs(configs_file: Optional[str]) -> {}:
+    """
+    Parsed config with defaults filled in. Parses are shared within the process
+    (e.g. by the files of a batch) until the file's mtime changes; callers
+    must not modify the result.
+    """
+    mtime = None
+    if configs_file and os.path.exists(configs_file):
+        mtime = os.stat(configs_file).st_mtime_ns
+    key = (configs_file, mtime)
+    configs = _loaded_configs.get(key, None)
+    if configs is not None:
         return configs
 
+    configs = {}
+    if mtime is not None:
+        with open(configs_file, 'r') as file:
+            configs = json.load(file)
+
+    if CONFIG_TYPOS not in configs:
+        configs[CONFIG_TYPOS] = {}
+    if CONFIG_DIVE_IN_TEMPLATE not in configs:
+        configs[CONFIG_DIVE_IN_TEMPLATE] = [
+            'dive-in:',
+            '```sh',
+            'git checkout branch_name',
+            '```'
+        ]
+    _loaded_configs[key] = configs
+    return configs
+
 
 def increasing_index_file(dst: str) -> str:
     index = 0
@@ -1453,11 +1564,6 @@ def increasing_index_file(dst: str) -> str:
     return candidate
 
 
-def _insert_all(dst: [str], index: int, lines: [str]):
-    for l in reversed(lines):
-        dst.insert(index, l)
-
-
 def to_abs_path(config_file: str, src_path: str) -> str:
     if src_path.startswith('~'):
         return os.path.expanduser(src_path)
@@ -1472,7 +1578,7 @@ def log(message: str) -> None:
         print(message, file=log_file)
 
 
-def parse_args():
+def parse_args(argv: [str] = None):
     parser = argparse.ArgumentParser(description='Captures and outputs all clipboard.')
     parser.add_argument('--archive', metavar='file', type=str,
                         help='Path to archive file that will be used by default when tasks are completed.')
@@ -1480,18 +1586,44 @@ def parse_args():
                         help='Path to config file with extra features like typos and etc. Config samples could be found in test cases.')
     parser.add_argument('--experimental-archived-links-processor', metavar='command_line', type=str,
                         help='specifies a links processor that will be triggered when tasks are archived')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and process the file again whenever it or the config is modified')
     parser.add_argument('--reminders', action='store_true',
                         help='Print all reminders in JSON format and exit')
-    parser.add_argument('task_file', help='Path to file for processing', type=str)
+    parser.add_argument('task_files', metavar='task_file', nargs='+', type=str,
+                        help='Path to file for processing. Several files, directories (searched for *.md) '
+                             'or globs are processed in batch mode and summarized as JSON')
+    parser.add_argument('--jobs', metavar='n', type=int, default=None,
+                        help='Worker processes in batch mode (default: CPU count)')
     parser.add_argument('--executions-dir',
                         metavar='dir', type=str, required=False,
                         help='Directory where per-shell execution state will be stored',
                         )
+    parser.add_argument('--states-dir',
+                        metavar='dir', type=str, required=False,
+                        default=python_script_path + '/run_states',
+                        help='Directory where per-file run fingerprints are kept to skip runs with unchanged inputs',
+                        )
+    parser.add_argument('--stats', metavar='file', type=str, nargs='?', const=stats.STDERR,
+                        default=os.environ.get(stats.STATS_ENV, None),
+                        help=f'Report per-stage timings and counters as JSON to stderr or append them to file '
+                             f'(also enabled by {stats.STATS_ENV}=-|file)')
+    parser.add_argument('--profile-dir', metavar='dir', type=str,
+                        default=os.environ.get(stats.PROFILE_ENV, None),
+                        help=f'Dump a cProfile of the run into dir (also enabled by {stats.PROFILE_ENV})')
     parser.add_argument('--memories-dir',
                         metavar='file', type=str, required=False,
                         help='Path to file where temporary files will be stored (mostly should be used for testing)',
                         )
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    first = args.task_files[0]
+    # An existing file is taken as is, even when its name looks like a glob.
+    is_glob = not os.path.exists(first) and any(c in first for c in '*?[')
+    args.batch = len(args.task_files) > 1 or os.path.isdir(first) or is_glob
+    args.task_file = args.task_files[0]
+    if args.batch and args.watch:
+        parser.error('--watch takes a single task file')
+    return args
 
 
 def get_topic_text_height(d: document.Document, start: int) -> int:
@@ -1510,6 +1642,39 @@ def get_topic_text_height(d: document.Document, start: int) -> int:
 
 def main():
     args = parse_args()
+    if args.batch:
+        import batch
+        sys.exit(batch.main_batch(args))
+    run_stats = stats.enable() if args.stats else None
+    profiler = None
+    if args.profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            dump_profile(profiler, args.profile_dir, args.task_file)
+        if run_stats:
+            stats.disable()
+            stats.report(run_stats, args.stats, {'task_file': args.task_file})
+
+
+def dump_profile(profiler, profile_dir: str, task_file: str):
+    os.makedirs(profile_dir, exist_ok=True)
+    prefix = f'{os.path.basename(task_file)}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}'
+    path = os.path.join(profile_dir, prefix + '.prof')
+    index = 0
+    # Batch workers may profile several files of the same name within a second.
+    while os.path.exists(path):
+        index += 1
+        path = os.path.join(profile_dir, f'{prefix}-{index}.prof')
+    profiler.dump_stats(path)
+
+
+def run(args):
     tm = TaskMaster(taskflow_file=args.task_file,
                     history_file=args.archive,
                     archived_links_processor=args.experimental_archived_links_processor,
@@ -1517,12 +1682,47 @@ def main():
                     memories_dir=args.memories_dir,
                     configs_file=args.config,
                     clipboard=build_clipboard_companion(),
+                    states_dir=args.states_dir,
                     )
     if args.reminders:
-        print(json.dumps(tm.get_reminders(active_only=False)))
+        print(json.dumps(tm.get_reminders(active_only=False, read_only=True)))
+        return
+    if args.watch:
+        try:
+            watch(tm)
+        except KeyboardInterrupt:
+            pass
         return
     tm.execute()
 
 
+def watch(tm: TaskMaster, should_stop: Callable[[], bool] = lambda: False, poll_timeout: float = None):
+    """
+    Runs tm on every external modification of its files until should_stop().
+    Bursts of writes are debounced. Signatures are taken before each run, so
+    our own save shows up as a change too; it is told apart by the task file
+    holding exactly the lines of the loaded document.
+    """
+    import watcher  # ctypes is only worth loading for --watch
+    target, *others = tm.watched_files()
+    with watcher.FileWatcher(tm.watched_files()) as w:
+        seen = {f: watcher.file_signature(f) for f in tm.watched_files()}
+        tm.execute()
+        while not should_stop():
+            if not w.wait(poll_timeout):
+                continue
+            while w.wait(WATCH_DEBOUNCE_SEC):
+                pass
+            current = {f: watcher.file_signature(f) for f in tm.watched_files()}
+            if current == seen or current[target] is None:
+                continue
+            own_save = all(current[f] == seen[f] for f in others) and tm.get_document().matches_file()
+            seen = current
+            if own_save:
+                continue
+            tm.reload()
+            tm.execute()
+
+
 if __name__ == "__main__":
     main()
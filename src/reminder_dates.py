@@ -0,0 +1,104 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+INVALID_DATE_FORMAT_MESSAGE = "Invalid date format! Expecting YYYY.MM.DD, YYYY.MM.DD HH:mm, HH:mm, +<N>, +<N>m, or +<N>h, or MON, TUE, WED, THU, FRI, SAT, SUN"
+
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+_FORMATTED_DATE_TIME = re.compile(r'\b\d{4}\.\d{2}\.\d{2}\s\d{2}:\d{2}\b')
+_RELATIVE_MINUTES = re.compile(r'\+(\d+)m\b')
+_RELATIVE_HOURS = re.compile(r'\+(\d+)h\b')
+_RELATIVE_SHORT = re.compile(r'\+(\d+)\b')
+_WEEKDAY = re.compile(r'\b(MON|TUE|WED|THU|FRI|SAT|SUN)\b', re.IGNORECASE)
+_TIME = re.compile(r'\b\d{2}:\d{2}\b')
+
+_DATE_WITH_TIME_PREFIX = re.compile(r'\b(\d{4})\.(\d{2})\.(\d{2})\s(\d{1,2}):(\d{2})\b')
+_DATE_PREFIX = re.compile(r'\b(\d{4})\.(\d{2})\.(\d{2})\b')
+_TIME_PREFIX = re.compile(r'\b(\d{1,2}):(\d{2})\b')
+
+
+def format_reminder_date(line: str, now: datetime) -> Optional[str]:
+    """Rewrites relative, weekday or time-only reminder dates of ``line`` as absolute ones."""
+    content = line.split(': ', 1)[0]
+
+    # Already formatted full date+time
+    if _FORMATTED_DATE_TIME.search(content):
+        return None
+
+    # Relative: +Nm, +Nh, +N (shorthand for +Nm)
+    for pattern, unit in [(_RELATIVE_MINUTES, 'minutes'), (_RELATIVE_HOURS, 'hours'), (_RELATIVE_SHORT, 'minutes')]:
+        match = pattern.search(content)
+        if match:
+            dt = now + timedelta(**{unit: int(match.group(1))})
+            return line.replace(match.group(0), dt.strftime('%Y.%m.%d %H:%M'), 1)
+
+    # Weekday: MON..SUN (next matching weekday)
+    weekday_match = _WEEKDAY.search(content)
+    if weekday_match:
+        target_weekday = WEEKDAYS[weekday_match.group(1).upper()]
+        days_ahead = (target_weekday - now.weekday() + 7) % 7
+        days_ahead = 7 if days_ahead == 0 else days_ahead  # Ensure it's the *next* weekday
+        dt = now + timedelta(days=days_ahead)
+        return line.replace(weekday_match.group(0), dt.strftime('%Y.%m.%d'), 1)
+
+    # Time only: HH:mm
+    time_only_match = _TIME.search(content)
+    if time_only_match:
+        date_str = f"{now.strftime('%Y.%m.%d')} {time_only_match.group()}"
+        return line.replace(time_only_match.group(), date_str, 1)
+
+    return None
+
+
+def extract_reminder_date(line: str, now: Optional[datetime] = None) -> Tuple[Optional[datetime], str]:
+    """Parse a reminder date from ``line`` using ``now`` for relative values."""
+    line = line.lstrip()
+    if now is None:
+        now = datetime.now()
+    raw_date_and_title = line.split(': ', 1)
+
+    if len(raw_date_and_title) != 2:
+        if not line.endswith(':'):
+            return None, INVALID_DATE_FORMAT_MESSAGE
+        content = line[:-1].strip()
+    else:
+        content = raw_date_and_title[0].strip()
+
+    # Fields are read straight from the match; datetime() rejects the same
+    # out-of-range values strptime('%Y.%m.%d %H:%M') would.
+    match = _DATE_WITH_TIME_PREFIX.match(content)
+    if match:
+        year, month, day, hour, minute = map(int, match.groups())
+        return datetime(year, month, day, hour, minute), ""
+
+    match = _DATE_PREFIX.match(content)
+    if match:
+        year, month, day = map(int, match.groups())
+        return datetime(year, month, day), ""
+
+    match = _TIME_PREFIX.match(content)
+    if match:
+        hour, minute = map(int, match.groups())
+        return datetime(now.year, now.month, now.day, hour, minute), ""
+
+    return None, INVALID_DATE_FORMAT_MESSAGE
+
+
+class ReminderDates:
+    """
+    Memoizes extract_reminder_date() for one run. Only time-only dates depend
+    on ``now`` and only through its calendar day, so results are keyed by
+    (title, day of now).
+    """
+
+    def __init__(self):
+        self._parsed = {}
+
+    def extract(self, title: str, now: datetime) -> Tuple[Optional[datetime], str]:
+        key = (title, now.date())
+        result = self._parsed.get(key, None)
+        if result is None:
+            result = extract_reminder_date(title, now)
+            self._parsed[key] = result
+        return result
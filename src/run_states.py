@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+import file_io
+
+
+def file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def mtime_stamp(path: Optional[str]) -> Optional[int]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def listing_stamp(dir: str) -> Optional[str]:
+    try:
+        names = sorted(os.listdir(dir))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return hashlib.sha256('\n'.join(names).encode()).hexdigest()
+
+
+def state_path(states_dir: str, target_file: str) -> str:
+    key = hashlib.sha1(os.path.abspath(target_file).encode()).hexdigest()
+    return os.path.join(states_dir, key + '.json')
+
+
+def load_state(states_dir: str, target_file: str) -> Optional[dict]:
+    path = state_path(states_dir, target_file)
+    if not os.path.exists(path):
+        return None
+    try:
+        state = json.loads('\n'.join(file_io.read_lines(path)))
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def save_state(states_dir: str, target_file: str, state: dict) -> None:
+    file_io.write_lines(state_path(states_dir, target_file), [json.dumps(state, sort_keys=True)])
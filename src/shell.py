@@ -1,46 +1,322 @@
+import contextlib
+import fcntl
 import json
 import os
+import select
+import shlex
 import shutil
 import subprocess
-from typing import Optional, Union
+import tempfile
+import time
+from typing import Optional, Tuple, Union
 
-import document
+import file_io
+import stats
 
 
-def get_shell_executions(executions_dir: str) -> [{}]:
-    if not os.path.isdir(executions_dir):
-        return []
+JOURNAL_FILENAME = 'journal.jsonl'
+JOURNAL_LOCK_FILENAME = 'journal.lock'
+# Layout of earlier versions: one <uuid>/ dir per execution plus this log of spawned wrappers.
+LEGACY_SPAWNED_LOG_FILENAME = 'spawned_executions.log'
+# The journal is rewritten once this many of its records belong to dropped executions.
+COMPACT_MIN_RECORDS = 64
+PROC_DIR = '/proc'
 
-    results = []
-    for name in os.listdir(executions_dir):
-        exec_dir = os.path.join(executions_dir, name)
-        if not os.path.isdir(exec_dir):
-            continue
 
-        output_path = os.path.join(exec_dir, 'output')
-        if not os.path.exists(output_path):
-            continue
+def journal_path(executions_dir: str) -> str:
+    return os.path.join(executions_dir, JOURNAL_FILENAME)
 
-        output_lines = document.read_lines(output_path)
-        if len(output_lines) == 0:
-            continue
 
-        status = ''
-        result_path = os.path.join(exec_dir, 'execution_result')
-        if os.path.exists(result_path):
-            result_lines = document.read_lines(result_path)
-            if len(result_lines) > 0:
-                status = result_lines[0].strip()
-
-        results.append({
-            'file': output_lines[0],
-            'status': status,
-            'exec_dir': exec_dir,
-        })
-    return results
+def execution_script_path(executions_dir: str, execution_id: str) -> str:
+    return os.path.join(executions_dir, execution_id + '.sh')
+
+
+def is_same_output(a: str, b: str) -> bool:
+    return a == b or a.endswith(b) or b.endswith(a)
+
+
+class ExecutionsJournal:
+    """
+    Append-only journal of the shell executions of an executions dir, one
+    JSON record per line:
+    - {"op": "launch", "id", "dst", "pid", "start_time", "cmd"} when a wrapper
+      is spawned;
+    - {"op": "finish", "id", "status"} appended by the wrapper itself, or by
+      reconciliation for a wrapper that died without it;
+    - {"op": "drop", "id"} once the result was folded into the task file.
+
+    Executions that were not dropped are kept in memory, indexed by output
+    file name. refresh() only reads records appended since the last call.
+    """
+
+    def __init__(self, executions_dir: str):
+        self.executions_dir = executions_dir
+        self._path = journal_path(executions_dir)
+        self._entries = {}
+        self._ids_by_name = {}
+        self._records = 0
+        self._offset = 0
+        self._ino = None
+        self._loaded = False
+
+    def _reset(self):
+        self._entries = {}
+        self._ids_by_name = {}
+        self._records = 0
+        self._offset = 0
+        self._ino = None
+
+    @contextlib.contextmanager
+    def _lock(self, operation: int):
+        os.makedirs(self.executions_dir, exist_ok=True)
+        with open(os.path.join(self.executions_dir, JOURNAL_LOCK_FILENAME), 'a') as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh(self):
+        self._read_appended()
+        if not self._loaded:
+            self._loaded = True
+            self._migrate_legacy()
+
+    def _read_appended(self):
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            if self._ino is not None:
+                self._reset()
+            return
+        # Compaction replaces the file, so another inode means starting over.
+        if st.st_ino != self._ino or st.st_size < self._offset:
+            self._reset()
+            self._ino = st.st_ino
+        if st.st_size == self._offset:
+            return
+        stats.count('fs_reads')
+        with open(self._path, 'rb') as file:
+            file.seek(self._offset)
+            data = file.read()
+        # A wrapper may be in the middle of appending; its line is read next time.
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        for line in data[:end].split(b'\n'):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get('id'):
+                self._apply(record)
+
+    def _apply(self, record: {}):
+        self._records += 1
+        execution_id = record['id']
+        op = record.get('op')
+        if op == 'drop':
+            entry = self._entries.pop(execution_id, None)
+            if entry and entry['dst']:
+                self._ids_by_name[os.path.basename(entry['dst'])].remove(execution_id)
+            return
+
+        entry = self._entries.get(execution_id)
+        if entry is None:
+            # A fast wrapper can append its finish before the launch record lands.
+            entry = {'id': execution_id, 'dst': None, 'pid': None, 'start_time': None, 'cmd': None, 'status': '',
+                     'legacy_dir': None}
+            self._entries[execution_id] = entry
+        if op == 'launch':
+            if entry['dst'] is None and record.get('dst'):
+                self._ids_by_name.setdefault(os.path.basename(record['dst']), []).append(execution_id)
+            for key in ['dst', 'pid', 'start_time', 'cmd', 'legacy_dir']:
+                if record.get(key) is not None:
+                    entry[key] = record[key]
+        elif op == 'finish' and not entry['status']:
+            # The wrapper's own status comes first; a later one from reconciliation loses.
+            entry['status'] = str(record.get('status', '')).strip()
+
+    def _append(self, records: [{}]):
+        with self._lock(fcntl.LOCK_SH):
+            with open(self._path, 'a') as file:
+                file.write(''.join(json.dumps(r) + '\n' for r in records))
+        stats.count('fs_writes')
+        self._read_appended()
+
+    def _migrate_legacy(self):
+        """Moves executions of the per-dir layout into the journal."""
+        records = []
+        log_path = os.path.join(self.executions_dir, LEGACY_SPAWNED_LOG_FILENAME)
+        if self._ino is None or os.path.exists(log_path):
+            records.extend(self._legacy_records(log_path))
+        # Wrappers of earlier versions still write their result into their dir.
+        for entry in self._entries.values():
+            if entry['legacy_dir'] and not entry['status']:
+                status = _read_legacy_status(entry['legacy_dir'])
+                if status:
+                    records.append({'op': 'finish', 'id': entry['id'], 'status': status})
+        if records:
+            self._append(records)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+
+    def _legacy_records(self, log_path: str) -> [{}]:
+        try:
+            names = sorted(os.listdir(self.executions_dir))
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        stats.count('fs_scans')
+        spawned = {}
+        if os.path.exists(log_path):
+            for line in file_io.read_lines(log_path):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and entry.get('exec_dir'):
+                    spawned[os.path.abspath(entry['exec_dir'])] = entry
+
+        records = []
+        for name in names:
+            exec_dir = os.path.join(self.executions_dir, name)
+            output_path = os.path.join(exec_dir, 'output')
+            if name in self._entries or not os.path.exists(output_path):
+                continue
+            output_lines = file_io.read_lines(output_path)
+            if len(output_lines) == 0:
+                continue
+            entry = spawned.pop(os.path.abspath(exec_dir), {})
+            records.append({'op': 'launch', 'id': name, 'dst': output_lines[0].strip(), 'pid': entry.get('pid'),
+                            'cmd': entry.get('cmd'), 'legacy_dir': exec_dir})
+            status = _read_legacy_status(exec_dir)
+            if status:
+                records.append({'op': 'finish', 'id': name, 'status': status})
+        # Spawned wrappers whose dir is gone still need reconciling.
+        for exec_dir, entry in spawned.items():
+            if entry.get('dst') and entry.get('pid') is not None:
+                records.append({'op': 'launch', 'id': os.path.basename(exec_dir), 'dst': entry['dst'],
+                                'pid': entry['pid'], 'cmd': entry.get('cmd'), 'legacy_dir': exec_dir})
+        return records
+
+    def launch(self, execution_id: str, dst: str, pid: int, cmd: str, start_time: Optional[str] = None):
+        self._append([{'op': 'launch', 'id': execution_id, 'dst': dst, 'pid': pid, 'start_time': start_time,
+                       'cmd': cmd}])
+
+    def finish(self, execution_id: str, status: str):
+        self._append([{'op': 'finish', 'id': execution_id, 'status': status}])
+
+    def drop(self, execution_id: str):
+        entry = self._entries.get(execution_id)
+        if entry is None:
+            return
+        self._append([{'op': 'drop', 'id': execution_id}])
+        self._remove_files(entry)
+
+    def _remove_files(self, entry: {}):
+        script_path = execution_script_path(self.executions_dir, entry['id'])
+        if os.path.exists(script_path):
+            os.remove(script_path)
+        if entry['legacy_dir'] and os.path.isdir(entry['legacy_dir']):
+            shutil.rmtree(entry['legacy_dir'])
+
+    def finish_command(self, execution_id: str) -> str:
+        """Shell snippet for the wrapper appending the finish record with the status of the previous command."""
+        record_format = json.dumps({'op': 'finish', 'id': execution_id, 'status': '%s'}) + '\\n'
+        return f"printf {shlex.quote(record_format)} $? >> {shlex.quote(self._path)}"
+
+    def get(self, execution_id: str) -> Optional[dict]:
+        return self._entries.get(execution_id)
+
+    def executions_for(self, dst: str) -> [{}]:
+        """Executions writing into dst, in launch order."""
+        ids = self._ids_by_name.get(os.path.basename(dst), [])
+        return [self._entries[i] for i in ids if is_same_output(self._entries[i]['dst'], dst)]
+
+    def executions_under(self, dir_path: str) -> [{}]:
+        """Executions writing into dir_path or below it."""
+        prefix = os.path.join(os.path.abspath(dir_path), '')
+        return [e for e in self._entries.values() if e['dst'] and os.path.abspath(e['dst']).startswith(prefix)]
+
+    def running(self) -> [{}]:
+        """Executions with a wrapper pid and no result yet."""
+        return [e for e in self._entries.values() if not e['status'] and e['pid'] is not None and e['dst']]
+
+    def _live_records(self) -> [{}]:
+        records = []
+        for e in self._entries.values():
+            records.append({'op': 'launch', 'id': e['id'], 'dst': e['dst'], 'pid': e['pid'],
+                            'start_time': e['start_time'], 'cmd': e['cmd'], 'legacy_dir': e['legacy_dir']})
+            if e['status']:
+                records.append({'op': 'finish', 'id': e['id'], 'status': e['status']})
+        return records
+
+    def compact(self):
+        """
+        Rewrites the journal with the records of the executions still kept
+        once enough records belong to dropped ones. Finished executions whose
+        output file is gone are dropped on the way: no link can take their
+        result any more.
+        """
+        if self._records - len(self._live_records()) < COMPACT_MIN_RECORDS:
+            return
+        with self._lock(fcntl.LOCK_EX):
+            self._read_appended()
+            for e in list(self._entries.values()):
+                if e['status'] and e['dst'] and not os.path.exists(e['dst']):
+                    del self._entries[e['id']]
+                    self._remove_files(e)
+            records = self._live_records()
+
+            fd, tmp_path = tempfile.mkstemp(prefix='.' + JOURNAL_FILENAME + '.', dir=self.executions_dir)
+            with os.fdopen(fd, 'w') as file:
+                file.write(''.join(json.dumps(r) + '\n' for r in records))
+            # Launches and drops hold the lock, but wrappers append their finish
+            # records without it: carry over what reached the old file meanwhile.
+            with open(self._path, 'rb') as old:
+                os.replace(tmp_path, self._path)
+                old.seek(self._offset)
+                late = old.read()
+            if late:
+                with open(self._path, 'ab') as file:
+                    file.write(late)
+            stats.count('fs_writes')
+            self._reset()
+            self._read_appended()
+
+
+def _read_legacy_status(exec_dir: str) -> str:
+    result_path = os.path.join(exec_dir, 'execution_result')
+    if not os.path.exists(result_path):
+        return ''
+    result_lines = file_io.read_lines(result_path)
+    return result_lines[0].strip() if len(result_lines) > 0 else ''
+
+
+class ExecutionsIndex:
+    """
+    ExecutionsJournal per executions dir, refreshed on every get(). One
+    index can be shared by every TaskMaster of a process.
+    """
+
+    def __init__(self):
+        self._by_dir = {}
+
+    def get(self, executions_dir: str) -> ExecutionsJournal:
+        journal = self._by_dir.get(executions_dir, None)
+        if journal is None:
+            journal = ExecutionsJournal(executions_dir)
+            self._by_dir[executions_dir] = journal
+        journal.refresh()
+        return journal
+
+    def invalidate(self, executions_dir: str):
+        self._by_dir.pop(executions_dir, None)
 
 
 def capture_output(cmd: str, ignore_errors=False) -> Union[str, None]:
+    stats.count('subprocess_spawns')
     try:
         return subprocess.check_output(
             cmd,
@@ -71,119 +347,180 @@ def _get_link_with_retcode(src: str, retcode: str) -> str:
     return parent + '/' + new_name
 
 
-def spawned_executions_logfile(executions_dir: str) -> str:
-    return os.path.join(executions_dir, 'spawned_executions.log')
+def _read_proc_stat(proc_dir: str, pid: int) -> Optional[Tuple[str, str]]:
+    """(state, start time in clock ticks since boot) from /proc/<pid>/stat; None if there is no such process."""
+    try:
+        with open(os.path.join(proc_dir, str(pid), 'stat'), 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    # The command name may hold spaces and parentheses, so fields are counted from its closing one.
+    fields = data[data.rfind(b')') + 2:].split()
+    if len(fields) < 20:
+        return None
+    return fields[0].decode(), fields[19].decode()
 
 
-def record_spawned_execution(
-    executions_dir: str,
-    cmd: str,
-    pid: int,
-    dst: str,
-    exec_dir: str,
-):
-    path = spawned_executions_logfile(executions_dir)
-    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
-    with open(path, 'a') as f:
-        f.write(json.dumps({
-            'cmd': cmd,
-            'pid': pid,
-            'dst': dst,
-            'exec_dir': exec_dir,
-        }) + '\n')
-
-
-def iter_spawned_execution_entries(executions_dir: str) -> list:
-    path = spawned_executions_logfile(executions_dir)
-    if not os.path.exists(path):
-        return []
-    entries = []
-    for line in document.read_lines(path):
-        if not line.strip():
-            continue
-        try:
-            entry = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if isinstance(entry, dict):
-            entries.append(entry)
-    return entries
+def process_start_time(pid: int, proc_dir: str = PROC_DIR) -> Optional[str]:
+    """Start time of a process as recorded at launch, to tell it from a later process reusing its pid."""
+    stat = _read_proc_stat(proc_dir, pid)
+    return stat[1] if stat else None
 
 
-def is_process_alive(pid: int, proc: Optional[subprocess.Popen] = None) -> bool:
-    if proc is not None and proc.poll() is not None:
-        return False
-    try:
-        # Reap our own zombie children so kill(pid, 0) does not keep seeing them.
-        waited_pid, _ = os.waitpid(pid, os.WNOHANG)
-        if waited_pid == pid:
+class ProcessLiveness:
+    """
+    Snapshot of the states of tracked pids, meant to live for one run.
+    load() reads /proc/<pid>/stat of every pid not seen yet in one pass;
+    without /proc it asks ps once for the whole batch. Zombies count as
+    dead, and so does a pid whose start time differs from the recorded one.
+    """
+
+    def __init__(self, proc_dir: str = PROC_DIR):
+        self._proc_dir = proc_dir
+        self._has_proc = os.path.isdir(os.path.join(proc_dir, 'self'))
+        # pid -> (state, start time) or None when there is no such process.
+        self._stats = {}
+
+    def load(self, pids: [int]):
+        pids = [pid for pid in set(pids) if pid is not None and pid not in self._stats]
+        if len(pids) == 0:
+            return
+        if self._has_proc:
+            stats.count('fs_reads')
+            for pid in pids:
+                self._stats[pid] = _read_proc_stat(self._proc_dir, pid)
+        else:
+            self._stats.update(_ps_states(pids))
+
+    def _stat(self, pid: int, proc: Optional[subprocess.Popen]) -> Optional[Tuple[str, Optional[str]]]:
+        # Our own children are answered fresh through their Popen, which also reaps them.
+        # Other unreaped children show up as zombies and are left to their Popen objects.
+        if proc is not None and proc.poll() is not None:
+            self._stats[pid] = None
+            return None
+        self.load([pid])
+        return self._stats[pid]
+
+    def is_alive(self, pid: int, start_time: Optional[str] = None,
+                 proc: Optional[subprocess.Popen] = None) -> bool:
+        stat = self._stat(pid, proc)
+        if stat is None or stat[0] in ('Z', 'X'):
             return False
-    except (ChildProcessError, OSError):
-        pass
+        return not self._is_other_process(stat, start_time)
+
+    def is_reused(self, pid: int, start_time: Optional[str] = None) -> bool:
+        """Whether pid now belongs to a process other than the one started at start_time."""
+        self.load([pid])
+        stat = self._stats[pid]
+        return stat is not None and self._is_other_process(stat, start_time)
+
+    @staticmethod
+    def _is_other_process(stat: Tuple[str, Optional[str]], start_time: Optional[str]) -> bool:
+        return start_time is not None and stat[1] is not None and stat[1] != start_time
+
+
+def _ps_states(pids: [int]) -> {}:
+    stats.count('subprocess_spawns')
+    try:
+        output = subprocess.check_output(
+            ['ps', '-o', 'pid=,state=', '-p', ','.join(str(pid) for pid in pids)],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        )
+    except subprocess.CalledProcessError as e:
+        # ps exits with 1 when none of the pids exist.
+        output = e.output or ''
+    except (FileNotFoundError, PermissionError):
+        return {pid: _kill_state(pid) for pid in pids}
+    results = {pid: None for pid in pids}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[0].isdigit() and int(fields[0]) in results:
+            results[int(fields[0])] = (fields[1][:1].upper(), None)
+    return results
+
+
+def _kill_state(pid: int) -> Optional[Tuple[str, None]]:
     try:
         os.kill(pid, 0)
     except ProcessLookupError:
-        return False
+        return None
     except PermissionError:
-        return True
-    # Process table entry may still be a zombie owned by another parent.
-    try:
-        state = subprocess.check_output(
-            ['ps', '-p', str(pid), '-o', 'state='],
-            text=True,
-            stderr=subprocess.DEVNULL,
-        ).strip()
-        return bool(state) and 'Z' not in state.upper()
-    except (subprocess.CalledProcessError, FileNotFoundError, PermissionError):
-        return False
+        pass
+    return 'R', None
+
+
+def wait_for_processes(procs: [subprocess.Popen], timeout_sec: float) -> [subprocess.Popen]:
+    """
+    Blocks until every process in procs exited or timeout_sec passed and
+    returns the exited ones (reaped). Wakes up on each exit through pidfds
+    where the platform has them, otherwise through Popen.wait().
+    """
+    deadline = time.monotonic() + timeout_sec
+    pending = [p for p in procs if p.poll() is None]
+    if hasattr(os, 'pidfd_open'):
+        fds = {}
+        try:
+            for p in pending:
+                try:
+                    fds[os.pidfd_open(p.pid)] = p
+                except OSError:
+                    pass
+            while len(fds) > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                ready, _, _ = select.select(list(fds), [], [], remaining)
+                for fd in ready:
+                    fds.pop(fd).poll()
+                    os.close(fd)
+        finally:
+            for fd in fds:
+                os.close(fd)
+    for p in pending:
+        if p.returncode is not None:
+            continue
+        try:
+            p.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            pass
+    return [p for p in procs if p.poll() is not None]
 
 
 def is_dst_spawn_alive(
-    executions_dir: str,
+    journal: ExecutionsJournal,
     dst: str,
     shell_launches: Optional[list] = None,
+    liveness: Optional[ProcessLiveness] = None,
 ) -> bool:
     shell_launches = shell_launches or []
-    for entry in iter_spawned_execution_entries(executions_dir):
-        if entry.get('dst') != dst:
-            continue
-        pid = entry.get('pid')
-        if pid is None:
+    liveness = liveness or ProcessLiveness()
+    for entry in journal.executions_for(dst):
+        if entry['status'] or entry['pid'] is None:
             continue
         proc = None
         for sl in shell_launches:
-            if sl.get('output') == dst:
+            if sl.get('output') == entry['dst']:
                 proc = sl.get('proc')
                 break
-        if is_process_alive(pid, proc=proc):
+        if liveness.is_alive(entry['pid'], start_time=entry['start_time'], proc=proc):
             return True
     return False
 
 
-def drop_executions_claiming_path(executions_dir: str, dst: str) -> list:
+def drop_executions_claiming_path(journal: ExecutionsJournal, dst: str,
+                                  liveness: Optional[ProcessLiveness] = None) -> list:
     """
-    Remove finished/stale exec dirs whose output path matches dst.
-    Returns the list of removed exec_dir paths.
+    Drop finished/stale executions whose output path matches dst.
+    Returns the ids of the dropped executions.
     """
-    living_dirs = set()
-    for entry in iter_spawned_execution_entries(executions_dir):
-        if entry.get('dst') != dst:
-            continue
-        pid = entry.get('pid')
-        if pid is None:
-            continue
-        if is_process_alive(pid):
-            living_dirs.add(entry.get('exec_dir'))
-
-    # Uncached read: callers often invoke this before creating a new exec_dir.
-    executions = get_shell_executions(executions_dir) if os.path.exists(executions_dir) else []
+    liveness = liveness or ProcessLiveness()
     to_drop = []
-    for e in executions:
-        if e['file'] == dst or e['file'].endswith(dst) or dst.endswith(e['file']):
-            if e['exec_dir'] in living_dirs:
-                continue
-            to_drop.append(e['exec_dir'])
-    for exec_dir in to_drop:
-        if exec_dir and os.path.isdir(exec_dir):
-            shutil.rmtree(exec_dir)
+    for entry in journal.executions_for(dst):
+        if (not entry['status'] and entry['pid'] is not None
+                and liveness.is_alive(entry['pid'], start_time=entry['start_time'])):
+            continue
+        to_drop.append(entry['id'])
+    for execution_id in to_drop:
+        journal.drop(execution_id)
     return to_drop
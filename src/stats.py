@@ -0,0 +1,86 @@
+"""
+Opt-in run statistics: wall time per pipeline stage and counters for
+structural recomputes, filesystem calls and subprocess spawns.
+
+Collection is off unless enable() was called, in which case count() and
+stage() record into the active RunStats; otherwise they do nothing.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+STATS_ENV = 'TASK_MASTER_STATS'
+PROFILE_ENV = 'TASK_MASTER_PROFILE_DIR'
+STDERR = '-'
+
+
+class RunStats:
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self._started = time.perf_counter()
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'calls': 0, 'sec': 0.0})
+            entry['calls'] += 1
+            entry['sec'] += time.perf_counter() - started
+
+    def as_dict(self) -> {}:
+        return {
+            'total_sec': time.perf_counter() - self._started,
+            'stages': self.stages,
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+
+_active: Optional[RunStats] = None
+
+
+def enable() -> RunStats:
+    global _active
+    _active = RunStats()
+    return _active
+
+
+def disable() -> Optional[RunStats]:
+    global _active
+    run_stats, _active = _active, None
+    return run_stats
+
+
+def count(name: str, n: int = 1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
+
+
+def report(run_stats: RunStats, dst: str, extra: {} = None):
+    """Writes one JSON line to stderr (dst '-') or appends it to the file dst."""
+    record = dict(extra or {})
+    record.update(run_stats.as_dict())
+    line = json.dumps(record)
+    if dst == STDERR:
+        print(line, file=sys.stderr)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    with open(dst, 'a') as file:
+        file.write(line + '\n')
@@ -1,17 +1,27 @@
+import json
+import random
 import subprocess
 import sys
 import time
 import unittest
+from unittest import mock
 from datetime import datetime, timezone
 
 from parameterized import parameterized  # pip3 install parameterized # ?
+import batch
 import main
+import checkboxing
 import clipboard
+import document
+import file_io
+import reminder_dates
 import shutil
 import os
 import filecmp
 
 import shell
+import stats
+import watcher
 
 # CHANGE THIS VAR TO RUN ONLY SPECIFIC TEST FROM 'SUPPORTED' OR 'FUTURE' SUITE
 LOCAL_TEST_FILTER = ''
@@ -175,5 +185,1102 @@ class TestTaskMaster(unittest.TestCase):
         ]))
 
 
+def get_case_documents() -> [str, str]:
+    results = []
+    for name, path in get_test_cases():
+        if name.startswith(NOT_SUPPORTED_PREFIX):
+            continue
+        for stage in ['setup', 'expected']:
+            f = f'{path}/{stage}/main.md'
+            if os.path.exists(f):
+                results.append((f'{os.path.basename(path)}_{stage}', f))
+    return results
+
+
+def scan_topics(lines: [str]) -> [{}]:
+    """Reference full rescan the cached structural index must agree with."""
+    topics = []
+    topic = {}
+    in_code_block = False
+    for i, line in enumerate(lines):
+        if line.startswith('```'):
+            in_code_block = not in_code_block
+        line_is_topic = line.startswith('#') and not in_code_block
+        if line_is_topic and 'start' not in topic:
+            topic['start'] = i
+            continue
+
+        end_of_file = i == len(lines) - 1
+        if 'start' in topic and (line_is_topic or end_of_file):
+            topic['end'] = i if end_of_file else i - 1
+            topics.append(topic)
+            topic = {'start': i}
+    return topics
+
+
+class TestDocumentStructureIndex(unittest.TestCase):
+    def assert_index_matches_rescan(self, doc: document.Document):
+        topics = scan_topics(doc.lines())
+        self.assertEqual(topics, doc.get_topics())
+        for i in range(len(doc.lines())):
+            candidates = [t for t in topics if t['start'] <= i]
+            self.assertEqual(candidates[-1] if candidates else None, doc.get_topic_by_line(i))
+        for t in topics:
+            title = document.get_line_title(doc.line(t['start']))
+            first = next(c for c in topics if document.get_line_title(doc.line(c['start'])) == title)
+            self.assertEqual(first, doc.get_topic_by_title(title))
+
+    @parameterized.expand(get_case_documents())
+    def test_index_matches_rescan(self, _: str, path: str):
+        self.assert_index_matches_rescan(document.Document(path))
+
+    def test_index_follows_edits(self):
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend(['# a', 'text', '```', '# not a topic', '```', '## b', '- [ ] c'])
+        self.assert_index_matches_rescan(doc)
+        doc.update(1, 'other text')
+        self.assert_index_matches_rescan(doc)
+        doc.update(3, 'not a topic either')
+        self.assert_index_matches_rescan(doc)
+        doc.update(2, 'fence removed')
+        self.assert_index_matches_rescan(doc)
+        doc.insert_all(0, ['# z', ''])
+        self.assert_index_matches_rescan(doc)
+        doc.remove(0, 1)
+        self.assert_index_matches_rescan(doc)
+        doc.remove_line(0)
+        self.assert_index_matches_rescan(doc)
+
+
+def scan_check_groups(lines: [str], start: int, end: int) -> [{}]:
+    """Reference per-level rescan the single-pass check-group builder must agree with."""
+    levels = []
+    for i, line in enumerate(lines[start:end + 1]):
+        if document.is_checkbox(line):
+            levels.append({'index': start + i, 'level': len(document.get_padding(line))})
+
+    def next_scan_level(last_level: int) -> int:
+        for l in levels:
+            if l.get('scanned_level') == l['level']:
+                continue
+            if l['level'] > last_level:
+                return l['level']
+        return -1
+
+    check_groups = []
+    scan_level = next_scan_level(-1)
+    while scan_level >= 0:
+        group = None
+        for l in levels:
+            if l['level'] < scan_level:
+                continue
+            l['scanned_level'] = scan_level
+            li = l['index']
+            if group and group['end'] + 1 == li:
+                group['end'] = li
+            else:
+                group = {'start': li, 'end': li}
+                check_groups.append(group)
+        scan_level = next_scan_level(scan_level)
+    return check_groups
+
+
+def nest_by_rescan(intervals: []) -> []:
+    """Reference recursive nesting the stack-based as_nested_dict must agree with."""
+    def find_parent(group: {}, where: {}):
+        if group['start'] >= where['start'] and group['end'] <= where['end']:
+            for c in where['children']:
+                candidate = find_parent(group, c)
+                if candidate:
+                    return candidate
+            return where
+        return None
+
+    def first_child(group: {}, where: [{}]) -> {}:
+        for child in where:
+            if child['start'] > group['start'] and child['end'] <= group['end']:
+                return child
+        return None
+
+    roots = []
+    for interval in intervals:
+        interval.setdefault('children', [])
+        parent = None
+        for r in roots:
+            parent = find_parent(interval, r)
+            if parent:
+                break
+
+        if not parent:
+            c = first_child(interval, roots)
+            if c:
+                roots.remove(c)
+                interval['children'].append(c)
+            roots.append(interval)
+            continue
+
+        parent['children'].append(interval)
+        parent['children'] = nest_by_rescan(parent['children'])
+    return roots
+
+
+class TestCheckGroups(unittest.TestCase):
+    def assert_same_groups(self, doc: document.Document, start: int, end: int):
+        expected = scan_check_groups(doc.lines(), start, end)
+        self.assertEqual(expected, doc.get_check_groups_at_range(start, end))
+        self.assertEqual(
+            nest_by_rescan(scan_check_groups(doc.lines(), start, end)),
+            document.as_nested_dict(doc.get_check_groups_at_range(start, end)),
+        )
+
+    @parameterized.expand(get_case_documents())
+    def test_groups_match_rescan(self, _: str, path: str):
+        doc = document.Document(path)
+        self.assert_same_groups(doc, 0, len(doc.lines()) - 1)
+        for t in doc.get_topics():
+            self.assert_same_groups(doc, t['start'], t['end'])
+
+    def test_groups_match_rescan_on_random_outlines(self):
+        rnd = random.Random(7)
+        for _ in range(200):
+            lines = []
+            for _ in range(rnd.randint(1, 30)):
+                kind = rnd.random()
+                if kind < 0.15:
+                    lines.append('text')
+                elif kind < 0.2:
+                    lines.append('# topic')
+                else:
+                    lines.append('    ' * rnd.randint(0, 4) + '- [ ] task')
+            doc = document.Document('/nonexistent/main.md')
+            doc.extend(lines)
+            self.assert_same_groups(doc, 0, len(lines) - 1)
+            self.assert_same_groups(doc, rnd.randint(0, len(lines) - 1), len(lines) - 1)
+
+    def test_nesting_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend([' ' * i + '- [ ] task' for i in range(depth)])
+        nested = document.as_nested_dict(doc.get_check_groups_at_range(0, depth - 1))
+        self.assertEqual(1, len(nested))
+        levels = 0
+        node = nested[0]
+        while len(node['children']) > 0:
+            node = node['children'][0]
+            levels += 1
+        self.assertEqual(depth - 1, levels)
+
+
+class TestEditTransaction(unittest.TestCase):
+    def make_doc(self, size: int) -> document.Document:
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend([str(i) for i in range(size)])
+        return doc
+
+    def test_edits_use_original_positions(self):
+        doc = self.make_doc(6)
+        with doc.edit() as tx:
+            tx.insert(0, 'a')
+            tx.remove(1, 2)
+            tx.insert_all(2, ['b', 'c'])
+            tx.insert(2, 'd')
+            tx.remove(4, 4)
+            tx.insert(6, 'e')
+        self.assertEqual(['a', '0', 'b', 'c', 'd', '3', '5', 'e'], doc.lines())
+
+    def test_matches_sequential_edits_from_the_end(self):
+        rnd = random.Random(11)
+        for _ in range(200):
+            size = rnd.randint(1, 20)
+            sequential = self.make_doc(size)
+            batched = self.make_doc(size)
+            edits = []
+            for start in sorted(rnd.sample(range(size), rnd.randint(1, size))):
+                if rnd.random() < 0.5:
+                    edits.append(('insert', start, [f'new {start}']))
+                else:
+                    end = start
+                    if len(edits) > 0 and edits[-1][0] == 'remove' and edits[-1][2] >= start:
+                        continue
+                    edits.append(('remove', start, end))
+
+            with batched.edit() as tx:
+                for kind, a, b in edits:
+                    getattr(tx, 'insert_all' if kind == 'insert' else 'remove')(a, b)
+            for kind, a, b in reversed(edits):
+                getattr(sequential, 'insert_all' if kind == 'insert' else 'remove')(a, b)
+            self.assertEqual(sequential.lines(), batched.lines())
+
+    def test_overlapping_removals_are_rejected(self):
+        doc = self.make_doc(5)
+        with self.assertRaises(ValueError):
+            with doc.edit() as tx:
+                tx.remove(0, 2)
+                tx.remove(2, 3)
+        self.assertEqual(['0', '1', '2', '3', '4'], doc.lines())
+
+    def test_empty_transaction_keeps_document_unchanged(self):
+        doc = document.Document('/nonexistent/main.md')
+        with doc.edit():
+            pass
+        self.assertFalse(doc.has_changed())
+
+
+class TestTasksTreeCache(unittest.TestCase):
+    def make_doc(self) -> document.Document:
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend(['# [-] a', '- [-] b', '    - [ ] c', '- [!] d', '', '# [ ] e', '- [ ] f'])
+        return doc
+
+    def test_tree_is_shared_until_document_changes(self):
+        doc = self.make_doc()
+        tree = doc.as_tasks_tree()
+        self.assertIs(tree, doc.as_tasks_tree())
+        self.assertEqual('c', doc.get_task_at(2)['title'])
+
+        doc.update(2, '    - [x] c')
+        self.assertIsNot(tree, doc.as_tasks_tree())
+        self.assertEqual('x', doc.get_task_at(2)['status'])
+
+    def test_filtered_view_leaves_tree_intact(self):
+        doc = self.make_doc()
+        tree = doc.as_tasks_tree()
+        before = repr(tree)
+
+        ongoing = document.filter_tasks_tree(tree, status=document.STATUS_IN_PROGRESS)
+        urgent = document.filter_tasks_tree(tree, status=document.STATUS_URGENT)
+
+        self.assertEqual(before, repr(doc.as_tasks_tree()))
+        self.assertEqual(['b'], [c['title'] for c in ongoing[0]['children']])
+        self.assertEqual(['d'], [c['title'] for c in urgent[0]['children']])
+
+
+class TestLineTable(unittest.TestCase):
+    STATUSES = [None, ' ', 'x', '-', '!', '^']
+
+    def assert_table_matches_parsers(self, lines: [str], table: checkboxing.LineTable):
+        self.assertEqual(len(lines), len(table))
+        for i, line in enumerate(lines):
+            for status in self.STATUSES:
+                self.assertEqual(checkboxing.is_checkbox(line, status), table.is_checkbox(lines, i, status), line)
+                self.assertEqual(checkboxing.is_task(line, status), table.is_task(lines, i, status), line)
+            self.assertEqual(checkboxing.get_line_title(line), table.line_title(lines, i), line)
+            self.assertEqual(document.get_topic_level(line), table.levels[i], line)
+            self.assertEqual(len(checkboxing.get_padding(line)), table.paddings[i], line)
+            if checkboxing.is_checkbox(line):
+                self.assertEqual(checkboxing.checkbox_status_index(line), table.status_offsets[i], line)
+
+    @parameterized.expand(get_case_documents())
+    def test_table_matches_parsers(self, _: str, path: str):
+        lines = document.read_lines(path)
+        self.assert_table_matches_parsers(lines, checkboxing.LineTable(lines))
+
+    def test_table_matches_parsers_on_random_lines(self):
+        rnd = random.Random(3)
+        pieces = ['#', '-', '\u2013', ' ', '\t', '[', ']', 'x', '!', '^', 'a', '```']
+        lines = [''.join(rnd.choice(pieces) for _ in range(rnd.randint(0, 9))) for _ in range(5000)]
+        self.assert_table_matches_parsers(lines, checkboxing.LineTable(lines))
+
+    def test_document_keeps_table_in_sync_with_edits(self):
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend(['# [ ] a', '- [ ] b', '    - [x] c', 'text'])
+        table = doc.line_table()
+        doc.update(1, '- [-] b')
+        doc.insert(0, '## [!] z')
+        doc.insert_all(2, ['- [ ] y', '', '```'])
+        doc.remove(3, 4)
+        doc.remove_line(0)
+        doc.extend(['', ''])
+        doc.trim_trailing_empty_lines()
+        self.assertIs(table, doc.line_table())
+        self.assert_table_matches_parsers(doc.lines(), table)
+
+
+def scan_links_by_slicing(markdown_text: str) -> []:
+    """Reference slicing scanner the single-pass get_links must agree with."""
+    results = []
+    text = markdown_text
+
+    while len(text) > 0:
+        link_start = text.find('](')
+        while link_start >= 0 and text[link_start] != '[':
+            link_start -= 1
+
+        if link_start < 0:
+            break
+
+        if link_start > 0 and text[link_start-1] == '!':
+            link_start = link_start - 1
+            text = text[link_start + 2:]
+            link_length = 2
+        else:
+            link_length = 1
+            text = text[link_start + 1:]
+
+        title_end = text.find('](')
+
+        if title_end < 0:
+            break
+        link_length = link_length + title_end
+        title = text[:title_end]
+        text = text[title_end:]
+        link_end = text.find(')')
+
+        if link_end < 0:
+            break
+        link = text[2:link_end]
+        link_end = link_end + 1  # for )
+        link_length = link_length + link_end
+        last_shift = results[len(results)-1]['end'] if len(results) > 0 else 0
+        abs_link_start = last_shift + link_start
+        abs_link_end = abs_link_start + link_length
+
+        result = {
+            'title': title,
+            'link': link,
+            'full_link': markdown_text[abs_link_start:abs_link_end],
+            'start': abs_link_start,
+            'end': abs_link_end,
+        }
+        results.append(result)
+        text = text[link_end:]
+    return results
+
+
+class TestLinks(unittest.TestCase):
+    @parameterized.expand(get_case_documents())
+    def test_scanner_matches_reference(self, _: str, path: str):
+        for line in document.read_lines(path):
+            self.assertEqual(scan_links_by_slicing(line), document.get_links(line), line)
+
+    def test_scanner_matches_reference_on_random_text(self):
+        rnd = random.Random(5)
+        pieces = ['[', ']', '(', ')', '](', '![', '!', 'a', ' ', '`']
+        for _ in range(20000):
+            line = ''.join(rnd.choice(pieces) for _ in range(rnd.randint(0, 16)))
+            self.assertEqual(scan_links_by_slicing(line), document.get_links(line), line)
+
+    def test_line_links_follow_edits(self):
+        doc = document.Document('/nonexistent/main.md')
+        doc.extend(['[a](x)', 'text', '![b](y) [c](z)'])
+        self.assertEqual(['x'], [l['link'] for l in doc.get_line_links(0)])
+        doc.update(0, '[a](w)')
+        self.assertEqual(['w'], [l['link'] for l in doc.get_line_links(0)])
+        doc.insert(0, '[d](v)')
+        self.assertEqual(['y', 'z'], [l['link'] for l in doc.get_line_links(3)])
+        doc.remove_line(0)
+        self.assertEqual(['w'], [l['link'] for l in doc.get_line_links(0)])
+
+
+def extract_reminder_date_by_strptime(line: str, now: datetime):
+    # Former strptime-based parser, kept as the reference for the compiled one.
+    import re
+    line = line.lstrip()
+    raw_date_and_title = line.split(': ', 1)
+    if len(raw_date_and_title) != 2:
+        if not line.endswith(':'):
+            return None, document.INVALID_DATE_FORMAT_MESSAGE
+        content = line[:-1].strip()
+    else:
+        content = raw_date_and_title[0].strip()
+
+    date_with_time_match = re.match(r'\b\d{4}\.\d{2}\.\d{2}\s\d{1,2}:\d{2}\b', content)
+    date_only_match = re.match(r'\b\d{4}\.\d{2}\.\d{2}\b', content)
+    time_only_match = re.match(r'\b\d{1,2}:\d{2}\b', content)
+    if date_with_time_match:
+        date_str = date_with_time_match.group()
+    elif date_only_match:
+        date_str = date_only_match.group() + ' 00:00'
+    elif time_only_match:
+        date_str = f"{now.strftime('%Y.%m.%d')} {time_only_match.group()}"
+    else:
+        return None, document.INVALID_DATE_FORMAT_MESSAGE
+    return datetime.strptime(date_str, '%Y.%m.%d %H:%M'), ""
+
+
+class TestReminderDates(unittest.TestCase):
+    TITLES = [
+        '2025.01.02 10:30: call', '2025.01.02 9:05: call', '2025.01.02\t10:30: call', '2025.01.02: pay',
+        '10:30: stand-up', '7:15: run', '  2025.01.02 10:30: indented', '2025.01.02:', '10:30:',
+        'no date here', 'MON: weekly', '+15: soon', '2025.1.2: short', '10:30 without colon', '',
+    ]
+
+    def test_extract_matches_reference(self):
+        now = datetime(2025, 3, 4, 11, 12)
+        for title in self.TITLES:
+            self.assertEqual(extract_reminder_date_by_strptime(title, now),
+                             document.extract_reminder_date(title, now), title)
+
+    def test_invalid_calendar_values_raise_like_reference(self):
+        now = datetime(2025, 3, 4, 11, 12)
+        for title in ['2025.13.01: x', '2025.02.30 10:00: x', '25:00: x', '2025.01.01 10:61: x']:
+            with self.assertRaises(ValueError):
+                extract_reminder_date_by_strptime(title, now)
+            with self.assertRaises(ValueError):
+                document.extract_reminder_date(title, now)
+
+    def test_memoized_per_day(self):
+        dates = reminder_dates.ReminderDates()
+        morning = datetime(2025, 3, 4, 8, 0)
+        self.assertEqual(datetime(2025, 3, 4, 10, 30), dates.extract('10:30: x', morning)[0])
+        self.assertEqual(datetime(2025, 3, 4, 10, 30), dates.extract('10:30: x', morning.replace(hour=20))[0])
+        self.assertEqual(datetime(2025, 3, 5, 10, 30), dates.extract('10:30: x', datetime(2025, 3, 5, 8, 0))[0])
+
+
+class TestReadOnlyReminders(unittest.TestCase):
+    LINES = ['# [ ] topic', '', '- [!] 2025.03.04 10:00: call', '- [!] +2h: later', '- [!] no date']
+
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-read-only-reminders')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        self.file = self.dir + '/main.md'
+        file_io.write_lines(self.file, self.LINES)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _task_master(self) -> main.TaskMaster:
+        return main.TaskMaster(
+            taskflow_file=self.file,
+            history_file=None,
+            clipboard=clipboard.build_clipboard_companion(),
+            datetime_provider=lambda: datetime(2025, 3, 4, 11, 12),
+        )
+
+    def test_same_result_without_touching_the_document(self):
+        tm = self._task_master()
+        self.assertEqual(self._task_master().get_reminders(active_only=False),
+                         tm.get_reminders(active_only=False, read_only=True))
+        self.assertEqual(self.LINES, tm.get_document().lines())
+
+
+class TestFileIO(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'tmp-file-io')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _write_raw(self, name: str, text: str) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', newline='') as f:
+            f.write(text)
+        return path
+
+    def _readlines_reference(self, path: str) -> [str]:
+        with open(path, 'r') as f:
+            return list(map(document.remove_trailing_newline, f.readlines()))
+
+    def test_read_matches_readlines(self):
+        for i, text in enumerate(['', 'a', 'a\n', 'a\n\n', '\n', 'a\r\nb\rc\n', '- [ ] ü\n# T']):
+            path = self._write_raw(f'{i}.md', text)
+            self.assertEqual(self._readlines_reference(path), file_io.read_lines(path), repr(text))
+
+    def test_mmap_read_matches_buffered_read(self):
+        path = self._write_raw('big.md', ''.join(f'- [ ] task {i}\n' for i in range(20000)))
+        threshold = file_io.MMAP_THRESHOLD
+        try:
+            file_io.MMAP_THRESHOLD = 1
+            mapped = file_io.read_lines(path)
+        finally:
+            file_io.MMAP_THRESHOLD = threshold
+        self.assertEqual(self._readlines_reference(path), mapped)
+
+    def test_write_replaces_atomically_and_keeps_mode(self):
+        path = self._write_raw('main.md', 'old\n')
+        os.chmod(path, 0o640)
+        file_io.write_lines(path, iter(['a', '', 'b']), fsync=True)
+        self.assertEqual('a\n\nb\n', read_file(path))
+        self.assertEqual(0o640, os.stat(path).st_mode & 0o777)
+        self.assertEqual(['main.md'], os.listdir(self.dir))
+
+    def test_failed_write_keeps_old_content(self):
+        path = self._write_raw('main.md', 'old\n')
+
+        def lines():
+            yield 'new'
+            raise RuntimeError('interrupted')
+
+        with self.assertRaises(RuntimeError):
+            file_io.write_lines(path, lines())
+        self.assertEqual('old\n', read_file(path))
+        self.assertEqual(['main.md'], os.listdir(self.dir))
+
+
+class TestRunFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-run-fingerprint')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        self.file = self.dir + '/main.md'
+        self.now = datetime(2025, 3, 4, 11, 0)
+        self.runs = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _execute(self):
+        tm = main.TaskMaster(
+            taskflow_file=self.file,
+            history_file=self.dir + '/archive.md',
+            executions_dir=self.dir + '/executions',
+            memories_dir=self.dir + '/memories',
+            states_dir=self.dir + '/states',
+            clipboard=clipboard.build_clipboard_companion(),
+            datetime_provider=lambda: self.now,
+        )
+        full_run = tm._execute
+
+        def counted_run():
+            self.runs += 1
+            full_run()
+
+        tm._execute = counted_run
+        tm.execute()
+
+    def _settle(self, lines: [str]):
+        file_io.write_lines(self.file, lines)
+        for _ in range(3):
+            self._execute()
+        self.runs = 0
+
+    def test_unchanged_inputs_skip_the_pipeline(self):
+        self._settle(['# [ ] topic', '', '- [ ] task'])
+        self._execute()
+        self.assertEqual(0, self.runs)
+
+        file_io.write_lines(self.file, file_io.read_lines(self.file) + ['- [ ] another'])
+        self._execute()
+        self.assertEqual(1, self.runs)
+
+    def test_files_listing_change_runs_the_pipeline(self):
+        self._settle(['# [ ] topic', '', '- [ ] task'])
+        os.makedirs(self.dir + '/main.files')
+        file_io.write_lines(self.dir + '/main.files/new.txt', [])
+        self._execute()
+        self.assertEqual(1, self.runs)
+
+    def test_only_this_files_executions_disable_the_skip(self):
+        self._settle(['# [ ] topic', '', '- [ ] task'])
+        journal = shell.ExecutionsJournal(self.dir + '/executions')
+        journal.launch('other', self.dir + '/other.files/out.txt', os.getpid(), 'sleep 100')
+        self._execute()
+        self.assertEqual(0, self.runs)
+
+        journal.launch('own', self.dir + '/main.files/out.txt', os.getpid(), 'sleep 100')
+        self._execute()
+        self.assertEqual(1, self.runs)
+
+    def test_finished_executions_without_a_link_are_dropped(self):
+        self._settle(['# [ ] topic', '', '- [ ] task'])
+        journal = shell.ExecutionsJournal(self.dir + '/executions')
+        journal.launch('unlinked', self.dir + '/main.files/out.txt', 1, 'true')
+        journal.finish('unlinked', '0')
+        file_io.write_lines(self.file, file_io.read_lines(self.file) + ['- [ ] another'])
+        self._execute()
+        self.assertEqual(1, self.runs)
+        journal.refresh()
+        self.assertIsNone(journal.get('unlinked'))
+
+    def test_reminder_deadline_runs_the_pipeline(self):
+        self._settle(['# [ ] topic', '', '- [!] 2025.03.04 12:00: call'])
+        self._execute()
+        self.assertEqual(0, self.runs)
+
+        self.now = datetime(2025, 3, 4, 12, 0)
+        self._execute()
+        self.assertEqual(1, self.runs)
+        self.assertIn('REMINDERS', read_file(self.file).upper())
+
+
+class TestRunStats(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-run-stats')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        file_io.write_lines(self.dir + '/main.md', ['# [ ] topic', '- [ ] [x](./main.files/x.txt)', '- [!] 10:00: call'])
+
+    def tearDown(self):
+        stats.disable()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _task_master(self) -> main.TaskMaster:
+        return main.TaskMaster(
+            taskflow_file=self.dir + '/main.md',
+            history_file=self.dir + '/archive.md',
+            executions_dir=self.dir + '/executions',
+            memories_dir=self.dir + '/memories',
+            clipboard=clipboard.build_clipboard_companion(),
+        )
+
+    def test_disabled_by_default(self):
+        self._task_master().execute()
+        self.assertIsNone(stats.disable())
+
+    def test_reports_every_stage_and_counters(self):
+        run_stats = stats.enable()
+        tm = self._task_master()
+        tm.execute()
+        report = run_stats.as_dict()
+
+        for name, _ in tm.stages():
+            self.assertEqual(1, report['stages'][name]['calls'], name)
+        for counter in ['get_topics', 'structure_index_builds', 'get_check_groups_at_range', 'as_tasks_tree',
+                        'tasks_tree_builds', 'get_links', 'fs_reads', 'fs_writes', 'fs_scans']:
+            self.assertGreater(report['counters'].get(counter, 0), 0, counter)
+        self.assertLessEqual(report['counters']['tasks_tree_builds'], report['counters']['as_tasks_tree'])
+
+    def test_report_appends_json_lines(self):
+        path = self.dir + '/stats.jsonl'
+        for _ in range(2):
+            stats.enable()
+            stats.count('get_links', 3)
+            stats.report(stats.disable(), path, {'task_file': 'main.md'})
+        records = [json.loads(line) for line in file_io.read_lines(path)]
+        self.assertEqual(2, len(records))
+        self.assertEqual({'get_links': 3}, records[1]['counters'])
+        self.assertEqual('main.md', records[1]['task_file'])
+
+
+class TestBenchmarkGenerator(unittest.TestCase):
+    def test_generated_documents_are_seeded(self):
+        from benchmarks import generator
+        self.assertEqual(generator.generate_lines(500, seed=3), generator.generate_lines(500, seed=3))
+        self.assertNotEqual(generator.generate_lines(500, seed=3), generator.generate_lines(500, seed=4))
+
+    def test_generated_document_shape(self):
+        from benchmarks import generator
+        lines = generator.generate_lines(2000, seed=1, topics=10, checkbox_depth=2, code_block_density=1.0)
+        doc = document.Document('')
+        doc.extend(lines)
+        self.assertAlmostEqual(2000, len(lines), delta=20)
+        self.assertEqual(10, len([l for l in lines if l.startswith('# [')]))
+        self.assertEqual(10, len(doc.get_code_blocks()))
+        self.assertEqual(0, len([l for l in lines if l.startswith('        - [')]))
+        self.assertGreater(len(document.filter_tasks_tree(doc.as_tasks_tree(), status=document.STATUS_URGENT)), 0)
+
+
+class TestWaitForProcesses(unittest.TestCase):
+    def test_returns_exited_processes_without_waiting_for_the_rest(self):
+        quick = subprocess.Popen(['sleep', '0.1'])
+        slow = subprocess.Popen(['sleep', '30'])
+        try:
+            started = time.monotonic()
+            finished = shell.wait_for_processes([quick, slow], timeout_sec=1)
+            elapsed = time.monotonic() - started
+        finally:
+            slow.kill()
+            slow.wait()
+        self.assertEqual([quick], finished)
+        self.assertEqual(0, quick.returncode)
+        self.assertGreaterEqual(elapsed, 1)
+        self.assertLess(elapsed, 5)
+
+    def test_wakes_up_when_the_last_process_exits(self):
+        procs = [subprocess.Popen(['sleep', '0.2']) for _ in range(3)]
+        started = time.monotonic()
+        self.assertEqual(procs, shell.wait_for_processes(procs, timeout_sec=10))
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class TestExecutionsJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-journal')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        self.addCleanup(shutil.rmtree, self.dir, True)
+
+    def _append(self, records: [{}]):
+        with open(shell.journal_path(self.dir), 'a') as file:
+            file.write(''.join(json.dumps(r) + '\n' for r in records))
+
+    def test_refresh_reads_only_appended_records(self):
+        journal = shell.ExecutionsJournal(self.dir)
+        journal.launch('a', '/x/out.txt', 1, 'true')
+        self._append([{'op': 'finish', 'id': 'a', 'status': '0'}])
+
+        run_stats = stats.enable()
+        try:
+            journal.refresh()
+            journal.refresh()
+        finally:
+            stats.disable()
+        self.assertEqual(1, run_stats.as_dict()['counters']['fs_reads'])
+        self.assertEqual('0', journal.get('a')['status'])
+
+        # The wrapper may not have finished its line yet.
+        with open(shell.journal_path(self.dir), 'a') as file:
+            file.write('{"op": "launch", "id": "b"')
+        journal.refresh()
+        self.assertIsNone(journal.get('b'))
+
+        with open(shell.journal_path(self.dir), 'a') as file:
+            file.write(', "dst": "/x/other.txt", "pid": 2, "cmd": "true"}\n')
+        journal.refresh()
+        self.assertEqual([journal.get('b')], journal.running())
+        self.assertEqual([journal.get('a')], journal.executions_for('/x/out.txt'))
+
+    def test_finish_before_launch_and_first_status_wins(self):
+        self._append([
+            {'op': 'finish', 'id': 'a', 'status': '3'},
+            {'op': 'launch', 'id': 'a', 'dst': '/x/out.txt', 'pid': 1, 'cmd': 'true'},
+            {'op': 'finish', 'id': 'a', 'status': '1'},
+        ])
+        journal = shell.ExecutionsJournal(self.dir)
+        journal.refresh()
+        self.assertEqual('3', journal.get('a')['status'])
+        self.assertEqual([], journal.running())
+        self.assertEqual(['a'], [e['id'] for e in journal.executions_for('/x/out.txt')])
+
+    def test_wrapper_appends_its_status(self):
+        journal = shell.ExecutionsJournal(self.dir)
+        journal.launch('a', '/x/out.txt', 1, 'exit 7')
+        subprocess.run(['sh', '-c', '(exit 7); ' + journal.finish_command('a')], check=True)
+        journal.refresh()
+        self.assertEqual('7', journal.get('a')['status'])
+
+    def test_migrates_legacy_layout(self):
+        exec_dir = os.path.join(self.dir, 'old')
+        os.makedirs(exec_dir)
+        file_io.write_lines(os.path.join(exec_dir, 'output'), ['/x/out.txt'])
+        file_io.write_lines(os.path.join(exec_dir, 'execution_result'), ['2'])
+        gone_dir = os.path.join(self.dir, 'gone')
+        file_io.write_lines(os.path.join(self.dir, shell.LEGACY_SPAWNED_LOG_FILENAME), [
+            json.dumps({'cmd': 'true', 'pid': 5, 'dst': '/x/gone.txt', 'exec_dir': gone_dir}),
+        ])
+
+        journal = shell.ExecutionsJournal(self.dir)
+        journal.refresh()
+        self.assertEqual('2', journal.get('old')['status'])
+        self.assertEqual([journal.get('gone')], journal.running())
+        self.assertFalse(os.path.exists(os.path.join(self.dir, shell.LEGACY_SPAWNED_LOG_FILENAME)))
+
+        journal.drop('old')
+        self.assertFalse(os.path.exists(exec_dir))
+        reloaded = shell.ExecutionsJournal(self.dir)
+        reloaded.refresh()
+        self.assertEqual(['gone'], [e['id'] for e in reloaded.running()])
+
+    def test_compacts_around_kept_executions(self):
+        output = os.path.join(self.dir, 'done.txt')
+        file_io.write_lines(output, ['done'])
+        journal = shell.ExecutionsJournal(self.dir)
+        journal.launch('running', '/x/running.txt', 1, 'sleep 100', '42')
+        journal.launch('done', output, 2, 'true')
+        journal.finish('done', '0')
+        journal.launch('gone', '/x/gone.txt', 3, 'true')
+        journal.finish('gone', '0')
+        for i in range(shell.COMPACT_MIN_RECORDS // 2 - 1):
+            journal.launch(str(i), f'/x/{i}.txt', i, 'true')
+            journal.drop(str(i))
+        size = os.path.getsize(shell.journal_path(self.dir))
+        journal.compact()
+        self.assertEqual(size, os.path.getsize(shell.journal_path(self.dir)))
+
+        journal.launch('last', '/x/last.txt', 4, 'true')
+        journal.drop('last')
+        journal.compact()
+        self.assertEqual(3, len(file_io.read_lines(shell.journal_path(self.dir))))
+        self.assertEqual(['running'], [e['id'] for e in journal.running()])
+        self.assertEqual('42', journal.get('running')['start_time'])
+        self.assertEqual('0', journal.get('done')['status'])
+        self.assertIsNone(journal.get('gone'))
+
+        # The wrapper of the pending execution still finds the journal.
+        subprocess.run(['sh', '-c', '(exit 4); ' + journal.finish_command('running')], check=True)
+        other = shell.ExecutionsJournal(self.dir)
+        other.refresh()
+        self.assertEqual('4', other.get('running')['status'])
+        self.assertEqual(['done', 'running'], sorted(e['id'] for e in other.executions_under('/')))
+
+
+class TestProcessLiveness(unittest.TestCase):
+    def setUp(self):
+        self.proc_dir = os.path.join(python_script_path, 'tests', 'tmp-proc')
+        shutil.rmtree(self.proc_dir, ignore_errors=True)
+        os.makedirs(os.path.join(self.proc_dir, 'self'))
+        self.addCleanup(shutil.rmtree, self.proc_dir, True)
+
+    def _write_stat(self, pid: int, comm: str, state: str, start_time: str):
+        fields = [state] + ['0'] * 18 + [start_time, '0']
+        file_io.write_lines(os.path.join(self.proc_dir, str(pid), 'stat'), [f'{pid} ({comm}) ' + ' '.join(fields)])
+
+    def test_reads_every_pid_once_without_spawning(self):
+        self._write_stat(100, 'sh -c (x) y', 'S', '500')
+        self._write_stat(101, 'defunct', 'Z', '600')
+        liveness = shell.ProcessLiveness(self.proc_dir)
+        run_stats = stats.enable()
+        try:
+            liveness.load([100, 101, 102])
+            # Later changes are not seen within the same run.
+            shutil.rmtree(os.path.join(self.proc_dir, '100'))
+            self.assertTrue(liveness.is_alive(100, start_time='500'))
+            self.assertFalse(liveness.is_alive(101))
+            self.assertFalse(liveness.is_alive(102))
+        finally:
+            stats.disable()
+        counters = run_stats.as_dict()['counters']
+        self.assertEqual(1, counters['fs_reads'])
+        self.assertNotIn('subprocess_spawns', counters)
+
+    def test_pid_reuse_counts_as_dead(self):
+        self._write_stat(100, 'sleep', 'S', '700')
+        liveness = shell.ProcessLiveness(self.proc_dir)
+        self.assertFalse(liveness.is_alive(100, start_time='500'))
+        self.assertTrue(liveness.is_reused(100, '500'))
+        self.assertTrue(liveness.is_alive(100))
+        self.assertFalse(liveness.is_reused(100, None))
+
+    def test_live_process_start_time(self):
+        proc = subprocess.Popen(['sleep', '30'])
+        try:
+            start_time = shell.process_start_time(proc.pid)
+            self.assertIsNotNone(start_time)
+            self.assertTrue(shell.ProcessLiveness().is_alive(proc.pid, start_time=start_time, proc=proc))
+        finally:
+            proc.kill()
+            proc.wait()
+        self.assertFalse(shell.ProcessLiveness().is_alive(proc.pid, start_time=start_time, proc=proc))
+
+    def test_exited_child_is_dead_but_left_to_its_popen(self):
+        proc = subprocess.Popen(['sh', '-c', 'exit 3'])
+        deadline = time.monotonic() + 5
+        while shell.ProcessLiveness().is_alive(proc.pid) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(shell.ProcessLiveness().is_alive(proc.pid))
+        self.assertEqual(3, proc.wait(timeout=5))
+
+    def test_falls_back_to_one_ps_call_without_proc(self):
+        dead = subprocess.Popen(['true'])
+        dead.wait()
+        liveness = shell.ProcessLiveness(os.path.join(self.proc_dir, 'missing'))
+        run_stats = stats.enable()
+        try:
+            liveness.load([os.getpid(), dead.pid])
+            self.assertTrue(liveness.is_alive(os.getpid()))
+            self.assertFalse(liveness.is_alive(dead.pid))
+        finally:
+            stats.disable()
+        self.assertEqual(1, run_stats.as_dict()['counters']['subprocess_spawns'])
+
+
+class TestWatchMode(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-watch')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        self.file = self.dir + '/main.md'
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_reload_replaces_only_the_edited_lines(self):
+        file_io.write_lines(self.file, ['# [ ] a', '- [ ] [x](y)', 'note', '- [ ] [z](w)'])
+        doc = document.Document(self.file)
+        tail_links = doc.get_line_links(3)
+        file_io.write_lines(self.file, ['# [ ] a', '- [ ] [x](y)', 'edited', 'added', '- [ ] [z](w)'])
+        doc.reload()
+        self.assertEqual(file_io.read_lines(self.file), doc.lines())
+        self.assertFalse(doc.has_changed())
+        self.assertTrue(doc.matches_file())
+        self.assertEqual(['w'], [l['link'] for l in doc.get_line_links(4)])
+        self.assertIsNot(tail_links, doc.get_line_links(4))
+        self.assertEqual(checkboxing.LineTable(doc.lines(), doc.version()).kinds, doc.line_table().kinds)
+
+    def _assert_watcher_sees_rename_writes(self, use_inotify: bool):
+        file_io.write_lines(self.file, ['a'])
+        with watcher.FileWatcher([self.file], poll_interval=0.05, use_inotify=use_inotify) as w:
+            self.assertFalse(w.wait(0.2))
+            file_io.write_lines(self.dir + '/other.md', ['unrelated'])
+            if use_inotify:
+                self.assertFalse(w.wait(0.2))
+            file_io.write_lines(self.file, ['a', 'b'])
+            self.assertTrue(w.wait(2))
+
+    def test_watcher_sees_rename_writes_with_inotify(self):
+        if not watcher.FileWatcher([self.file]).uses_inotify():
+            self.skipTest('inotify is not available')
+        self._assert_watcher_sees_rename_writes(use_inotify=True)
+
+    def test_watcher_sees_rename_writes_by_polling(self):
+        self._assert_watcher_sees_rename_writes(use_inotify=False)
+
+    def test_watch_reruns_on_external_edits_only(self):
+        import threading
+        os.environ[clipboard.TEST_ENV_VAR] = 'true'
+        self.addCleanup(os.environ.pop, clipboard.TEST_ENV_VAR, None)
+        file_io.write_lines(self.file, ['# [ ] topic', '', '- [ ] task'])
+        tm = main.TaskMaster(
+            taskflow_file=self.file,
+            history_file=self.dir + '/archive.md',
+            executions_dir=self.dir + '/executions',
+            memories_dir=self.dir + '/memories',
+            clipboard=clipboard.build_clipboard_companion(),
+        )
+        runs = []
+        execute = tm.execute
+        tm.execute = lambda: (runs.append(1), execute())
+        stop = threading.Event()
+        thread = threading.Thread(target=main.watch, args=(tm, stop.is_set, 0.1))
+        thread.start()
+        try:
+            def wait_for(predicate):
+                deadline = time.monotonic() + 10
+                while not predicate() and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                self.assertTrue(predicate())
+
+            wait_for(lambda: len(runs) == 1)
+            file_io.write_lines(self.file, file_io.read_lines(self.file) + ['- [ ] [new]()'])
+            wait_for(lambda: 'main.files/new' in read_file(self.file))
+            time.sleep(1)
+            self.assertEqual(2, len(runs))
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_reminder_dates_memo_lasts_one_run(self):
+        os.environ[clipboard.TEST_ENV_VAR] = 'true'
+        self.addCleanup(os.environ.pop, clipboard.TEST_ENV_VAR, None)
+        file_io.write_lines(self.file, ['# [ ] topic', '', '- [!] 10:30: call'])
+        tm = main.TaskMaster(
+            taskflow_file=self.file,
+            history_file=self.dir + '/archive.md',
+            executions_dir=self.dir + '/executions',
+            memories_dir=self.dir + '/memories',
+            clipboard=clipboard.build_clipboard_companion(),
+        )
+        tm.execute()
+        first_run = tm._reminder_dates
+        tm.reload()
+        tm.execute()
+        self.assertIsNot(first_run, tm._reminder_dates)
+
+
+class TestStartupImports(unittest.TestCase):
+    def test_cli_runs_without_loading_clipboard_dependencies(self):
+        from benchmarks import startup
+        for mode in startup.STARTUP_BUDGET_SEC:
+            result = startup.measure(mode, repeat=1)
+            self.assertEqual([], result['heavy_modules_loaded'], mode)
+
+
+class TestBatchMode(unittest.TestCase):
+    def setUp(self):
+        self.dir = os.path.join(python_script_path, 'tests', 'tmp-batch')
+        shutil.rmtree(self.dir, ignore_errors=True)
+        for path in ['a/one.md', 'a/sub/two.md', 'a b/three.md', 'c/four.md', 'c/four.files/skip.md', 'c/.hidden/skip.md']:
+            file_io.write_lines(os.path.join(self.dir, path), ['# [ ] topic', '- [ ] task', '- [x] done'])
+        os.environ[clipboard.TEST_ENV_VAR] = 'true'
+        self.addCleanup(os.environ.pop, clipboard.TEST_ENV_VAR, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _path(self, *names: str) -> [str]:
+        return [os.path.join(self.dir, n) for n in names]
+
+    def test_expands_directories_and_globs(self):
+        self.assertEqual(
+            self._path('a/one.md', 'a/sub/two.md', 'a b/three.md', 'c/four.md'),
+            batch.expand_task_files([self.dir + '/a', self.dir + '/*/three.md', self.dir + '/c', self.dir + '/a/one.md']),
+        )
+
+    def test_groups_by_archive_or_directory_tree(self):
+        files = self._path('c/four.md', 'a b/three.md', 'a/sub/two.md', 'a/one.md')
+        self.assertEqual([files], batch.group_task_files(files, archive='archive.md'))
+        self.assertEqual(
+            [self._path('a/one.md', 'a/sub/two.md'), self._path('a b/three.md'), self._path('c/four.md')],
+            batch.group_task_files(files),
+        )
+
+    def test_runs_every_file_and_summarizes(self):
+        args = self._args(stats=stats.STDERR)
+        files = batch.expand_task_files([self.dir]) + [self.dir + '/c/missing.md']
+        summary = batch.run_batch(args, files, jobs=2)
+        self.assertEqual(3, summary['groups'])
+        self.assertEqual(4, summary['succeeded'])
+        self.assertEqual(1, summary['failed'])
+        self.assertEqual(sorted(files), sorted(r['file'] for r in summary['files']))
+        for r in summary['files']:
+            if r['file'].endswith('missing.md'):
+                self.assertEqual(1, r['exit_code'])
+                continue
+            self.assertEqual(0, r['exit_code'])
+            self.assertIn('trim_lines', r['stats']['stages'])
+            self.assertEqual('- [ ] ', file_io.read_lines(r['file'])[-1])
+
+    def _args(self, **overrides):
+        import argparse
+        options = dict(
+            archive=None, experimental_archived_links_processor=None, executions_dir=self.dir + '/executions',
+            memories_dir=self.dir + '/memories', config=None, states_dir=None, reminders=False, stats=None,
+            profile_dir=None,
+        )
+        options.update(overrides)
+        return argparse.Namespace(**options)
+
+    def test_stats_file_and_profile_dir_get_a_record_per_file(self):
+        stats_file = self.dir + '/stats.jsonl'
+        profile_dir = self.dir + '/profiles'
+        files = self._path('a/one.md', 'a/sub/two.md', 'c/four.md')
+        summary = batch.run_batch(self._args(stats=stats_file, profile_dir=profile_dir), files, jobs=2)
+        self.assertEqual(3, summary['succeeded'])
+        self.assertTrue(all('stats' in r for r in summary['files']))
+        records = [json.loads(line) for line in file_io.read_lines(stats_file)]
+        self.assertEqual(sorted(files), sorted(r['task_file'] for r in records))
+        self.assertEqual(3, len(os.listdir(profile_dir)))
+
+    def test_groups_of_a_process_share_one_executions_index(self):
+        options = {
+            'archive': None, 'archived_links_processor': None, 'executions_dir': self.dir + '/executions',
+            'memories_dir': self.dir + '/memories', 'config': None, 'states_dir': None, 'reminders': False,
+            'stats': None, 'profile_dir': None,
+        }
+        self.addCleanup(setattr, batch, '_executions_index', batch._executions_index)
+        batch._executions_index = None
+        with mock.patch.object(shell, 'ExecutionsIndex', wraps=shell.ExecutionsIndex) as index_class:
+            batch.run_group(self._path('a/one.md'), options)
+            batch.run_group(self._path('c/four.md'), options)
+        self.assertEqual(1, index_class.call_count)
+
+    def test_glob_like_file_name_is_a_single_task_file(self):
+        task_file = os.path.join(self.dir, 'notes [work].md')
+        file_io.write_lines(task_file, ['- [ ] task'])
+        self.assertFalse(main.parse_args([task_file]).batch)
+        self.assertTrue(main.parse_args([os.path.join(self.dir, 'notes [wx].md')]).batch)
+        self.assertTrue(main.parse_args([os.path.join(self.dir, '*', 'one.md')]).batch)
+
+    def test_runs_under_spawned_workers(self):
+        files = self._path('a/one.md', 'c/four.md')
+        summary = batch.run_batch(self._args(), files, jobs=2, start_method='spawn')
+        self.assertEqual(2, summary['groups'])
+        self.assertEqual(2, summary['succeeded'])
+
+    def test_spawned_workers_do_not_rerun_the_launcher(self):
+        # Mirrors the ./run script generated by setup.sh.
+        launcher = os.path.join(self.dir, 'run')
+        file_io.write_lines(launcher, [
+            'import multiprocessing',
+            'import sys',
+            f'sys.path.append({python_script_path!r})',
+            'import main',
+            "if __name__ == '__main__':",
+            "    multiprocessing.set_start_method('spawn')",
+            '    main.main()',
+        ])
+        result = subprocess.run(
+            [sys.executable, launcher, '--executions-dir', self.dir + '/executions',
+             '--memories-dir', self.dir + '/memories'] + self._path('a/one.md', 'c/four.md'),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=60,
+        )
+        self.assertEqual(0, result.returncode)
+        summary = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(2, summary['succeeded'])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+"""
+Change notifications for a few files. Uses inotify on their directories
+where libc provides it (so editor saves through rename are seen too) and
+falls back to polling os.stat() otherwise.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Optional
+
+POLL_INTERVAL_SEC = 0.5
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    """Identity of the current file content as far as stat() can tell; None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _load_inotify():
+    if not hasattr(os, 'O_NONBLOCK'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    def __init__(self, files: [str], poll_interval: float = POLL_INTERVAL_SEC, use_inotify: bool = True):
+        self._files = [os.path.abspath(f) for f in files]
+        self._poll_interval = poll_interval
+        self._fd = -1
+        self._names_by_wd = {}
+        libc = _load_inotify() if use_inotify else None
+        if libc:
+            self._start_inotify(libc)
+        self._signatures = self._snapshot()
+
+    def _start_inotify(self, libc):
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return
+        for path in self._files:
+            parent = os.path.dirname(path)
+            wd = libc.inotify_add_watch(fd, parent.encode(), _WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                self._names_by_wd = {}
+                return
+            self._names_by_wd.setdefault(wd, set()).add(os.path.basename(path).encode())
+        self._fd = fd
+
+    def uses_inotify(self) -> bool:
+        return self._fd >= 0
+
+    def _snapshot(self) -> {}:
+        return {f: file_signature(f) for f in self._files}
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until one of the files changed or ``timeout`` seconds passed
+        (forever for None). Returns whether something changed.
+        """
+        if self._fd >= 0:
+            return self._wait_inotify(timeout)
+        return self._wait_polling(timeout)
+
+    def _wait_inotify(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._read_events():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def _read_events(self) -> bool:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        matched = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name in self._names_by_wd.get(wd, ()):
+                matched = True
+        return matched
+
+    def _wait_polling(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signatures = self._snapshot()
+            if signatures != self._signatures:
+                self._signatures = signatures
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            step = self._poll_interval
+            if deadline is not None:
+                step = min(step, max(0.0, deadline - time.monotonic()))
+            time.sleep(step)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,121 @@
+"""
+In-memory stand-in for the calendar app taken by
+main.update_reminders_at_google_calendar, for tests and benchmarks.
+
+Benchmark, from utils/calendar/src:
+    python3 fake_calendar_app.py [--events 10000] [--changed 0.1]
+
+Fills the fake calendar with generated events, changes a share of the
+reminders and prints JSON with the sync time, the diff and the app calls.
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from collections import Counter
+
+import main
+
+
+class LegacyFakeCalendarApp:
+    """
+    Keeps events in a dict by id and counts calls per method. Offers only the
+    one-by-one interface: delete_event_by_filter() and add_event().
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.calls = Counter()
+        self._next_id = 0
+
+    def _insert(self, title: str, summary: str, timestamp: int, duration_minutes: int, add_notification: bool):
+        self._next_id += 1
+        event_id = str(self._next_id)
+        self.events[event_id] = {
+            'id': event_id,
+            'summary': title,
+            'description': summary,
+            'start': timestamp,
+            'end': timestamp + duration_minutes * 60,
+            'reminders': add_notification,
+        }
+
+    def delete_event_by_filter(self, predicate):
+        self.calls['delete_event_by_filter'] += 1
+        for e in list(self.events.values()):
+            if predicate(dict(e)):
+                del self.events[e['id']]
+
+    def add_event(self, **event):
+        self.calls['add_event'] += 1
+        self._insert(**event)
+
+    def generated_uids(self) -> [str]:
+        return sorted(filter(None, (main.event_uid(e['description']) for e in self.events.values())))
+
+
+class FakeCalendarApp(LegacyFakeCalendarApp):
+    """Adds the batched interface: list_events(), delete_events() and add_events()."""
+
+    def list_events(self) -> [dict]:
+        self.calls['list_events'] += 1
+        return [dict(e) for e in self.events.values()]
+
+    def delete_events(self, events: [dict]):
+        self.calls['delete_events'] += 1
+        for e in events:
+            self.events.pop(e['id'], None)
+
+    def add_events(self, events: [dict]):
+        self.calls['add_events'] += 1
+        for e in events:
+            self._insert(**e)
+
+
+def generate_reminders(count: int, version: int = 0, changed: float = 0.0) -> dict:
+    """``count`` reminders in the shape of main.task_master_reminders_to_internal_model output."""
+    results = {}
+    changed_count = int(count * changed)
+    for i in range(count):
+        title = f'reminder {i}' + (f' v{version}' if i < changed_count else '')
+        timestamp = 2000000000 + i * 60
+        uid = f'notes/{title}/{timestamp}'
+        results[uid] = {
+            'title': title,
+            'summary': f'\n\n=====================\n{main.GENERATED_DESC}\nTech Data\nuid: {uid}\nfilename: notes',
+            'timestamp': timestamp,
+            'duration_minutes': main.DEFAULT_DURATION_MINUTES,
+            'add_notification': True,
+        }
+    return results
+
+
+def benchmark(events: int, changed: float) -> dict:
+    app = FakeCalendarApp()
+    reminders = generate_reminders(events, version=1, changed=changed)
+    # Sync progress prints would otherwise mix into the JSON on stdout.
+    with contextlib.redirect_stdout(sys.stderr):
+        main.update_reminders_at_google_calendar(app, generate_reminders(events))
+        app.calls.clear()
+
+        started = time.perf_counter()
+        diff = main.update_reminders_at_google_calendar(app, reminders)
+    return {
+        'events': events,
+        'sync_sec': time.perf_counter() - started,
+        'diff': diff,
+        'calls': dict(app.calls),
+    }
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser(description='Times a calendar sync against the in-memory fake app.')
+    parser.add_argument('--events', type=int, default=10000, help='Events in the calendar and reminders')
+    parser.add_argument('--changed', type=float, default=0.1, help='Share of reminders changed before the sync')
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.events, args.changed), indent=2))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -2,22 +2,42 @@ import time
 import datetime
 import json
 import os.path
+import random
 import shlex
 import subprocess
 import sys
+import tempfile
 import threading
 import functools
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Optional, Any, Union
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import hashlib
 import datetime
 import argparse
 import re
 
 GENERATED_DESC = 'auto-generated event'
 DEFAULT_DURATION_MINUTES = 30
+# Events per add/delete call for calendar apps supporting batches.
+CALENDAR_BATCH_SIZE = 50
+EVENT_UID_RE = re.compile(r'^uid: ([^\r\n]*)', re.MULTILINE)
 PYTHON_SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 ICS_FILENAME="reminders.ics"
 REPO_STORAGE_DIR = os.path.join(PYTHON_SCRIPT_PATH, 'repo_storage')
+# Module name for task_master's main.py, which would clash with this one.
+TASK_MASTER_MODULE = 'task_master_main'
+REMINDERS_CACHE_FILENAME = 'task_master_reminders.json'
+ICS_COMMIT_FILENAME = 'task_master_ics_commit'
+# Never searched for notes: git internals and the <name>.files dirs task_master keeps attachments in.
+SKIPPED_DIRS = {'.git'}
+ASSET_DIR_SUFFIX = '.files'
+SYNC_INTERVAL_SEC = 3600
+RETRY_BASE_SEC = 30
 
 
 def prettify_title(raw: str) -> str:
@@ -88,40 +108,83 @@ def task_master_reminders_to_internal_model(reminders_file: str, reminders_json:
     return results
 
 
-def update_reminders_at_google_calendar(app, reminders: {}):
-    up_to_date_reminders = set()
-    def maybe_delete(event) -> bool:
-        desc = event.get('description')
-        if not desc or not GENERATED_DESC in desc:
-            return False
+def event_uid(description: Optional[str]) -> Optional[str]:
+    """
+    Uid of a generated event from its description; None for events not
+    generated by this service and '' for generated ones without a uid.
+    """
+    if not description or GENERATED_DESC not in description:
+        return None
+    match = EVENT_UID_RE.search(description)
+    return match.group(1).strip() if match else ''
 
-        for uid in reminders:
-            if uid in desc:
-                up_to_date_reminders.add(uid)
-                return False
-        
+
+def _batches(items: list, size: int = CALENDAR_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def update_reminders_at_google_calendar(app, reminders: {}) -> dict:
+    """
+    Brings the generated events of ``app`` in line with ``reminders``, using
+    the uid each generated event carries in its description.
+
+    Apps providing list_events(), delete_events(events) and add_events(events)
+    get batched calls; otherwise delete_event_by_filter() and add_event() are used.
+    """
+    kept = set()
+    stale = []
+
+    def is_stale(event) -> bool:
+        uid = event_uid(event.get('description'))
+        if uid is None:
+            return False
+        # Only one event per uid survives, duplicates go away.
+        if uid in reminders and uid not in kept:
+            kept.add(uid)
+            return False
+        stale.append(event)
         return True
-            
-    app.delete_event_by_filter(maybe_delete)
-
-    print('Up-to-date_reminders: ', len(up_to_date_reminders))
-
-    for uid in up_to_date_reminders:
-        reminders.pop(uid)
-    print(f'Will add {len(reminders.keys())} reminders to calendar!')
-
-    for key in reminders:
-        r = reminders[key]
-        title = r['title']
-        print(f'Adding event for: {title}')
-
-        app.add_event(
-          title=r['title'],
-          summary=r['summary'],
-          timestamp=r['timestamp'],
-          duration_minutes=r['duration_minutes'],
-          add_notification=r['add_notification'],
-        )
+
+    if hasattr(app, 'list_events') and hasattr(app, 'delete_events'):
+        for event in app.list_events():
+            is_stale(event)
+        for batch in _batches(stale):
+            app.delete_events(batch)
+    else:
+        app.delete_event_by_filter(is_stale)
+
+    print('Up-to-date_reminders: ', len(kept))
+    to_add = reminders.keys() - kept
+    print(f'Will add {len(to_add)} reminders to calendar!')
+
+    events = [{
+        'title': reminders[uid]['title'],
+        'summary': reminders[uid]['summary'],
+        'timestamp': reminders[uid]['timestamp'],
+        'duration_minutes': reminders[uid]['duration_minutes'],
+        'add_notification': reminders[uid]['add_notification'],
+    } for uid in sorted(to_add, key=lambda uid: reminders[uid]['timestamp'])]
+    if hasattr(app, 'add_events'):
+        for batch in _batches(events):
+            app.add_events(batch)
+    else:
+        for event in events:
+            print(f'Adding event for: {event["title"]}')
+            app.add_event(**event)
+
+    return {'kept': len(kept), 'added': len(events), 'deleted': len(stale)}
+
+
+def _utf8_len(ch: str) -> int:
+    code = ord(ch)
+    if code < 0x80:
+        return 1
+    if code < 0x800:
+        return 2
+    if code < 0x10000:
+        return 3
+    return 4
 
 
 def format_ics_text(text):
@@ -136,46 +199,38 @@ def format_ics_text(text):
 
     # 2. Line Folding (limit to 75 octets)
     # RFC 5545 requires lines to be folded with CRLF + Space (or Tab)
+    # One pass: a segment is cut before the character that would push its UTF-8 size over the limit.
     line_limit = 75
     folded = []
-    current = ""
-
-    for ch in escaped:
-        candidate = current + ch
-
-        if len(candidate.encode('utf-8')) > line_limit:
-            folded.append(current)
-            current = ch
+    start = 0
+    size = 0
+
+    for i, ch in enumerate(escaped):
+        n = _utf8_len(ch)
+        if size + n > line_limit:
+            folded.append(escaped[start:i])
+            start = i
+            size = n
         else:
-            current = candidate
+            size += n
 
-    folded.append(current)
+    folded.append(escaped[start:])
 
     # Fold using CRLF + SPACE
     return '\r\n '.join(folded)
 
-def generate_ics(reminders: dict):
-    """
-    Generates an .ics calendar file from reminders and optionally serves it.
-    """
-    import datetime
-    import os
-    from http.server import HTTPServer, SimpleHTTPRequestHandler
-    import threading
-
-    output_file = os.path.join(PYTHON_SCRIPT_PATH, ICS_FILENAME)
 
+def ics_lines(reminders: dict):
+    """Yields the lines of the .ics calendar for reminders."""
     def format_dt(ts: int) -> str:
         dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
         return dt.strftime("%Y%m%dT%H%M%S") + 'Z'
 
     prodid_name = os.environ.get("PRODID_NAME") or "Reminders Agenda"
 
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        f"PRODID:-//TaskMaster//{prodid_name}//EN"
-    ]
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield f"PRODID:-//TaskMaster//{prodid_name}//EN"
 
     for uid, r in reminders.items():
         start_ts = r["timestamp"]
@@ -187,21 +242,57 @@ def generate_ics(reminders: dict):
         dtend = format_dt(end_ts)
         dtstamp = format_dt(start_ts)
 
-        lines.extend([
-            "BEGIN:VEVENT",
-            f"UID:{uid}",
-            f"DTSTAMP:{dtstamp}",
-            f"DTSTART:{dtstart}",
-            f"DTEND:{dtend}",
-            f"SUMMARY:{r['title']}",
-            f"DESCRIPTION:{format_ics_text(r['summary'])}",
-            "END:VEVENT"
-        ])
+        yield "BEGIN:VEVENT"
+        yield f"UID:{uid}"
+        yield f"DTSTAMP:{dtstamp}"
+        yield f"DTSTART:{dtstart}"
+        yield f"DTEND:{dtend}"
+        yield f"SUMMARY:{r['title']}"
+        yield f"DESCRIPTION:{format_ics_text(r['summary'])}"
+        yield "END:VEVENT"
+
+    yield "END:VCALENDAR"
+
 
-    lines.append("END:VCALENDAR")
+def file_sha256(path: str) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def generate_ics(reminders: dict):
+    """
+    Generates an .ics calendar file from reminders. The lines are streamed
+    into a temp file that replaces the calendar only when its content hash
+    differs, so an unchanged calendar keeps its mtime and ETag.
+    """
+    output_file = os.path.join(PYTHON_SCRIPT_PATH, ICS_FILENAME)
 
-    with open(output_file, "w") as f:
-        f.write("\n".join(lines))
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + ICS_FILENAME + '.', dir=PYTHON_SCRIPT_PATH)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            separator = b''
+            for line in ics_lines(reminders):
+                data = separator + line.encode('utf-8')
+                digest.update(data)
+                f.write(data)
+                separator = b'\n'
+        if digest.hexdigest() == file_sha256(output_file):
+            os.unlink(tmp_path)
+            print(f"ICS file unchanged at: {output_file}")
+            return output_file
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
 
     print(f"ICS file generated at: {output_file}")
     return output_file
@@ -241,65 +332,405 @@ def ensure_repo_cloned(repo_uri: str) -> str:
     return local_path
 
 
-def update_notes_repo(notes_dir: str):
-    """Fetch and hard-reset to upstream. Local clone is a disposable read-only mirror."""
-    quoted = shlex.quote(notes_dir)
-    capture_output(f'cd {quoted} && git fetch --prune origin')
-    upstream = capture_output(
-        f'cd {quoted} && git rev-parse --abbrev-ref --symbolic-full-name @{{u}}'
-    ).strip()
-    capture_output(f'cd {quoted} && git reset --hard {shlex.quote(upstream)}')
-    capture_output(f'cd {quoted} && git clean -fd')
+def git(notes_dir: str, *args: str, ignore_errors=False) -> Union[str, None]:
+    output = capture_output(shlex.join(['git', '-C', notes_dir, *args]), ignore_errors=ignore_errors)
+    return output.strip() if output is not None else None
+
+
+def update_notes_repo(notes_dir: str) -> str:
+    """
+    Fetch and hard-reset to upstream. Local clone is a disposable read-only mirror.
+    The checkout is left alone when the fetch did not move upstream.
+    Returns the upstream commit sha.
+    """
+    before = git(notes_dir, 'rev-parse', '--verify', '-q', '@{u}', ignore_errors=True)
+    git(notes_dir, 'fetch', '--prune', 'origin')
+    upstream = git(notes_dir, 'rev-parse', '--verify', '@{u}')
+    if upstream == before and git(notes_dir, 'rev-parse', 'HEAD') == upstream:
+        return upstream
+    git(notes_dir, 'reset', '--hard', upstream)
+    git(notes_dir, 'clean', '-fd')
+    return upstream
+
+
+def ics_commit_path(notes_dir: str) -> str:
+    return os.path.join(notes_dir, '.git', ICS_COMMIT_FILENAME)
 
 
-def sync_reminders_once(task_master_dir: str, repo_uri: str, ignore_paths_like: list, offset_min: int = 0) -> str:
+def sync_reminders_once(task_master_dir: str, repo_uri: str, ignore_paths_like: list, offset_min: int = 0,
+                        workers: Optional[int] = None, force: bool = True) -> str:
+    """Without ``force`` the existing ICS is kept when it was generated from the current upstream commit."""
     notes_dir = ensure_repo_cloned(repo_uri)
     print('Updating your notes!')
-    update_notes_repo(notes_dir)
+    commit = update_notes_repo(notes_dir)
+    ics_path = os.path.join(PYTHON_SCRIPT_PATH, ICS_FILENAME)
+    commit_path = ics_commit_path(notes_dir)
+    if not force and os.path.exists(ics_path) and os.path.exists(commit_path):
+        with open(commit_path, 'r') as f:
+            if f.read().strip() == commit:
+                print('Upstream unchanged, keeping reminders')
+                return ics_path
     print('Generating reminders!')
-    reminders = generate_reminders(task_master_dir, notes_dir, ignore_paths_like, offset_min=offset_min)
+    reminders = generate_reminders(task_master_dir, notes_dir, ignore_paths_like, offset_min=offset_min,
+                                   workers=workers)
     generate_ics(reminders)
-    return os.path.join(PYTHON_SCRIPT_PATH, ICS_FILENAME)
+    with open(commit_path, 'w') as f:
+        f.write(commit)
+    return ics_path
+
+
+def load_task_master(task_master_dir: str):
+    """Imports task_master's main module from <task_master_dir>/src once per process."""
+    module = sys.modules.get(TASK_MASTER_MODULE)
+    if module:
+        return module
+    src_dir = os.path.join(os.path.abspath(task_master_dir), 'src')
+    if src_dir not in sys.path:
+        sys.path.append(src_dir)
+    spec = importlib.util.spec_from_file_location(TASK_MASTER_MODULE, os.path.join(src_dir, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[TASK_MASTER_MODULE] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[TASK_MASTER_MODULE]
+        raise
+    return module
+
+
+def extract_reminders(task_master_dir: str, full_path: str) -> {}:
+    """Same JSON as `run <file> --reminders`, without a new interpreter and without touching the file."""
+    task_master = load_task_master(task_master_dir)
+    tm = task_master.TaskMaster(taskflow_file=full_path, history_file=None)
+    return tm.get_reminders(active_only=False, read_only=True)
+
+
+class NotesFilter:
+    """
+    Decides which paths of the notes repo are notes. ``ignore_paths_like``
+    substrings are compiled into one regex; .git and <name>.files asset
+    dirs are always skipped.
+    """
+
+    def __init__(self, ignore_paths_like: list):
+        self._ignored = re.compile('|'.join(map(re.escape, ignore_paths_like))) if ignore_paths_like else None
+        self.skipped = 0
+
+    def _matches(self, rel_path: str) -> bool:
+        if self._ignored is not None and self._ignored.search(rel_path):
+            self.skipped += 1
+            return True
+        return False
+
+    def skips_dir(self, name: str, rel_dir: str) -> bool:
+        if name in SKIPPED_DIRS or name.endswith(ASSET_DIR_SUFFIX):
+            return True
+        # Paths of everything below start with rel_dir + '/', so a match here matches them all.
+        return self._matches(rel_dir + os.sep)
 
+    def is_note(self, rel_path: str) -> bool:
+        return rel_path.endswith('.md') and not self._matches(rel_path)
 
-def generate_reminders(task_master_dir: str, notes_dir: str, ignore_paths_like: list, offset_min: int = 0) -> {}:
+    def is_note_in_tree(self, rel_path: str) -> bool:
+        """is_note() for a path whose parent dirs were not checked by skips_dir()."""
+        if not rel_path.endswith('.md'):
+            return False
+        parents = rel_path.split('/')[:-1]
+        if any(d in SKIPPED_DIRS or d.endswith(ASSET_DIR_SUFFIX) for d in parents):
+            return False
+        return not self._matches(rel_path)
+
+    def report(self):
+        if self.skipped:
+            print(f"Skipped (ignored): {self.skipped} paths")
+
+
+def find_notes(notes_dir: str, ignore_paths_like: list) -> List[str]:
+    notes_filter = NotesFilter(ignore_paths_like)
+    results = []
+    dirs = [(notes_dir, '')]
+    while dirs:
+        path, rel_dir = dirs.pop()
+        with os.scandir(path) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                rel_path = rel_dir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not notes_filter.skips_dir(entry.name, rel_path):
+                        dirs.append((entry.path, rel_path + os.sep))
+                elif notes_filter.is_note(rel_path):
+                    results.append(entry.path)
+    notes_filter.report()
+    return results
+
+
+def list_note_blobs(notes_dir: str, ignore_paths_like: list) -> Optional[dict]:
+    """
+    Relative path -> git blob sha of every markdown file at HEAD, listed
+    with a single `git ls-tree`; None when notes_dir is not a git checkout.
+    """
+    if not os.path.isdir(os.path.join(notes_dir, '.git')):
+        return None
+    try:
+        listing = subprocess.check_output(
+            ['git', '-C', notes_dir, 'ls-tree', '-r', '-z', 'HEAD'], stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    notes_filter = NotesFilter(ignore_paths_like)
     results = {}
-    for root, dir, files in os.walk(notes_dir):
-        for f in files:
-            full_path = os.path.join(root, f)
-            rel_path = os.path.relpath(full_path, notes_dir)
-
-            if any(pattern in rel_path for pattern in ignore_paths_like):
-                print(f"Skipped (ignored): {rel_path}")
-                continue
-
-            if (f.endswith('.md')):
-                # print(f'Processing: {full_path}')
-                reminders_json: str = capture_output(task_master_dir + f'/run \'{full_path}\' --reminders')
-                reminders = task_master_reminders_to_internal_model(reminders_file = f, reminders_json = json.loads(reminders_json), offset_min=offset_min)
-                results.update(reminders)
-            # else:
-                # print(f'Skipped: {full_path}')
+    for entry in listing.decode().split('\0'):
+        if not entry:
+            continue
+        meta, rel_path = entry.split('\t', 1)
+        mode, kind, sha = meta.split(' ')
+        # Symlinks are skipped: their blob is the link target, not the note.
+        if kind != 'blob' or mode == '120000':
+            continue
+        if notes_filter.is_note_in_tree(rel_path):
+            results[rel_path] = sha
+    notes_filter.report()
     return results
 
 
-def sync(task_master_dir: str, repo_uri: str, port: int, ignore_paths_like: list, offset_min: int, no_daemon: bool):
+def reminders_cache_path(notes_dir: str) -> str:
+    # Inside .git so that `git clean` keeps it and removing the clone drops it.
+    return os.path.join(notes_dir, '.git', REMINDERS_CACHE_FILENAME)
+
+
+def load_reminders_cache(path: str) -> dict:
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_reminders_cache(path: str, cache: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def extract_all_reminders(task_master_dir: str, paths: List[str], workers: Optional[int] = None):
+    """Yields (path, reminders json) in completion order."""
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        for full_path in paths:
+            yield full_path, extract_reminders(task_master_dir, full_path)
+        return
+
+    # Spawned workers: the sync may run next to the HTTP server thread, which fork() would not copy.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=load_task_master, initargs=(task_master_dir,)) as pool:
+        futures = {pool.submit(extract_reminders, task_master_dir, full_path): full_path
+                   for full_path in paths}
+        for future in as_completed(futures):
+            try:
+                reminders_json = future.result()
+            except Exception:
+                print(f'Reminders extraction failed for: {futures[future]}')
+                raise
+            yield futures[future], reminders_json
+
+
+def generate_reminders(task_master_dir: str, notes_dir: str, ignore_paths_like: list, offset_min: int = 0,
+                       workers: Optional[int] = None) -> {}:
+    """
+    In a git checkout the task_master output per file is cached by blob sha
+    and date (relative reminder dates depend on the day), so only files
+    changed since the previous sync are processed again.
+    """
+    results = {}
+
+    def add(full_path: str, reminders_json: {}):
+        results.update(task_master_reminders_to_internal_model(
+            reminders_file=os.path.basename(full_path), reminders_json=reminders_json, offset_min=offset_min))
+
+    blobs = list_note_blobs(notes_dir, ignore_paths_like)
+    if blobs is None:
+        for full_path, reminders_json in extract_all_reminders(
+                task_master_dir, find_notes(notes_dir, ignore_paths_like), workers):
+            add(full_path, reminders_json)
+        return results
+
+    cache_path = reminders_cache_path(notes_dir)
+    cached = load_reminders_cache(cache_path)
+    today = datetime.date.today().isoformat()
+    # Building the cache anew drops entries of deleted and ignored paths.
+    cache = {}
+    stale = []
+    for rel_path, sha in blobs.items():
+        entry = cached.get(rel_path)
+        if entry and entry.get('blob') == sha and entry.get('date') == today:
+            cache[rel_path] = entry
+            add(os.path.join(notes_dir, rel_path), entry['reminders'])
+        else:
+            stale.append(rel_path)
+
+    print(f'Reminders: {len(stale)} of {len(blobs)} files changed')
+    for full_path, reminders_json in extract_all_reminders(
+            task_master_dir, [os.path.join(notes_dir, p) for p in stale], workers):
+        rel_path = os.path.relpath(full_path, notes_dir)
+        cache[rel_path] = {'blob': blobs[rel_path], 'date': today, 'reminders': reminders_json}
+        add(full_path, reminders_json)
+
+    if cache != cached:
+        save_reminders_cache(cache_path, cache)
+    return results
+
+
+class ICSSnapshot:
+    def __init__(self, body: bytes, modified: float):
+        self.body = body
+        self.gzip_body = gzip.compress(body, mtime=0)
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+        self.modified = int(modified)
+        self.last_modified = formatdate(self.modified, usegmt=True)
+
+
+class ICSStore:
+    """Latest ICS content kept in memory; readers always see one whole snapshot."""
+
+    def __init__(self):
+        self._snapshot: Optional[ICSSnapshot] = None
+
+    def get(self) -> Optional[ICSSnapshot]:
+        return self._snapshot
+
+    def load(self, path: str):
+        with open(path, 'rb') as f:
+            body = f.read()
+        current = self._snapshot
+        if current and current.body == body:
+            return
+        # A single reference assignment, so concurrent requests never mix two versions.
+        self._snapshot = ICSSnapshot(body, os.path.getmtime(path))
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class ICSRequestHandler(BaseHTTPRequestHandler):
+    """Serves the ICS of an ICSStore at /<ICS_FILENAME> with conditional GET and gzip."""
+
+    def __init__(self, *args, store: ICSStore, **kwargs):
+        self.store = store
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def _respond(self, with_body: bool):
+        if self.path.split('?', 1)[0] != '/' + ICS_FILENAME:
+            self.send_error(404)
+            return
+        snapshot = self.store.get()
+        if snapshot is None:
+            self.send_error(503, 'Reminders are not generated yet')
+            return
+
+        use_gzip = _accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = snapshot.gzip_etag if use_gzip else snapshot.etag
+        if self._not_modified(snapshot):
+            self.send_response(304)
+            self._send_validators(snapshot, etag)
+            self.end_headers()
+            return
+
+        body = snapshot.gzip_body if use_gzip else snapshot.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self._send_validators(snapshot, etag)
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def _send_validators(self, snapshot: ICSSnapshot, etag: str):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', snapshot.last_modified)
+        self.send_header('Vary', 'Accept-Encoding')
+
+    def _not_modified(self, snapshot: ICSSnapshot) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or any(t.removeprefix('W/') in (snapshot.etag, snapshot.gzip_etag) for t in tags)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return snapshot.modified <= since.timestamp()
+        return False
+
+
+def make_ics_server(store: ICSStore, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), functools.partial(ICSRequestHandler, store=store))
+
+
+def sync_delay(interval_sec: float, failures: int, rnd: random.Random = random) -> float:
+    """
+    Seconds until the next sync: ``interval_sec`` normally, and after
+    failures an exponential backoff capped at ``interval_sec`` with half of
+    it randomized, so restarted services don't retry in lockstep.
+    """
+    if failures == 0:
+        return interval_sec
+    cap = min(interval_sec, RETRY_BASE_SEC * 2 ** (failures - 1))
+    return cap / 2 + rnd.uniform(0, cap / 2)
+
+
+def sync(task_master_dir: str, repo_uri: str, port: int, ignore_paths_like: list, offset_min: int, no_daemon: bool,
+         workers: Optional[int] = None, interval_sec: float = SYNC_INTERVAL_SEC):
+    store = ICSStore()
+    # Outdated events move to the current day, so a new day needs a regeneration even without new commits.
+    last_generated = {'date': None}
+
     def update_reminders():
-        sync_reminders_once(task_master_dir, repo_uri, ignore_paths_like, offset_min=offset_min)
+        today = datetime.date.today()
+        ics_path = sync_reminders_once(task_master_dir, repo_uri, ignore_paths_like, offset_min=offset_min,
+                                       workers=workers, force=last_generated['date'] != today)
+        last_generated['date'] = today
+        store.load(ics_path)
 
     def update_reminders_loop():
+        failures = 0
         while True:
-            time.sleep(3600) # 1h
+            time.sleep(sync_delay(interval_sec, failures))
             try:
                 update_reminders()
+                failures = 0
             except Exception as e:
-                print(f'Reminders update failed (will retry next hour): {e}')
+                failures += 1
+                print(f'Reminders update failed (attempt {failures}, will retry): {e}')
 
     def serve():
         print(f'Serving local iCal server at: http://localhost:{port}/{ICS_FILENAME}')
-        handler = functools.partial(SimpleHTTPRequestHandler, directory=PYTHON_SCRIPT_PATH) # TODO: serve single file
-        server = HTTPServer(('0.0.0.0', port), handler)
-        server.allow_reuse_address = True
+        server = make_ics_server(store, port)
         server.serve_forever()
 
     print('Initial reminders preparation')
@@ -331,6 +762,8 @@ def main():
     repo_uri = config["repo_uri"]
     ignore_paths_like = config.get("ignore_paths_like", [])
     timezone_offset_min = config.get("timezone_offset_min", 0)
+    reminder_workers = config.get("reminder_workers")
+    sync_interval_sec = config.get("sync_interval_sec", SYNC_INTERVAL_SEC)
 
     sync(
         task_master_dir=args.task_master_dir,
@@ -338,7 +771,9 @@ def main():
         port=args.port,
         ignore_paths_like=ignore_paths_like,
         offset_min=timezone_offset_min,
-        no_daemon=args.no_daemon
+        no_daemon=args.no_daemon,
+        workers=reminder_workers,
+        interval_sec=sync_interval_sec,
     )
 
 
@@ -1,9 +1,15 @@
+import contextlib
+import gzip
+import http.client
+import io
 import json
 import os
+import random
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import unittest
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
@@ -21,6 +27,7 @@ GIT_ENV = {
 
 sys.path.insert(0, SRC_DIR)
 import main as calendar_main  # noqa: E402
+import fake_calendar_app  # noqa: E402
 
 
 def _run_git(args, cwd: str):
@@ -124,6 +131,65 @@ class TestCalendarRepoSync(unittest.TestCase):
         self.assertIn('reminder checkpoint', ics_content)
         self.assertTrue(os.path.isdir(os.path.join(CALENDAR_DIR, 'repo_storage', 'notes')))
 
+    def _push_reminder(self, title: str):
+        with open(os.path.join(self.notes_repo, 'reminders.md'), 'w') as f:
+            f.write(f'- [!] 2026.06.07: {title}\n')
+        _run_git(['commit', '-am', title], self.notes_repo)
+        _run_git(['push', '-q', self.bare_repo, 'HEAD'], self.notes_repo)
+
+    def test_unchanged_upstream_skips_regeneration(self):
+        repo_uri = 'file://' + self.bare_repo
+        calls = {'generate_reminders': 0, 'git': []}
+        original_generate, original_capture = calendar_main.generate_reminders, calendar_main.capture_output
+
+        def counted_generate(*args, **kwargs):
+            calls['generate_reminders'] += 1
+            return original_generate(*args, **kwargs)
+
+        def recorded_capture(cmd, ignore_errors=False):
+            calls['git'].append(cmd)
+            return original_capture(cmd, ignore_errors=ignore_errors)
+
+        calendar_main.generate_reminders = counted_generate
+        calendar_main.capture_output = recorded_capture
+        try:
+            def sync_once(force: bool = False) -> str:
+                calls['git'] = []
+                ics_path = calendar_main.sync_reminders_once(TASK_MASTER_DIR, repo_uri, [], force=force)
+                with open(ics_path) as f:
+                    return f.read()
+
+            self.assertIn('reminder checkpoint', sync_once())
+            self.assertEqual(1, calls['generate_reminders'])
+
+            self.assertIn('reminder checkpoint', sync_once())
+            self.assertEqual(1, calls['generate_reminders'])
+            self.assertFalse(any(' reset ' in cmd or ' clean ' in cmd for cmd in calls['git']))
+
+            sync_once(force=True)
+            self.assertEqual(2, calls['generate_reminders'])
+
+            self._push_reminder('pushed reminder')
+            self.assertIn('pushed reminder', sync_once())
+            self.assertEqual(3, calls['generate_reminders'])
+        finally:
+            calendar_main.generate_reminders = original_generate
+            calendar_main.capture_output = original_capture
+
+
+class TestSyncDelay(unittest.TestCase):
+    def test_interval_without_failures(self):
+        self.assertEqual(600, calendar_main.sync_delay(600, 0))
+
+    def test_backoff_is_jittered_and_capped(self):
+        rnd = random.Random(0)
+        for failures in range(1, 12):
+            cap = min(600, calendar_main.RETRY_BASE_SEC * 2 ** (failures - 1))
+            delays = {calendar_main.sync_delay(600, failures, rnd) for _ in range(20)}
+            self.assertGreater(len(delays), 1)
+            for delay in delays:
+                self.assertTrue(cap / 2 <= delay <= cap, (failures, delay))
+
 
 class TestGenerateIcs(unittest.TestCase):
     def setUp(self):
@@ -187,6 +253,30 @@ class TestGenerateIcs(unittest.TestCase):
         self.assertIn('DTSTART:20240720T080000Z', content)
         self.assertIn('DTSTART:20240720T090000Z', content)
 
+    def test_format_ics_text_folds_at_75_octets(self):
+        text = 'a' * 74 + 'é' + 'b' * 10 + '€' * 30
+        folded = calendar_main.format_ics_text(text)
+        segments = folded.split('\r\n ')
+        self.assertEqual(text, ''.join(segments))
+        self.assertEqual('a' * 74, segments[0])
+        for segment in segments:
+            self.assertLessEqual(len(segment.encode('utf-8')), 75)
+        self.assertEqual('x\\;y\\,z\\n\\\\', calendar_main.format_ics_text('x;y,z\n\\'))
+
+    def test_unchanged_ics_is_not_rewritten(self):
+        reminders = self._make_reminder(1721462400)
+        ics_path = calendar_main.generate_ics(reminders)
+        os.utime(ics_path, ns=(1, 1))
+        calendar_main.generate_ics(reminders)
+        self.assertEqual(1, os.stat(ics_path).st_mtime_ns)
+        self.assertEqual([calendar_main.ICS_FILENAME], os.listdir(self.ics_dir))
+
+        reminders.update(self._make_reminder(1721466000, 'event two'))
+        calendar_main.generate_ics(reminders)
+        self.assertNotEqual(1, os.stat(ics_path).st_mtime_ns)
+        with open(ics_path) as f:
+            self.assertIn('event two', f.read())
+
 
 class TestGenerateReminders(unittest.TestCase):
     def setUp(self):
@@ -320,5 +410,299 @@ class TestGenerateReminders(unittest.TestCase):
         self.assertIn('DTSTART:20360707T222959Z', ics_content)
 
 
+class TestParallelReminderExtraction(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_TMP_ROOT, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory(dir=TEST_TMP_ROOT)
+        self.notes_dir = self.tmp.name
+        self.contents = {}
+        for i in range(4):
+            path = os.path.join(self.notes_dir, f'dir{i % 2}', f'notes{i}.md')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.contents[path] = (
+                f'# Notes {i}\n'
+                f'- [!] 2036.06.0{i + 1} 13:00: reminder {i}\n'
+                f'- [!] 2036.07.0{i + 1}: day reminder {i}\n'
+                f'- [!] not a date {i}\n'
+            )
+            with open(path, 'w') as f:
+                f.write(self.contents[path])
+        with open(os.path.join(self.notes_dir, 'ignored.md'), 'w') as f:
+            f.write('- [!] 2036.06.06: ignored reminder\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_process_pool_matches_in_process_extraction(self):
+        sequential = calendar_main.generate_reminders(TASK_MASTER_DIR, self.notes_dir, ['ignored'], workers=1)
+        parallel = calendar_main.generate_reminders(TASK_MASTER_DIR, self.notes_dir, ['ignored'], workers=3)
+
+        # Two reminders and one errors event per file.
+        self.assertEqual(12, len(sequential))
+        self.assertEqual(sequential, parallel)
+        self.assertFalse(any('ignored' in r['title'] for r in parallel.values()))
+
+    def test_extraction_leaves_notes_untouched(self):
+        for path, content in self.contents.items():
+            reminders = calendar_main.extract_reminders(TASK_MASTER_DIR, path)
+            self.assertEqual(1, len(reminders['errors']))
+            with open(path) as f:
+                self.assertEqual(content, f.read())
+
+
+class TestFindNotes(unittest.TestCase):
+    FILES = [
+        'todo.md', 'readme.txt', 'work/plan.md', 'work/archive/old.md', 'work/archived.md',
+        'tmp/a/b/deep.md', 'todo.files/attached.md', 'todo.files/image.png', '.git/notes.md',
+        'personal/tmp-notes.md', 'personal/diary.md',
+    ]
+
+    def setUp(self):
+        os.makedirs(TEST_TMP_ROOT, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory(dir=TEST_TMP_ROOT)
+        self.notes_dir = self.tmp.name
+        for rel_path in self.FILES:
+            path = os.path.join(self.notes_dir, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('- [ ] task\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _find(self, ignore_paths_like: list) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sorted(os.path.relpath(p, self.notes_dir)
+                          for p in calendar_main.find_notes(self.notes_dir, ignore_paths_like))
+
+    def test_substring_patterns_and_default_skips(self):
+        self.assertEqual(['personal/diary.md', 'personal/tmp-notes.md', 'tmp/a/b/deep.md', 'todo.md',
+                          'work/archive/old.md', 'work/archived.md', 'work/plan.md'], self._find([]))
+        self.assertEqual(['personal/diary.md', 'todo.md', 'work/plan.md'], self._find(['archive', 'tmp']))
+        self.assertEqual(['personal/diary.md', 'personal/tmp-notes.md', 'todo.md', 'work/archived.md',
+                          'work/plan.md'], self._find(['tmp/', 'archive/']))
+        self.assertEqual(['todo.md', 'work/plan.md'], self._find(['personal', 'archive', 'a/b']))
+
+    def test_ignored_dirs_are_not_entered(self):
+        visited = []
+        original_scandir = os.scandir
+
+        def recorded_scandir(path):
+            visited.append(os.path.relpath(path, self.notes_dir))
+            return original_scandir(path)
+
+        calendar_main.os.scandir = recorded_scandir
+        try:
+            self._find(['tmp'])
+        finally:
+            calendar_main.os.scandir = original_scandir
+        self.assertEqual(['.', 'personal', 'work', 'work/archive'], sorted(visited))
+
+    def test_tree_listing_applies_the_same_rules(self):
+        notes_filter = calendar_main.NotesFilter(['archive', 'tmp'])
+        found = sorted(p for p in self.FILES if notes_filter.is_note_in_tree(p))
+        self.assertEqual(self._find(['archive', 'tmp']), found)
+
+
+class TestIncrementalReminders(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_TMP_ROOT, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory(dir=TEST_TMP_ROOT)
+        self.notes_dir = os.path.join(self.tmp.name, 'notes')
+        _init_notes_repo(self.notes_dir)
+        self.extracted = []
+        self.original_extract = calendar_main.extract_reminders
+
+        def counted_extract(task_master_dir, full_path):
+            self.extracted.append(os.path.relpath(full_path, self.notes_dir))
+            return self.original_extract(task_master_dir, full_path)
+
+        calendar_main.extract_reminders = counted_extract
+
+    def tearDown(self):
+        calendar_main.extract_reminders = self.original_extract
+        self.tmp.cleanup()
+
+    def _generate(self) -> dict:
+        self.extracted = []
+        return calendar_main.generate_reminders(TASK_MASTER_DIR, self.notes_dir, ['archive'], workers=1)
+
+    def _cache(self) -> dict:
+        with open(calendar_main.reminders_cache_path(self.notes_dir)) as f:
+            return json.load(f)
+
+    def test_only_changed_blobs_are_processed_again(self):
+        first = self._generate()
+        self.assertEqual(['notes.md', 'reminders.md'], sorted(self.extracted))
+
+        self.assertEqual(first, self._generate())
+        self.assertEqual([], self.extracted)
+
+        with open(os.path.join(self.notes_dir, 'reminders.md'), 'w') as f:
+            f.write('- [!] 2026.06.07: moved reminder\n')
+        _run_git(['commit', '-am', 'move reminder'], self.notes_dir)
+        titles = [r['title'] for r in self._generate().values()]
+        self.assertEqual(['reminders.md'], self.extracted)
+        self.assertTrue(any('moved reminder' in t for t in titles))
+        self.assertFalse(any('reminder checkpoint' in t for t in titles))
+
+    def test_deleted_paths_leave_the_cache(self):
+        self._generate()
+        self.assertEqual({'notes.md', 'reminders.md'}, set(self._cache()))
+
+        _run_git(['rm', '-q', 'reminders.md'], self.notes_dir)
+        _run_git(['commit', '-m', 'drop reminders'], self.notes_dir)
+        self.assertEqual({}, self._generate())
+        self.assertEqual([], self.extracted)
+        self.assertEqual({'notes.md'}, set(self._cache()))
+
+    def test_entries_of_another_day_are_processed_again(self):
+        self._generate()
+        cache = self._cache()
+        cache['notes.md']['date'] = '2000-01-01'
+        calendar_main.save_reminders_cache(calendar_main.reminders_cache_path(self.notes_dir), cache)
+
+        self._generate()
+        self.assertEqual(['notes.md'], self.extracted)
+
+
+class TestICSServer(unittest.TestCase):
+    def setUp(self):
+        os.makedirs(TEST_TMP_ROOT, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory(dir=TEST_TMP_ROOT)
+        self.ics_path = os.path.join(self.tmp.name, 'reminders.ics')
+        self._write_ics('BEGIN:VCALENDAR\nSUMMARY:first\nEND:VCALENDAR')
+        self.store = calendar_main.ICSStore()
+        self.server = calendar_main.make_ics_server(self.store, 0, host='127.0.0.1')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _write_ics(self, text: str):
+        with open(self.ics_path, 'w') as f:
+            f.write(text)
+
+    def _request(self, method: str = 'GET', path: str = None, headers: dict = None):
+        path = path or '/' + calendar_main.ICS_FILENAME
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        try:
+            connection.request(method, path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_unavailable_until_first_snapshot(self):
+        response, _ = self._request()
+        self.assertEqual(503, response.status)
+
+    def test_conditional_get_and_swap(self):
+        self.store.load(self.ics_path)
+        response, body = self._request()
+        self.assertEqual(200, response.status)
+        self.assertIn(b'SUMMARY:first', body)
+        self.assertEqual('text/calendar; charset=utf-8', response.getheader('Content-Type'))
+        etag = response.getheader('ETag')
+        last_modified = response.getheader('Last-Modified')
+
+        response, body = self._request(headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status)
+        self.assertEqual(b'', body)
+        response, _ = self._request(headers={'If-Modified-Since': last_modified})
+        self.assertEqual(304, response.status)
+
+        self._write_ics('BEGIN:VCALENDAR\nSUMMARY:second\nEND:VCALENDAR')
+        self.store.load(self.ics_path)
+        response, body = self._request(headers={'If-None-Match': etag})
+        self.assertEqual(200, response.status)
+        self.assertIn(b'SUMMARY:second', body)
+        self.assertNotEqual(etag, response.getheader('ETag'))
+
+    def test_same_content_keeps_the_etag(self):
+        self.store.load(self.ics_path)
+        snapshot = self.store.get()
+        self.store.load(self.ics_path)
+        self.assertIs(snapshot, self.store.get())
+
+    def test_gzip_and_head(self):
+        self.store.load(self.ics_path)
+        response, body = self._request(headers={'Accept-Encoding': 'deflate, gzip'})
+        self.assertEqual('gzip', response.getheader('Content-Encoding'))
+        self.assertIn(b'SUMMARY:first', gzip.decompress(body))
+
+        response, body = self._request(headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+
+        response, body = self._request('HEAD')
+        self.assertEqual(200, response.status)
+        self.assertEqual(b'', body)
+        self.assertEqual(str(len(self.store.get().body)), response.getheader('Content-Length'))
+
+    def test_other_paths_are_not_served(self):
+        self.store.load(self.ics_path)
+        response, _ = self._request(path='/main.py')
+        self.assertEqual(404, response.status)
+
+
+class TestCalendarAppSync(unittest.TestCase):
+    def _sync(self, app, reminders: dict) -> dict:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return calendar_main.update_reminders_at_google_calendar(app, reminders)
+
+    def _app_with_foreign_event(self, app_class):
+        app = app_class()
+        app.add_event(title='meeting', summary='not generated', timestamp=0, duration_minutes=30,
+                      add_notification=True)
+        app.calls.clear()
+        return app
+
+    def test_diff_keeps_adds_and_deletes_by_uid(self):
+        for app_class in [fake_calendar_app.FakeCalendarApp, fake_calendar_app.LegacyFakeCalendarApp]:
+            app = self._app_with_foreign_event(app_class)
+            first = fake_calendar_app.generate_reminders(120)
+            self.assertEqual({'kept': 0, 'added': 120, 'deleted': 0}, self._sync(app, first))
+
+            second = fake_calendar_app.generate_reminders(120, version=1, changed=0.25)
+            self.assertEqual({'kept': 90, 'added': 30, 'deleted': 30}, self._sync(app, second))
+            self.assertEqual(sorted(second), app.generated_uids())
+            self.assertEqual(121, len(app.events))
+            self.assertIn('meeting', [e['summary'] for e in app.events.values()])
+
+    def test_crlf_descriptions_keep_their_events(self):
+        app = fake_calendar_app.FakeCalendarApp()
+        reminders = fake_calendar_app.generate_reminders(3)
+        self._sync(app, reminders)
+        for e in app.events.values():
+            e['description'] = e['description'].replace('\n', '\r\n')
+        self.assertEqual({'kept': 3, 'added': 0, 'deleted': 0}, self._sync(app, reminders))
+
+    def test_batched_calls(self):
+        app = self._app_with_foreign_event(fake_calendar_app.FakeCalendarApp)
+        self._sync(app, fake_calendar_app.generate_reminders(120))
+        self.assertEqual({'list_events': 1, 'add_events': 3}, dict(app.calls))
+
+        app.calls.clear()
+        self._sync(app, fake_calendar_app.generate_reminders(120, version=1, changed=0.5))
+        self.assertEqual({'list_events': 1, 'delete_events': 2, 'add_events': 2}, dict(app.calls))
+
+    def test_duplicates_and_uidless_generated_events_are_deleted(self):
+        app = fake_calendar_app.FakeCalendarApp()
+        reminders = fake_calendar_app.generate_reminders(3)
+        self._sync(app, reminders)
+        uid = next(iter(reminders))
+        app.add_event(**{k: reminders[uid][k] for k in
+                         ['title', 'summary', 'timestamp', 'duration_minutes', 'add_notification']})
+        app.add_event(title='old', summary=f'old\n{calendar_main.GENERATED_DESC}', timestamp=0,
+                      duration_minutes=30, add_notification=False)
+
+        self.assertEqual({'kept': 3, 'added': 0, 'deleted': 2}, self._sync(app, reminders))
+        self.assertEqual(sorted(reminders), app.generated_uids())
+        self.assertEqual(3, len(app.events))
+
+
 if __name__ == '__main__':
     unittest.main()